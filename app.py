@@ -8,6 +8,7 @@ SAVA SOFTWARE FOR ENGINEERING
   para eliminar el bug de "caja de texto" en TODOS los botones.
 - Paleta de colores SAVA como acento principal.
 """
+import time
 import streamlit as st
 from typing import Optional, Dict, Any
 
@@ -19,8 +20,29 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# --- Observabilidad ---
+# Página de esta ejecución del script, para agrupar tiempos, lecturas y métricas
+RUN_PAGE = 'product_detail' if st.session_state.get('selected_product_id') else st.session_state.get('page', 'home')
+RUN_STARTED = time.perf_counter()
+
+# Métricas Prometheus en /metrics (opcional, METRICS_PORT); se arranca una vez por proceso
+from utils import metrics
+metrics.start_metrics_server()
+metrics.RERUNS.inc(page=RUN_PAGE)
+
+# Perfil de rendimiento (opcional, PROFILING=1): mide desde aquí, incluida la inyección del CSS
+from utils import profiling
+profiling.begin_rerun(RUN_PAGE)
+
+# --- Inicialización de Firebase en segundo plano ---
+# El header, el banner y el contenido estático se pintan mientras Firebase
+# termina de inicializarse; las secciones con datos esperan la señal de listo.
+from services.firebase_service import start_background_initialization
+start_background_initialization()
+
 # --- SISTEMA DE DISEÑO PROFESIONAL (SAVA + ML) ---
-st.markdown("""
+with profiling.span('render_css'):
+    st.markdown("""
     <style>
         /* ========================================
            1. SISTEMA DE TIPOGRAFÍA Y COLORES
@@ -679,6 +701,7 @@ TEXTS = {
         'user_orders': "Mis Compras",
         'user_logout': "Cerrar Sesión",
         'nav_signin': "Ingresar",
+        'session_expired': "Tu sesión expiró. Vuelve a ingresar.",
         'nav_signup': "Crear cuenta",
         'nav_cart': "Carrito",
         'page_home_title': "Descubre productos increíbles",
@@ -722,7 +745,13 @@ TEXTS = {
         'footer_copyright': "© 2025 SAVA Software for Engineering. Todos los derechos reservados.",
         'loading': "Cargando...",
         'no_products': "No se encontraron productos",
-        'signin_required': "Inicia sesión para agregar al carrito"
+        'signin_required': "Inicia sesión para agregar al carrito",
+        'orders_empty': "No tienes pedidos aún",
+        'orders_order': "Pedido",
+        'orders_status': "Estado",
+        'orders_products': "Productos",
+        'orders_view_items': "Ver productos",
+        'orders_load_more': "Cargar más pedidos"
     },
     'EN': {
         'search_placeholder': "Search products, brands, and more...",
@@ -733,6 +762,7 @@ TEXTS = {
         'user_orders': "My Orders",
         'user_logout': "Sign Out",
         'nav_signin': "Sign In",
+        'session_expired': "Your session has expired. Please sign in again.",
         'nav_signup': "Sign Up",
         'nav_cart': "Cart",
         'page_home_title': "Discover amazing products",
@@ -776,7 +806,13 @@ TEXTS = {
         'footer_copyright': "© 2025 SAVA Software for Engineering. All rights reserved.",
         'loading': "Loading...",
         'no_products': "No products found",
-        'signin_required': "Sign in to add to cart"
+        'signin_required': "Sign in to add to cart",
+        'orders_empty': "You have no orders yet",
+        'orders_order': "Order",
+        'orders_status': "Status",
+        'orders_products': "Products",
+        'orders_view_items': "View products",
+        'orders_load_more': "Load more orders"
     }
 }
 
@@ -803,23 +839,82 @@ init_session_state()
 T = TEXTS[st.session_state.lang]
 
 # --- Helpers ---
-def update_cart_count():
+@profiling.timed
+def prefetch_page_data():
+    """
+    Lanza en paralelo las lecturas independientes de la página actual
+    (carrito, categorías, productos) antes de empezar a pintarla.
+    """
+    from services.firebase_service import FirebaseService, is_firebase_ready
+    from config.settings import get_settings
+    from utils.prefetch import PagePrefetcher
+    
+    prefetcher = PagePrefetcher()
+    st.session_state.page_data = prefetcher
+    
+    # No bloquear el primer pintado: sin Firebase listo se conserva el último conteo
+    if st.session_state.user and is_firebase_ready():
+        uid = st.session_state.user['uid']
+        prefetcher.add('cart', lambda: FirebaseService().get_user_cart(uid))
+    
+    if st.session_state.selected_product_id:
+        return prefetcher
+    
+    page = st.session_state.page
+    if page == 'home':
+        prefetcher.add('products', lambda: FirebaseService().get_products(limit=8), fallback=[])
+    elif page == 'products' and not get_settings().firestore_async:
+        category = st.session_state.selected_category
+        search_query = st.session_state.search_query
+        prefetcher.add('categories', lambda: FirebaseService().get_categories(), fallback=[])
+        prefetcher.add('products', lambda: FirebaseService().get_products(
+            limit=24,
+            category=category,
+            search_query=search_query
+        ), fallback=[])
+    
+    return prefetcher
+
+@profiling.timed
+def update_cart_count(cart: Optional[list] = None):
     try:
-        from services.firebase_service import FirebaseService
-        firebase = FirebaseService()
+        from services.firebase_service import FirebaseService, is_firebase_ready
         if st.session_state.user:
-            cart = firebase.get_user_cart(st.session_state.user['uid'])
+            if cart is None:
+                # No bloquear el primer pintado: se conserva el último conteo
+                if not is_firebase_ready():
+                    return
+                firebase = FirebaseService()
+                cart = firebase.get_user_cart(st.session_state.user['uid'])
             st.session_state.cart_count = sum(item.get('quantity', 0) for item in cart)
         else:
             st.session_state.cart_count = 0
     except:
         st.session_state.cart_count = 0
 
+@profiling.timed
+def wait_for_data(skeleton_count: int = 8):
+    """Muestra skeletons de productos hasta que Firebase esté listo."""
+    from services.firebase_service import is_firebase_ready, wait_for_firebase
+    if is_firebase_ready():
+        return
+    
+    from components.product_list import render_product_skeleton
+    placeholder = st.empty()
+    with placeholder.container():
+        render_product_skeleton(skeleton_count)
+    wait_for_firebase()
+    placeholder.empty()
+
 def navigate_to(page: str):
+    if page == 'orders':
+        # Cada visita a pedidos empieza desde la primera página actualizada
+        st.session_state.pop('order_history', None)
     st.session_state.page = page
     st.rerun()
 
 # --- HEADER REDISEÑADO ---
+@profiling.timed
 def render_header():
     st.markdown('<div class="sava-header">', unsafe_allow_html=True)
     st.markdown('<div class="header-content">', unsafe_allow_html=True)
@@ -891,8 +986,11 @@ def render_header():
                 if st.button(f"📦 {T['user_orders']}", use_container_width=True):
                     navigate_to('orders')
                 if st.button(f"🚪 {T['user_logout']}", use_container_width=True):
+                    from services.token_manager import stop_session_tokens
+                    stop_session_tokens()
                     st.session_state.user = None
                     st.session_state.cart_count = 0
+                    st.session_state.pop('order_history', None)
                     navigate_to('home')
         else:
             # Usuario No Logueado
@@ -918,15 +1016,17 @@ def render_header():
     st.markdown('</div></div>', unsafe_allow_html=True) # Cierre de .header-content y .sava-header
 
 # --- SIDEBAR (solo productos) ---
-def render_sidebar():
+@profiling.timed
+def render_sidebar(categories: Optional[list] = None):
     with st.sidebar:
         st.title(f"🔍 {T['filter_title']}")
         st.divider()
         
         try:
-            from services.firebase_service import FirebaseService
-            firebase = FirebaseService()
-            categories = firebase.get_categories()
+            if categories is None:
+                from services.firebase_service import FirebaseService
+                firebase = FirebaseService()
+                categories = firebase.get_categories()
             
             if categories:
                 st.subheader(T['filter_categories'])
@@ -946,6 +1046,7 @@ def render_sidebar():
             pass
 
 # --- PÁGINAS ---
+@profiling.timed
 def render_home_page():
     # Banner promocional
     st.markdown("""
@@ -958,11 +1059,10 @@ def render_home_page():
     """, unsafe_allow_html=True)
     
     try:
-        from services.firebase_service import FirebaseService
         from components.product_list import render_product_grid
         
-        firebase = FirebaseService()
-        products = firebase.get_products(limit=8)
+        wait_for_data(8)
+        products = st.session_state.page_data.get('products')
         
         if products:
             st.markdown(f"## {T['page_featured_products']}")
@@ -972,21 +1072,34 @@ def render_home_page():
     except Exception as e:
         st.warning(T['loading'])
 
+@profiling.timed
 def render_products_page():
     st.markdown(f"# {T['page_products']}")
     
-    render_sidebar()
-    
     try:
-        from services.firebase_service import FirebaseService
         from components.product_list import render_product_grid
-        
-        firebase = FirebaseService()
-        products = firebase.get_products(
-            limit=24,
-            category=st.session_state.selected_category,
-            search_query=st.session_state.search_query
-        )
+        from config.settings import get_settings
+        
+        wait_for_data(12)
+        if get_settings().firestore_async:
+            # Categorías y productos se consultan a la vez
+            from services.async_firebase_service import AsyncFirebaseService
+            service = AsyncFirebaseService()
+            data = service.gather(
+                categories=service.get_categories(),
+                products=service.get_products(
+                    limit=24,
+                    category=st.session_state.selected_category,
+                    search_query=st.session_state.search_query
+                ),
+                fallbacks={'categories': [], 'products': []}
+            )
+            render_sidebar(data['categories'])
+            products = data['products']
+        else:
+            page_data = st.session_state.page_data
+            render_sidebar(page_data.get('categories'))
+            products = page_data.get('products')
         
         # Mostrar filtros activos
         filters = []
@@ -1005,6 +1118,7 @@ def render_products_page():
     except:
         st.warning(T['loading'])
 
+@profiling.timed
 def render_product_detail_page():
     product_id = st.session_state.selected_product_id
     
@@ -1048,7 +1162,9 @@ def render_product_detail_page():
             
             st.markdown(f"<div class='product-price'>{format_currency(product.get('price', 0))}</div>", unsafe_allow_html=True)
             
-            stock = product.get('stock', 0)
+            # Los productos con contadores repartidos guardan el stock en sus shards
+            from services.inventory_service import InventoryService
+            stock = InventoryService(firebase).get_stock(product_id)
             if stock > 0:
                 st.success(f"✅ {T['in_stock']}")
             else:
@@ -1071,6 +1187,7 @@ def render_product_detail_page():
     except Exception as e:
         st.error(str(e))
 
+@profiling.timed
 def render_cart_page():
     if not st.session_state.user:
         st.warning("Inicia sesión para ver tu carrito")
@@ -1085,7 +1202,7 @@ def render_cart_page():
         
         firebase = FirebaseService()
         cart_items = firebase.get_user_cart(st.session_state.user['uid'])
-        update_cart_count()
+        update_cart_count(cart_items)
         
         if not cart_items:
             st.info(T['cart_empty'])
@@ -1145,6 +1262,7 @@ def render_cart_page():
     except Exception as e:
         st.error(str(e))
 
+@profiling.timed
 def render_checkout_page():
     if not st.session_state.user:
         navigate_to('auth')
@@ -1184,6 +1302,7 @@ def render_checkout_page():
     except:
         pass
 
+@profiling.timed
 def render_auth_page():
     st.markdown(f"# {T['page_account']}")
     
@@ -1196,6 +1315,7 @@ def render_auth_page():
     with tab2:
         render_register_form()
 
+@profiling.timed
 def render_account_page():
     if not st.session_state.user:
         navigate_to('auth')
@@ -1217,6 +1337,7 @@ def render_account_page():
         if st.button(f"🛒 {T['nav_cart']}", use_container_width=True, key="account_cart_btn"):
             navigate_to('cart')
 
+@profiling.timed
 def render_orders_page():
     if not st.session_state.user:
         navigate_to('auth')
@@ -1228,32 +1349,67 @@ def render_orders_page():
         from services.firebase_service import FirebaseService
         from utils.formatters import format_currency, format_date
         
+        from config.settings import get_app_config
+        
         firebase = FirebaseService()
-        orders = firebase.get_user_orders(st.session_state.user['uid'])
+        uid = st.session_state.user['uid']
+        page_size = get_app_config()['orders_per_page']
+        
+        # Resúmenes cargados por página; los productos se cargan solo al pedirlos
+        history = st.session_state.get('order_history')
+        if not history or history['uid'] != uid:
+            first_page = firebase.get_user_order_summaries(uid, page_size=page_size)
+            history = {
+                'uid': uid,
+                'orders': first_page['orders'],
+                'next_cursor': first_page['next_cursor'],
+                'items': {}
+            }
+            st.session_state.order_history = history
+        
+        orders = history['orders']
         
         if orders:
             for order in orders:
-                with st.expander(f"Pedido #{order.get('id')[:8]} - {format_date(order.get('created_at'))}"):
-                    st.markdown(f"**Estado:** {order.get('status', 'pending').upper()}")
+                order_id = order.get('id')
+                with st.expander(f"{T['orders_order']} #{order_id[:8]} - {format_date(order.get('created_at'))}"):
+                    st.markdown(f"**{T['orders_status']}:** {order.get('status', 'pending').upper()}")
                     totals = order.get('totals', {})
-                    st.markdown(f"**Total:** {format_currency(totals.get('total', 0))}")
+                    st.markdown(f"**{T['cart_total']}:** {format_currency(totals.get('total', 0))}")
+                    
+                    if order_id not in history['items']:
+                        if st.button(T['orders_view_items'], key=f"order_items_{order_id}"):
+                            history['items'][order_id] = firebase.get_order_items(order_id)
                     
-                    items = order.get('items', [])
-                    st.markdown("**Productos:**")
-                    for item in items:
-                        st.caption(f"• {item.get('name')} x{item.get('quantity')}")
+                    if order_id in history['items']:
+                        st.markdown(f"**{T['orders_products']}:**")
+                        for item in history['items'][order_id]:
+                            st.caption(f"• {item.get('name')} x{item.get('quantity')}")
+            
+            if history['next_cursor']:
+                if st.button(T['orders_load_more'], key="orders_load_more"):
+                    next_page = firebase.get_user_order_summaries(
+                        uid,
+                        page_size=page_size,
+                        cursor=history['next_cursor']
+                    )
+                    history['orders'].extend(next_page['orders'])
+                    history['next_cursor'] = next_page['next_cursor']
+                    st.rerun()
         else:
-            st.info("No tienes pedidos aún")
+            st.info(T['orders_empty'])
             if st.button(T['cart_browse'], type="primary"):
                 navigate_to('products')
     except:
         pass
 
+@profiling.timed
 def render_about_page():
     from components.about import render_about_content
     render_about_content()
 
 # --- FOOTER ---
+@profiling.timed
 def render_footer():
     footer_html = f"""
     <div class="sava-footer">
@@ -1299,8 +1455,27 @@ def render_footer():
 
 # --- MAIN ---
 def main():
+    # Lecturas de Firestore memoizadas solo durante esta ejecución del script
+    from services.firebase_service import FirebaseService
+    from services import metering, slow_log
+    FirebaseService.begin_read_context()
+    # Lecturas/escrituras de Firestore de esta ejecución, por página (si la medición está activa)
+    metering.begin_rerun(RUN_PAGE)
+    # Página que se anota en el registro de operaciones lentas (si SLOW_LOG_PATH está definido)
+    slow_log.begin_rerun(RUN_PAGE)
+    # Sesión: el token de ID (renovado en segundo plano) debe seguir siendo válido
+    if st.session_state.user:
+        from services.token_manager import check_session_user, stop_session_tokens
+        if not check_session_user():
+            stop_session_tokens()
+            st.session_state.user = None
+            st.session_state.cart_count = 0
+            st.session_state.pop('order_history', None)
+            st.toast(T['session_expired'])
+    page_data = prefetch_page_data()
+    
     render_header()
-    update_cart_count()
+    update_cart_count(page_data.get('cart') if 'cart' in page_data else None)
     
     # El CSS ahora fuerza un fondo gris claro (#F3F4F6) para la página
     # El contenedor principal (.main .block-container) tiene fondo blanco
@@ -1334,6 +1509,16 @@ def main():
                 render_home_page()
     
     render_footer()
+    firestore_usage = metering.end_rerun()
+    slow_log.end_rerun()
+    metrics.RERUN_SECONDS.observe(time.perf_counter() - RUN_STARTED, page=RUN_PAGE)
+    
+    # Panel de rendimiento: tiempos de esta ejecución (solo con el perfil activo)
+    profile = profiling.end_rerun()
+    if profile is not None:
+        from components.perf_panel import render_perf_panel
+        from services.http_session import get_http_metrics
+        render_perf_panel(profile, firestore_usage, FirebaseService.get_saved_reads(), get_http_metrics())
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,200 @@
+"""
+Startup import-time benchmark for app.py.
+
+Runs ``import app`` in fresh interpreters with ``python -X importtime`` and
+reports the wall time of the import together with a per-package and
+per-module breakdown of where the time went. The Google SDKs and requests
+are loaded lazily, so they should not show up on the startup path; any that
+do are listed as eager heavy imports.
+
+Threads started while app.py is imported (the Firebase background
+initialization) are held until the import has finished and are never
+started, so their imports are not attributed to the startup path.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --page about --runs 10 --budget-ms 900
+    python benchmarks/import_time.py --json import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must only be imported when a Firestore/Storage/Auth path runs
+HEAVY_PACKAGES = ('firebase_admin', 'google.cloud', 'google.auth', 'google.api_core', 'grpc', 'requests')
+
+# Executed in the child interpreter. Prints one JSON line with the timings.
+_CHILD_SCRIPT = '''
+import json, sys, threading, time
+held = []
+start_thread = threading.Thread.start
+threading.Thread.start = lambda self: held.append(self)
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+render_ms = None
+if {page!r}:
+    import streamlit as st
+    st.session_state.page = {page!r}
+    app.main()
+    render_ms = (time.perf_counter() - imported) * 1000
+threading.Thread.start = start_thread
+heavy = sorted(name for name in sys.modules if name.split('.')[0] in {roots!r}
+               and any(name == p or name.startswith(p + '.') for p in {heavy!r}))
+print('BENCH ' + json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'render_ms': render_ms,
+    'held_threads': [t.name for t in held],
+    'heavy_modules': heavy,
+}}))
+'''
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        One entry per imported module with name, depth, self_us and cumulative_us
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|', 2)
+        name = name.rstrip()[1:]
+        stripped = name.lstrip(' ')
+        entries.append({
+            'name': stripped,
+            'depth': (len(name) - len(stripped)) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us)
+        })
+    return entries
+
+
+def run_once(page: Optional[str]) -> Dict[str, Any]:
+    """Import app.py in a fresh interpreter and collect timings."""
+    roots = sorted({p.split('.')[0] for p in HEAVY_PACKAGES})
+    code = _CHILD_SCRIPT.format(page=page, roots=roots, heavy=HEAVY_PACKAGES)
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    result_line = next((l for l in proc.stdout.splitlines() if l.startswith('BENCH ')), None)
+    if proc.returncode != 0 or result_line is None:
+        raise RuntimeError(f"Benchmark run failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+    result = json.loads(result_line[len('BENCH '):])
+    result['imports'] = parse_importtime(proc.stderr)
+    return result
+
+
+def summarize(runs: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Aggregate several runs into medians and breakdowns."""
+    import_ms = [r['import_ms'] for r in runs]
+    render_ms = [r['render_ms'] for r in runs if r['render_ms'] is not None]
+
+    # Breakdowns come from the median run so one outlier does not skew them
+    median_run = sorted(runs, key=lambda r: r['import_ms'])[len(runs) // 2]
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for entry in median_run['imports']:
+        by_package[entry['name'].split('.')[0]] += entry['self_us']
+
+    top_modules = sorted(median_run['imports'], key=lambda e: e['cumulative_us'], reverse=True)[:top]
+
+    return {
+        'python': sys.version.split()[0],
+        'runs': len(runs),
+        'import_ms': {
+            'median': statistics.median(import_ms),
+            'min': min(import_ms),
+            'max': max(import_ms)
+        },
+        'render_ms': {
+            'median': statistics.median(render_ms),
+            'min': min(render_ms),
+            'max': max(render_ms)
+        } if render_ms else None,
+        'modules_imported': len(median_run['imports']),
+        'by_package_ms': {
+            name: round(us / 1000, 2)
+            for name, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        },
+        'top_modules': [
+            {'name': e['name'], 'self_ms': round(e['self_us'] / 1000, 2), 'cumulative_ms': round(e['cumulative_us'] / 1000, 2)}
+            for e in top_modules
+        ],
+        'heavy_modules': median_run['heavy_modules'],
+        'held_threads': median_run['held_threads']
+    }
+
+
+def print_report(summary: Dict[str, Any]):
+    """Print a human-readable report."""
+    imp = summary['import_ms']
+    print(f"import app: median {imp['median']:.1f} ms (min {imp['min']:.1f}, max {imp['max']:.1f}) over {summary['runs']} runs")
+    if summary['render_ms']:
+        ren = summary['render_ms']
+        print(f"first render: median {ren['median']:.1f} ms (min {ren['min']:.1f}, max {ren['max']:.1f})")
+    print(f"modules imported: {summary['modules_imported']}")
+
+    print("\nSelf time by top-level package:")
+    for name, ms in summary['by_package_ms'].items():
+        print(f"  {ms:9.2f} ms  {name}")
+
+    print("\nSlowest imports (cumulative):")
+    for entry in summary['top_modules']:
+        print(f"  {entry['cumulative_ms']:9.2f} ms  {entry['name']}")
+
+    if summary['heavy_modules']:
+        print(f"\nEager heavy imports ({len(summary['heavy_modules'])}): "
+              + ', '.join(summary['heavy_modules'][:10]))
+    else:
+        print("\nNo heavy SDK imported on the startup path.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--runs', type=int, default=5, help='Measured runs (after one warm-up run)')
+    parser.add_argument('--page', default=None, help="Also render this static page after the import (e.g. 'about')")
+    parser.add_argument('--top', type=int, default=15, help='Entries shown in each breakdown')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Fail if the median import time exceeds this')
+    parser.add_argument('--no-heavy', action='store_true', help='Fail if a heavy SDK is imported at startup')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write the summary to this JSON file')
+    args = parser.parse_args(argv)
+
+    # Warm-up run so bytecode compilation is not measured
+    run_once(args.page)
+    runs = [run_once(args.page) for _ in range(args.runs)]
+    summary = summarize(runs, args.top)
+    summary['budget_ms'] = args.budget_ms
+
+    print_report(summary)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    if args.budget_ms is not None and summary['import_ms']['median'] > args.budget_ms:
+        print(f"\nFAIL: median import time {summary['import_ms']['median']:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        failed = True
+    if args.no_heavy and summary['heavy_modules']:
+        print("\nFAIL: heavy SDKs imported on the startup path")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
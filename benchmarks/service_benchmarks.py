@@ -0,0 +1,362 @@
+"""
+Service-layer benchmarks for FirebaseService.
+
+Runs the main read and write paths against the in-memory Firestore backend
+across catalog sizes and order-history lengths, and reports for every
+operation the wall time, the memory allocated while it runs (tracemalloc)
+and the Firestore RPCs, document reads and document writes it costs.
+
+get_products and get_categories are measured both cold (st.cache_data
+cleared before every call, i.e. what a cache miss costs) and warm.
+Every call starts a fresh per-rerun read context, like a script run does.
+place_order is measured the way checkout calls it (committing a stock
+reservation made outside the timed call) and without a reservation. The
+post-order job queue goes to a temporary directory without worker threads,
+so the timings only include the enqueue.
+
+Usage:
+    python benchmarks/service_benchmarks.py
+    python benchmarks/service_benchmarks.py --catalog-sizes 100,1000 --order-histories 1,100 --json before.json
+    python benchmarks/service_benchmarks.py --latency-ms 20 --iterations 3
+    python benchmarks/service_benchmarks.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = [f"Category {i}" for i in range(20)]
+BENCH_USER = 'bench-user'
+
+
+# ==================== Data ====================
+
+def seed_catalog(db, size: int, rng: random.Random) -> List[str]:
+    """Write size products in batches. Returns the product IDs."""
+    product_ids = []
+    batch = db.batch()
+    for i in range(size):
+        ref = db.collection('products').document(f"p{i:06d}")
+        batch.set(ref, {
+            'name': f"Product {i}",
+            'description': f"Description of product {i} " + rng.choice(['cotton', 'steel', 'glass', 'wood']),
+            'price': round(rng.uniform(1, 500), 2),
+            'category': rng.choice(CATEGORIES),
+            'active': rng.random() > 0.05,
+            'stock': rng.randint(0, 200),
+            'images': [{'url': f"https://example.com/p{i}.jpg"}],
+            'created_at': datetime.now()
+        })
+        product_ids.append(ref.id)
+        if len(batch) == 500:
+            batch.commit()
+            batch = db.batch()
+    if len(batch):
+        batch.commit()
+    return product_ids
+
+
+def seed_order_history(db, user_id: str, count: int, product_ids: List[str], rng: random.Random):
+    """Write count orders for a user."""
+    start = datetime.now() - timedelta(days=count)
+    order_ids = []
+    batch = db.batch()
+    for i in range(count):
+        ref = db.collection('orders').document()
+        items = [
+            {'product_id': pid, 'name': pid, 'price': 10.0, 'image': '', 'quantity': rng.randint(1, 3)}
+            for pid in rng.sample(product_ids, min(3, len(product_ids)))
+        ]
+        batch.set(ref, {
+            'user_id': user_id,
+            'items': items,
+            'totals': {'subtotal': 30.0, 'tax': 3.0, 'shipping': 5.0, 'total': 38.0},
+            'shipping_info': {'full_name': 'Bench User', 'address': 'Street 1', 'city': 'City'},
+            'payment_info': {'method': 'card'},
+            'status': 'pending',
+            'created_at': start + timedelta(days=i),
+            'updated_at': start + timedelta(days=i)
+        })
+        order_ids.append(ref.id)
+        if len(batch) == 500:
+            batch.commit()
+            batch = db.batch()
+    if len(batch):
+        batch.commit()
+    db.collection('users').document(user_id).set({'display_name': user_id, 'cart': [], 'orders': order_ids})
+
+
+# ==================== Measurement ====================
+
+def measure(db, fn: Callable[[], Any], setup: Optional[Callable[[], None]], iterations: int) -> Dict[str, Any]:
+    """
+    Run fn once to warm up, iterations times for timing and Firestore
+    accounting, then once more under tracemalloc for allocations (tracing
+    slows execution, so it is kept out of the timed runs).
+    """
+    from services.firebase_service import FirebaseService
+
+    if setup:
+        setup()
+    FirebaseService.begin_read_context()
+    fn()
+
+    timings = []
+    totals = {'rpcs': 0, 'document_reads': 0, 'document_writes': 0}
+    failures = 0
+
+    for _ in range(iterations):
+        if setup:
+            setup()
+        FirebaseService.begin_read_context()
+        db.reset_stats()
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        stats = db.stats()
+        for key in totals:
+            totals[key] += stats[key]
+        if result is None or result is False:
+            failures += 1
+
+    if setup:
+        setup()
+    FirebaseService.begin_read_context()
+    tracemalloc.start()
+    fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'wall_ms': {
+            'median': round(statistics.median(timings), 3),
+            'mean': round(statistics.fmean(timings), 3),
+            'min': round(timings[0], 3),
+            'p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3)
+        },
+        'rpcs': totals['rpcs'] / iterations,
+        'reads': totals['document_reads'] / iterations,
+        'writes': totals['document_writes'] / iterations,
+        'alloc_peak_kb': round(peak / 1024, 1),
+        'alloc_retained_kb': round(current / 1024, 1),
+        'failures': failures
+    }
+
+
+def run_suite(catalog_sizes: List[int], order_histories: List[int], iterations: int,
+              latency_ms: float, seed: int, progress: Callable[[str], None]) -> List[Dict[str, Any]]:
+    """Run every benchmark and return one result per (operation, parameters)."""
+    from config.settings import get_settings
+    from services import job_queue
+
+    # Post-order jobs go to a throwaway queue without workers, outside the working tree
+    config = get_settings().app_config
+    saved = {key: config[key] for key in ('job_queue_path', 'job_workers')}
+    with tempfile.TemporaryDirectory() as job_dir:
+        config.update(job_queue_path=os.path.join(job_dir, 'jobs.sqlite3'), job_workers=0)
+        job_queue._queue = None
+        # Created here so the SQLite schema setup is not part of a timed call
+        job_queue.get_job_queue()
+        try:
+            return _run_suite(catalog_sizes, order_histories, iterations, latency_ms, seed, progress)
+        finally:
+            job_queue._queue = None
+            config.update(saved)
+
+
+def _run_suite(catalog_sizes: List[int], order_histories: List[int], iterations: int,
+               latency_ms: float, seed: int, progress: Callable[[str], None]) -> List[Dict[str, Any]]:
+    from services.firebase_service import FirebaseService, _get_cached_products, _get_cached_categories
+    from services.firestore_backend import MemoryBackend, set_backend
+    from services.inventory_service import InventoryService
+
+    # Install the memory backend before FirebaseService skips Firebase initialization
+    set_backend(MemoryBackend())
+    firebase = FirebaseService()
+    inventory = InventoryService(firebase)
+    results = []
+
+    def record(operation: str, params: Dict[str, Any], fn, setup=None):
+        progress(f"{operation} {params}")
+        result = measure(db, fn, setup, iterations)
+        results.append({'operation': operation, 'params': params, **result})
+
+    def clear_caches():
+        _get_cached_products.clear()
+        _get_cached_categories.clear()
+
+    for size in catalog_sizes:
+        rng = random.Random(seed)
+        set_backend(MemoryBackend())
+        db = firebase.get_db()
+        product_ids = seed_catalog(db, size, rng)
+        db.collection('users').document(BENCH_USER).set({'display_name': 'Bench', 'cart': [], 'orders': []})
+        clear_caches()
+        db.latency_ms = latency_ms
+        params = {'catalog_size': size}
+
+        record('get_products[cold]', params, lambda: firebase.get_products(limit=12), clear_caches)
+        record('get_products[warm]', params, lambda: firebase.get_products(limit=12))
+        record('get_products[search,cold]', params,
+               lambda: firebase.get_products(limit=12, search_query='steel'), clear_caches)
+        record('get_categories[cold]', params, firebase.get_categories, clear_caches)
+        record('get_categories[warm]', params, firebase.get_categories)
+
+        cart_products = rng.sample(product_ids, min(5, len(product_ids)))
+        record('add_to_cart', params, lambda: firebase.add_to_cart(BENCH_USER, rng.choice(cart_products), 1))
+        record('update_cart_item', params,
+               lambda: firebase.update_cart_item(BENCH_USER, cart_products[0], rng.randint(1, 5)))
+
+        # Enough stock for every iteration; orders take real stock now
+        order_items = [{'product_id': pid, 'name': pid, 'price': 10.0, 'image': '', 'quantity': 1}
+                       for pid in cart_products[:3]]
+        for pid in cart_products[:3]:
+            db.collection('products').document(pid).update({'active': True, 'stock': 10 ** 6})
+
+        def _order_data():
+            return {
+                'items': [dict(item) for item in order_items],
+                'totals': {'subtotal': 30.0, 'tax': 3.0, 'shipping': 5.0, 'total': 38.0},
+                'shipping_info': {},
+                'payment_info': {}
+            }
+
+        reservation = {}
+
+        def _reserve():
+            # Checkout reserves on the review step, before the order is placed
+            reservation['id'] = uuid.uuid4().hex
+            inventory.reserve(reservation['id'], BENCH_USER, order_items)
+
+        record('place_order[reservation]', params,
+               lambda: firebase.place_order(BENCH_USER, _order_data(), order_id=reservation['id'],
+                                            reservation_id=reservation['id']),
+               _reserve)
+        record('place_order[no reservation]', params,
+               lambda: firebase.place_order(BENCH_USER, _order_data(), order_id=uuid.uuid4().hex))
+
+    size = min(catalog_sizes)
+    rng = random.Random(seed)
+    set_backend(MemoryBackend())
+    db = firebase.get_db()
+    product_ids = seed_catalog(db, size, rng)
+    for history in order_histories:
+        seed_order_history(db, f"history-{history}", history, product_ids, rng)
+    db.latency_ms = latency_ms
+
+    for history in order_histories:
+        user_id = f"history-{history}"
+        params = {'order_history': history}
+        record('get_user_orders', params, lambda: firebase.get_user_orders(user_id))
+        record('get_user_order_summaries', params, lambda: firebase.get_user_order_summaries(user_id))
+
+    set_backend(None)
+    return results
+
+
+# ==================== Reporting ====================
+
+def _result_key(result: Dict[str, Any]) -> str:
+    params = ','.join(f"{k}={v}" for k, v in sorted(result['params'].items()))
+    return f"{result['operation']} [{params}]"
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"\n{'operation':<58} {'median ms':>10} {'p95 ms':>9} {'rpcs':>7} {'reads':>9} {'writes':>7} {'peak KB':>9}")
+    for r in results:
+        flag = '  FAILED' if r['failures'] else ''
+        print(f"{_result_key(r):<58} {r['wall_ms']['median']:>10.3f} {r['wall_ms']['p95']:>9.3f} "
+              f"{r['rpcs']:>7.1f} {r['reads']:>9.1f} {r['writes']:>7.1f} {r['alloc_peak_kb']:>9.1f}{flag}")
+
+
+def compare(before_path: str, after_path: str) -> int:
+    """Print per-operation changes between two JSON reports."""
+    with open(before_path, encoding='utf-8') as f:
+        before = {_result_key(r): r for r in json.load(f)['results']}
+    with open(after_path, encoding='utf-8') as f:
+        after = {_result_key(r): r for r in json.load(f)['results']}
+
+    print(f"{'operation':<58} {'median ms':>21} {'reads':>17} {'writes':>15}")
+    for key in sorted(before.keys() & after.keys()):
+        b, a = before[key], after[key]
+        ratio = a['wall_ms']['median'] / b['wall_ms']['median'] if b['wall_ms']['median'] else float('inf')
+        print(f"{key:<58} {b['wall_ms']['median']:>8.2f} -> {a['wall_ms']['median']:>8.2f} ({ratio:4.2f}x)"
+              f" {b['reads']:>7.1f} -> {a['reads']:>7.1f} {b['writes']:>6.1f} -> {a['writes']:>6.1f}")
+    for key in sorted(before.keys() - after.keys()):
+        print(f"{key:<58} removed")
+    for key in sorted(after.keys() - before.keys()):
+        print(f"{key:<58} new")
+    return 0
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the service layer on the in-memory Firestore backend.')
+    parser.add_argument('--catalog-sizes', default='100,1000,10000,100000', help='Comma-separated product counts')
+    parser.add_argument('--order-histories', default='1,10,100,1000', help='Comma-separated orders per user')
+    parser.add_argument('--iterations', type=int, default=5, help='Timed calls per benchmark')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated latency per Firestore RPC')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write results to this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two JSON reports and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+
+    results = run_suite(
+        [int(s) for s in args.catalog_sizes.split(',')],
+        [int(h) for h in args.order_histories.split(',')],
+        args.iterations,
+        args.latency_ms,
+        args.seed,
+        progress=lambda message: print(f"running {message}", file=sys.stderr)
+    )
+    print_results(results)
+
+    if args.json_path:
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'git_revision': _git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'iterations': args.iterations,
+                'latency_ms': args.latency_ms,
+                'seed': args.seed
+            },
+            'results': results
+        }
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if any(r['failures'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
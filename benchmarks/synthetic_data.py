@@ -0,0 +1,497 @@
+"""
+Synthetic catalog and traffic data for scale testing.
+
+Generates a deterministic dataset shaped like the one the app writes:
+a product catalog with skewed category sizes, Spanish and/or English names,
+image lists, log-normal prices and review ratings; users with carts and
+addresses; and an order history whose orders are spread unevenly over the
+users (a few heavy buyers, a long tail of occasional ones) and favour
+popular products. The same seed and options always produce the same
+documents, including their IDs.
+
+Documents are generated as a stream, so a 100k-product, 1M-order dataset
+never has to be held in memory as a whole, and are loaded in bulk either
+into Cloud Firestore or into an in-memory snapshot file that the 'memory'
+backend starts from (MEMORY_DATA_PATH).
+
+Usage:
+    python benchmarks/synthetic_data.py --preset small --output data.pickle
+    FIRESTORE_BACKEND=memory MEMORY_DATA_PATH=data.pickle streamlit run app.py
+    python benchmarks/synthetic_data.py --preset scale --output scale.pickle
+    python benchmarks/synthetic_data.py --products 5000 --users 500 --orders 20000 --locale es --output es.pickle
+    python benchmarks/synthetic_data.py --preset medium --target firestore --yes
+"""
+import argparse
+import math
+import os
+import random
+import string
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# (collection path, document ID, data)
+Document = Tuple[str, str, Dict[str, Any]]
+
+PRESETS = {
+    'small': {'products': 1000, 'users': 100, 'orders': 1000},
+    'medium': {'products': 10000, 'users': 5000, 'orders': 100000},
+    'scale': {'products': 100000, 'users': 50000, 'orders': 1000000},
+}
+
+LOCALES = ('es', 'en', 'mixed')
+
+# Category names (es, en), median price and product nouns (es, en)
+CATEGORIES = [
+    (('Ropa', 'Clothing'), 35, [('Camiseta', 'T-Shirt'), ('Sudadera', 'Hoodie'), ('Chaqueta', 'Jacket'), ('Pantalón', 'Trousers'), ('Vestido', 'Dress')]),
+    (('Calzado', 'Footwear'), 70, [('Zapatilla', 'Sneaker'), ('Bota', 'Boot'), ('Sandalia', 'Sandal'), ('Mocasín', 'Loafer')]),
+    (('Electrónica', 'Electronics'), 180, [('Auriculares', 'Headphones'), ('Altavoz', 'Speaker'), ('Cargador', 'Charger'), ('Reloj inteligente', 'Smartwatch'), ('Teclado', 'Keyboard')]),
+    (('Hogar', 'Home'), 45, [('Lámpara', 'Lamp'), ('Cojín', 'Cushion'), ('Alfombra', 'Rug'), ('Jarrón', 'Vase'), ('Espejo', 'Mirror')]),
+    (('Cocina', 'Kitchen'), 30, [('Sartén', 'Frying Pan'), ('Cafetera', 'Coffee Maker'), ('Cuchillo', 'Knife'), ('Taza', 'Mug'), ('Tabla de cortar', 'Cutting Board')]),
+    (('Deportes', 'Sports'), 55, [('Balón', 'Ball'), ('Esterilla', 'Mat'), ('Mancuerna', 'Dumbbell'), ('Raqueta', 'Racket'), ('Botella', 'Bottle')]),
+    (('Belleza', 'Beauty'), 20, [('Crema', 'Cream'), ('Sérum', 'Serum'), ('Perfume', 'Perfume'), ('Champú', 'Shampoo')]),
+    (('Juguetes', 'Toys'), 25, [('Puzle', 'Puzzle'), ('Peluche', 'Plush Toy'), ('Juego de mesa', 'Board Game'), ('Juego de construcción', 'Building Set')]),
+    (('Libros', 'Books'), 18, [('Novela', 'Novel'), ('Cuaderno', 'Notebook'), ('Guía', 'Guide'), ('Atlas', 'Atlas')]),
+    (('Jardín', 'Garden'), 40, [('Maceta', 'Planter'), ('Regadera', 'Watering Can'), ('Podadora', 'Pruner'), ('Manguera', 'Hose')]),
+    (('Mascotas', 'Pets'), 28, [('Cama para mascotas', 'Pet Bed'), ('Correa', 'Leash'), ('Comedero', 'Feeder'), ('Rascador', 'Scratching Post')]),
+    (('Accesorios', 'Accessories'), 32, [('Mochila', 'Backpack'), ('Cartera', 'Wallet'), ('Reloj', 'Watch'), ('Bufanda', 'Scarf'), ('Gorra', 'Cap')]),
+    (('Oficina', 'Office'), 22, [('Bolígrafo', 'Pen'), ('Agenda', 'Planner'), ('Organizador', 'Organizer'), ('Flexo', 'Desk Lamp')]),
+    (('Viaje', 'Travel'), 90, [('Maleta', 'Suitcase'), ('Neceser', 'Toiletry Bag'), ('Almohada de viaje', 'Travel Pillow'), ('Adaptador', 'Adapter')]),
+]
+
+# Spanish adjectives that agree with both genders, so any noun can take any of them
+ADJECTIVES = [('Premium', 'Premium'), ('Esencial', 'Essential'), ('Profesional', 'Pro'), ('Elegante', 'Elegant'),
+              ('Resistente', 'Durable'), ('Versátil', 'Versatile'), ('Original', 'Original'), ('Deluxe', 'Deluxe'),
+              ('Joven', 'Young'), ('Natural', 'Natural')]
+MATERIALS = [('de algodón', 'Cotton'), ('de acero', 'Steel'), ('de madera', 'Wooden'), ('de cuero', 'Leather'),
+             ('de vidrio', 'Glass'), ('de bambú', 'Bamboo'), ('de lino', 'Linen'), ('de aluminio', 'Aluminium')]
+COLORS = [('Negro', 'Black'), ('Blanco', 'White'), ('Azul', 'Blue'), ('Rojo', 'Red'), ('Verde', 'Green'),
+          ('Gris', 'Grey'), ('Beige', 'Beige')]
+
+FIRST_NAMES = ['Lucía', 'Hugo', 'Martina', 'Mateo', 'Sofía', 'Leo', 'Paula', 'Daniel', 'Carmen', 'Javier',
+               'Emma', 'Oliver', 'Ava', 'James', 'Mia', 'Noah', 'Grace', 'Henry', 'Chloe', 'Samuel']
+LAST_NAMES = ['García', 'Martínez', 'López', 'Sánchez', 'Pérez', 'Gómez', 'Fernández', 'Ruiz', 'Díaz', 'Moreno',
+              'Smith', 'Johnson', 'Brown', 'Taylor', 'Wilson', 'Clark', 'Walker', 'Hall', 'Young', 'King']
+CITIES = [('Madrid', 'Madrid', 'ES'), ('Barcelona', 'Barcelona', 'ES'), ('Valencia', 'Valencia', 'ES'),
+          ('Sevilla', 'Sevilla', 'ES'), ('Ciudad de México', 'CDMX', 'MX'), ('Buenos Aires', 'CABA', 'AR'),
+          ('Bogotá', 'Cundinamarca', 'CO'), ('New York', 'NY', 'US'), ('Austin', 'TX', 'US'), ('London', 'London', 'GB')]
+STREETS = ['Calle Mayor', 'Avenida de la Constitución', 'Calle del Sol', 'Paseo de Gracia', 'Main Street',
+           'Oak Avenue', 'High Street', 'Calle Luna']
+PAYMENT_METHODS = [('Credit/Debit Card', 0.7), ('PayPal', 0.2), ('Bank Transfer', 0.1)]
+
+# The app's checkout totals (see render_cart_page)
+TAX_RATE = 0.08
+SHIPPING = 5.99
+
+_ID_CHARS = string.ascii_letters + string.digits
+
+
+def _auto_id(rng: random.Random) -> str:
+    """A 20-character ID like Firestore's auto IDs, drawn from rng so it is reproducible."""
+    return ''.join(rng.choices(_ID_CHARS, k=20))
+
+
+def zipf_cum_weights(n: int, skew: float) -> List[float]:
+    """
+    Cumulative weights of a Zipf distribution over n ranks, for rng.choices().
+    A skew of 0 is uniform; larger values concentrate on the first ranks.
+    """
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+class SyntheticDataset:
+    """Deterministic synthetic dataset, generated as a stream of documents."""
+
+    def __init__(self, products: int, users: int, orders: int, seed: int = 42,
+                 locale: str = 'mixed', category_skew: float = 1.0, popularity_skew: float = 0.8,
+                 order_skew: float = 1.5, max_images: int = 4, cart_rate: float = 0.3,
+                 inactive_rate: float = 0.03, stock_shards: int = 0, history_days: int = 365,
+                 end_date: Optional[date] = None):
+        """
+        Args:
+            products: Number of products
+            users: Number of users
+            orders: Number of orders, spread over the users
+            seed: Random seed; the same seed and options give the same documents
+            locale: Product and category names in 'es', 'en' or 'mixed' (per product,
+                with Spanish category names so every product shares one category list)
+            category_skew: Zipf exponent of category sizes (0 = all categories equal)
+            popularity_skew: Zipf exponent of product popularity in carts and orders
+            order_skew: Pareto shape of orders per user (lower = heavier top buyers)
+            max_images: Maximum images per product (at least one)
+            cart_rate: Fraction of users with a non-empty cart
+            inactive_rate: Fraction of products that are not active
+            stock_shards: Split each product's stock over this many sharded counters (0 = plain stock field)
+            history_days: Days of order and catalog history
+            end_date: Last day of the history (today if omitted); fixing it makes timestamps reproducible too
+        """
+        if locale not in LOCALES:
+            raise ValueError(f"Unknown locale '{locale}'. Available: {', '.join(LOCALES)}")
+        if users < 1 and orders:
+            raise ValueError("Orders need at least one user")
+
+        self.counts = {'products': products, 'users': users, 'orders': orders}
+        self.seed = seed
+        self.locale = locale
+        self.category_skew = category_skew
+        self.popularity_skew = popularity_skew
+        self.order_skew = order_skew
+        self.max_images = max(1, max_images)
+        self.cart_rate = cart_rate
+        self.inactive_rate = inactive_rate
+        self.stock_shards = stock_shards
+        end_date = end_date or date.today()
+        self.now = datetime(end_date.year, end_date.month, end_date.day)
+        self.start = self.now - timedelta(days=history_days)
+
+        self._catalog: Optional[List[Tuple[str, str, float, str]]] = None
+        self._user_ids: Optional[List[str]] = None
+        self._user_orders: Optional[Dict[int, List[str]]] = None
+        self._people: Dict[int, Dict[str, Any]] = {}
+
+    def _rng(self, stream: str) -> random.Random:
+        """An independent generator per stream, so changing one count does not reshuffle the others."""
+        return random.Random(f"{self.seed}/{stream}")
+
+    # ----- Products -----
+
+    def category_names(self) -> List[str]:
+        """Category names in the dataset's locale."""
+        index = 1 if self.locale == 'en' else 0
+        return [names[index] for names, _, _ in CATEGORIES]
+
+    def products(self) -> Iterator[Document]:
+        """Product documents, plus their stock shards when stock_shards is set."""
+        rng = self._rng('products')
+        categories = self.category_names()
+        category_weights = zipf_cum_weights(len(CATEGORIES), self.category_skew)
+        span = (self.now - self.start).total_seconds()
+        from services.inventory_service import SHARDS_COLLECTION
+
+        for _ in range(self.counts['products']):
+            product_id = _auto_id(rng)
+            index = rng.choices(range(len(CATEGORIES)), cum_weights=category_weights)[0]
+            _, median_price, nouns = CATEGORIES[index]
+            lang = rng.randrange(2) if self.locale == 'mixed' else (1 if self.locale == 'en' else 0)
+
+            noun = rng.choice(nouns)[lang]
+            adjective = rng.choice(ADJECTIVES)[lang]
+            material = rng.choice(MATERIALS)[lang]
+            color = rng.choice(COLORS)[lang]
+            if lang == 0:
+                name = f"{noun} {adjective} {material}"
+                description = f"{noun} {adjective.lower()} {material}, color {color.lower()}. Envío en 24-48 horas."
+            else:
+                name = f"{adjective} {material} {noun}"
+                description = f"{adjective} {material.lower()} {noun.lower()} in {color.lower()}. Ships in 1-2 days."
+
+            # Log-normal around the category median, ending in .99
+            price = max(0.99, math.floor(median_price * rng.lognormvariate(0, 0.5)) + 0.99)
+            review_count = int(rng.paretovariate(1.2)) - 1
+            rating = round(min(5.0, max(1.0, rng.gauss(4.2, 0.6))), 1) if review_count else 0
+            stock = 0 if rng.random() < 0.05 else rng.randint(1, 500)
+            created_at = self.start + timedelta(seconds=rng.uniform(0, span))
+
+            product = {
+                'name': name,
+                'description': description,
+                'price': price,
+                'category': categories[index],
+                'images': [
+                    {'url': f"https://picsum.photos/seed/{product_id}-{n}/600/600", 'alt': name}
+                    for n in range(rng.randint(1, self.max_images))
+                ],
+                'rating': rating,
+                'review_count': review_count,
+                'stock': stock,
+                'active': rng.random() >= self.inactive_rate,
+                'created_at': created_at,
+                'updated_at': created_at,
+            }
+
+            if self.stock_shards:
+                product['stock_shards'] = self.stock_shards
+                base, remainder = divmod(stock, self.stock_shards)
+                for shard_id in range(self.stock_shards):
+                    yield (f"products/{product_id}/{SHARDS_COLLECTION}", str(shard_id),
+                           {'count': base + (1 if shard_id < remainder else 0)})
+
+            yield ('products', product_id, product)
+
+    def _get_catalog(self) -> List[Tuple[str, str, float, str]]:
+        """(id, name, price, image) of the active products, in generation order."""
+        if self._catalog is None:
+            self._catalog = [
+                (document_id, data['name'], data['price'], data['images'][0]['url'])
+                for collection, document_id, data in self.products()
+                if collection == 'products' and data['active']
+            ]
+        return self._catalog
+
+    def _line_items(self, rng: random.Random, popularity: List[float], count: int) -> List[Dict[str, Any]]:
+        """Cart/order items as FirebaseService.add_to_cart stores them."""
+        catalog = self._get_catalog()
+        items = {}
+        for index in rng.choices(range(len(catalog)), cum_weights=popularity, k=count):
+            product_id, name, price, image = catalog[index]
+            if product_id in items:
+                items[product_id]['quantity'] += 1
+            else:
+                items[product_id] = {'product_id': product_id, 'name': name, 'price': price,
+                                     'image': image, 'quantity': rng.choice((1, 1, 1, 2, 3))}
+        return list(items.values())
+
+    # ----- Users and orders -----
+
+    def _get_user_ids(self) -> List[str]:
+        if self._user_ids is None:
+            rng = self._rng('user-ids')
+            self._user_ids = [_auto_id(rng) for _ in range(self.counts['users'])]
+        return self._user_ids
+
+    def _person(self, index: int) -> Dict[str, Any]:
+        """Name and address of a user, the same in every order of that user."""
+        if index in self._people:
+            return self._people[index]
+        rng = random.Random(f"{self.seed}/person/{index}")
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        city, state, country = rng.choice(CITIES)
+        person = self._people[index] = {
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': f"user{index}@example.com",
+            'phone': f"+34 6{rng.randint(0, 99999999):08d}",
+            'street': f"{rng.choice(STREETS)} {rng.randint(1, 200)}",
+            'apartment': f"{rng.randint(1, 9)}º {rng.choice('ABCD')}" if rng.random() < 0.5 else '',
+            'city': city,
+            'state': state,
+            'zip_code': f"{rng.randint(1000, 99999):05d}",
+            'country': country,
+        }
+        return person
+
+    def orders(self) -> Iterator[Document]:
+        """
+        Order documents in chronological order. Users are drawn with Pareto
+        weights, so order histories range from none to thousands of orders.
+        """
+        rng = self._rng('orders')
+        user_ids = self._get_user_ids()
+        catalog = self._get_catalog()
+        count = self.counts['orders']
+        if not count or not catalog:
+            self._user_orders = {}
+            return
+
+        user_weights = list(accumulate(rng.paretovariate(self.order_skew) for _ in user_ids))
+        popularity = zipf_cum_weights(len(catalog), self.popularity_skew)
+        span = (self.now - self.start).total_seconds()
+        methods, method_weights = zip(*PAYMENT_METHODS)
+        self._user_orders = {}
+
+        for n, user_index in enumerate(rng.choices(range(len(user_ids)), cum_weights=user_weights, k=count)):
+            order_id = _auto_id(rng)
+            created_at = self.start + timedelta(seconds=span * (n + rng.random()) / count)
+            age = self.now - created_at
+            if rng.random() < 0.03:
+                status = 'cancelled'
+            elif age < timedelta(days=2):
+                status = rng.choice(('pending', 'processing'))
+            elif age < timedelta(days=7):
+                status = 'shipped'
+            else:
+                status = 'delivered'
+
+            items = self._line_items(rng, popularity, rng.choice((1, 1, 1, 2, 2, 3, 4, 5)))
+            subtotal = sum(item['price'] * item['quantity'] for item in items)
+            tax = round(subtotal * TAX_RATE, 2)
+
+            self._user_orders.setdefault(user_index, []).append(order_id)
+            yield ('orders', order_id, {
+                'user_id': user_ids[user_index],
+                'items': items,
+                'totals': {
+                    'subtotal': round(subtotal, 2),
+                    'tax': tax,
+                    'shipping': SHIPPING,
+                    'total': round(subtotal + tax + SHIPPING, 2),
+                },
+                'shipping_info': dict(self._person(user_index)),
+                'payment_info': {'method': rng.choices(methods, weights=method_weights)[0]},
+                'status': status,
+                'created_at': created_at,
+                'updated_at': created_at + timedelta(hours=rng.randint(0, 72)) if status != 'pending' else created_at,
+            })
+
+    def users(self) -> Iterator[Document]:
+        """User documents with carts, addresses and the IDs of their orders (run orders() first)."""
+        if self._user_orders is None:
+            for _ in self.orders():
+                pass
+
+        rng = self._rng('users')
+        catalog = self._get_catalog()
+        popularity = zipf_cum_weights(len(catalog), self.popularity_skew) if catalog else []
+
+        for index, user_id in enumerate(self._get_user_ids()):
+            person = self._person(index)
+            cart = []
+            if catalog and rng.random() < self.cart_rate:
+                cart = self._line_items(rng, popularity, rng.randint(1, 4))
+
+            yield ('users', user_id, {
+                'uid': user_id,
+                'email': person['email'],
+                'display_name': f"{person['first_name']} {person['last_name']}",
+                'created_at': self.start - timedelta(days=rng.randint(1, 720)),
+                'cart': cart,
+                'orders': self._user_orders.get(index, []),
+                'addresses': [{k: v for k, v in person.items() if k != 'email'}] if rng.random() < 0.6 else [],
+            })
+
+    def documents(self) -> Iterator[Document]:
+        """Every document of the dataset: products, then orders, then users."""
+        yield from self.products()
+        yield from self.orders()
+        yield from self.users()
+
+
+# ==================== Loading ====================
+
+def load_documents(db, documents: Iterator[Document], batch_size: int = 500,
+                   progress_every: int = 10000) -> Dict[str, int]:
+    """
+    Write documents in bulk. Cloud Firestore clients use a BulkWriter, which
+    parallelises commits and ramps up its write rate following Firestore's
+    500/50/5 rule; other clients (the in-memory fake) use batched commits.
+
+    Returns:
+        Number of documents written per collection
+    """
+    counts: Dict[str, int] = {}
+    started = time.perf_counter()
+    written = 0
+
+    writer = db.bulk_writer() if hasattr(db, 'bulk_writer') else None
+    batch = None if writer else db.batch()
+
+    for collection_path, document_id, data in documents:
+        reference = db.collection(collection_path).document(document_id)
+        if writer:
+            writer.set(reference, data)
+        else:
+            batch.set(reference, data)
+            if len(batch) >= batch_size:
+                batch.commit()
+                batch = db.batch()
+
+        # Subcollections are counted together, e.g. 'products/*/stock_shards'
+        group = '/*/'.join(collection_path.split('/')[::2])
+        counts[group] = counts.get(group, 0) + 1
+        written += 1
+        if progress_every and written % progress_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"  {written:>10,} documents  {written / elapsed:>8,.0f}/s", file=sys.stderr)
+
+    if writer:
+        writer.close()
+    elif len(batch):
+        batch.commit()
+    return counts
+
+
+def _firestore_client(timeout: float):
+    """Cloud Firestore client of the configured project."""
+    from services.firestore_backend import FirebaseBackend, set_backend
+    from services.firebase_service import wait_for_firebase
+
+    backend = FirebaseBackend()
+    set_backend(backend)
+    if not wait_for_firebase(timeout):
+        raise RuntimeError("Firebase did not initialize; check the service account credentials")
+    return backend.client()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalog, users and orders for scale testing.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small',
+                        help='Dataset size: ' + ', '.join(
+                            f"{name} ({p['products']:,} products, {p['users']:,} users, {p['orders']:,} orders)"
+                            for name, p in PRESETS.items()))
+    parser.add_argument('--products', type=int, help='Number of products (overrides the preset)')
+    parser.add_argument('--users', type=int, help='Number of users (overrides the preset)')
+    parser.add_argument('--orders', type=int, help='Number of orders (overrides the preset)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--locale', choices=LOCALES, default='mixed', help='Language of product names')
+    parser.add_argument('--category-skew', type=float, default=1.0, help='Zipf exponent of category sizes (0 = even)')
+    parser.add_argument('--popularity-skew', type=float, default=0.8, help='Zipf exponent of product popularity')
+    parser.add_argument('--order-skew', type=float, default=1.5, help='Pareto shape of orders per user (lower = more skewed)')
+    parser.add_argument('--max-images', type=int, default=4, help='Maximum images per product')
+    parser.add_argument('--cart-rate', type=float, default=0.3, help='Fraction of users with items in their cart')
+    parser.add_argument('--stock-shards', type=int, default=0, help='Sharded stock counters per product (0 = none)')
+    parser.add_argument('--history-days', type=int, default=365, help='Days of order history')
+    parser.add_argument('--end-date', type=date.fromisoformat, help='Last day of the history, YYYY-MM-DD (default today)')
+    parser.add_argument('--target', choices=('memory', 'firestore'), default='memory',
+                        help="'memory' writes a snapshot for the in-memory backend, 'firestore' the configured project")
+    parser.add_argument('--output', help='Snapshot file for --target memory (use with MEMORY_DATA_PATH)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Writes per batch commit (memory target)')
+    parser.add_argument('--yes', action='store_true', help='Confirm writing to Cloud Firestore')
+    args = parser.parse_args(argv)
+
+    sizes = dict(PRESETS[args.preset])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    if args.target == 'memory' and not args.output:
+        parser.error('--target memory needs --output')
+    if args.target == 'firestore' and not args.yes:
+        parser.error('--target firestore writes to the configured Firebase project; pass --yes to confirm')
+
+    dataset = SyntheticDataset(
+        seed=args.seed, locale=args.locale, category_skew=args.category_skew,
+        popularity_skew=args.popularity_skew, order_skew=args.order_skew, max_images=args.max_images,
+        cart_rate=args.cart_rate, stock_shards=args.stock_shards, history_days=args.history_days,
+        end_date=args.end_date,
+        **sizes
+    )
+
+    if args.target == 'firestore':
+        from config.settings import get_settings
+        db = _firestore_client(get_settings().firebase_init_timeout_seconds)
+        print(f"Writing to Firestore project {get_settings().firebase_project_id}", file=sys.stderr)
+    else:
+        from services.memory_firestore import MemoryFirestore
+        db = MemoryFirestore()
+
+    print(f"Generating {sizes['products']:,} products, {sizes['users']:,} users and "
+          f"{sizes['orders']:,} orders (seed {args.seed})", file=sys.stderr)
+    started = time.perf_counter()
+    counts = load_documents(db, dataset.documents(), batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+
+    if args.target == 'memory':
+        db.save(args.output)
+        print(f"Snapshot written to {args.output}", file=sys.stderr)
+
+    total = sum(counts.values())
+    print(f"Loaded {total:,} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
+    for collection, count in sorted(counts.items()):
+        print(f"  {collection:<10} {count:>10,}")
+
+    if dataset._user_orders is not None and sizes['users']:
+        histories = sorted((len(ids) for ids in dataset._user_orders.values()), reverse=True)
+        histories += [0] * (sizes['users'] - len(histories))
+        print(f"Orders per user: max {histories[0]:,}, median {histories[len(histories) // 2]:,}, "
+              f"without orders {histories.count(0):,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
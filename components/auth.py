@@ -2,6 +2,7 @@
 Authentication components for login and registration.
 """
 import streamlit as st
+import uuid
 from utils.validators import validate_email, validate_password, validate_name
 
 
@@ -28,8 +29,12 @@ def render_login_form():
             # Authenticate using Firebase Auth REST API
             from services.auth_service import AuthService
             
+            # Per-browser-session key for sign-in throttling
+            if 'session_id' not in st.session_state:
+                st.session_state.session_id = uuid.uuid4().hex
+            
             with st.spinner("Signing in..."):
-                user_data = AuthService.sign_in(email, password)
+                user_data = AuthService.sign_in(email, password, session_key=st.session_state.session_id)
             
             if user_data:
                 # Store user in session state
@@ -38,8 +43,9 @@ def render_login_form():
                     'email': user_data['email'],
                     'display_name': user_data['display_name']
                 }
-                st.session_state.id_token = user_data.get('idToken')
-                st.session_state.refresh_token = user_data.get('refreshToken')
+                # Tokens are kept fresh in the background by the token manager
+                from services.token_manager import start_session_tokens
+                start_session_tokens(user_data)
                 
                 st.success(f"Welcome back, {user_data['display_name']}!")
                 st.balloons()
@@ -121,8 +127,9 @@ def render_register_form():
                     'email': user_data['email'],
                     'display_name': user_data['display_name']
                 }
-                st.session_state.id_token = user_data.get('idToken')
-                st.session_state.refresh_token = user_data.get('refreshToken')
+                # Tokens are kept fresh in the background by the token manager
+                from services.token_manager import start_session_tokens
+                start_session_tokens(user_data)
                 
                 st.success(f"Account created successfully! Welcome, {display_name}!")
                 st.balloons()
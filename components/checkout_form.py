@@ -2,6 +2,7 @@
 Checkout form component for collecting shipping and payment information.
 """
 import streamlit as st
+import uuid
 from typing import Dict, Any
 from utils.validators import validate_address, validate_name, validate_email, validate_phone
 
@@ -144,6 +145,8 @@ def render_payment_form():
                 'cardholder_name': cardholder_name if payment_method == "Credit/Debit Card" else None
             }
             
+            # Idempotency key for this order: reruns and retries reuse it as the order ID
+            st.session_state.order_key = uuid.uuid4().hex
             st.session_state.checkout_step = 'review'
             st.rerun()
 
@@ -156,6 +159,42 @@ def render_review_order():
     firebase = FirebaseService()
     cart_items = firebase.get_user_cart(st.session_state.user['uid'])
     
+    if 'order_key' not in st.session_state:
+        st.session_state.order_key = uuid.uuid4().hex
+    
+    # The reservation of this checkout (keyed by the order key) only stands while
+    # it is held, unexpired and for exactly the items in the cart; otherwise its
+    # stock is returned and the cart is reserved again below
+    from services.inventory_service import InventoryService, is_expired, item_quantities
+    inventory = InventoryService(firebase)
+    reserved = None
+    reservation = inventory.get_reservation(st.session_state.order_key)
+    if reservation is not None and reservation.get('status') == 'held':
+        reserved = item_quantities(reservation.get('allocations', []))
+        if is_expired(reservation) or reserved != item_quantities(cart_items):
+            inventory.release_reservation(st.session_state.order_key)
+            reserved = None
+    
+    # Revalidate prices and stock so the order never uses stale cart snapshots.
+    # Units this checkout already holds count as available.
+    revalidation = firebase.revalidate_cart(cart_items, reserved=reserved)
+    cart_items = revalidation['items']
+    
+    for change in revalidation['changes']:
+        if change['field'] == 'price':
+            st.warning(
+                f"The price of {change['name']} changed from "
+                f"${change['old'] or 0:.2f} to ${change['new']:.2f}."
+            )
+        else:
+            st.info(f"{change['old']} is now listed as {change['new']}.")
+    
+    for item in revalidation['out_of_stock']:
+        if item['available'] > 0:
+            st.error(f"Only {item['available']} of {item['name']} left in stock (you requested {item['requested']}).")
+        else:
+            st.error(f"{item['name']} is no longer available.")
+    
     st.write("**Items:**")
     for item in cart_items:
         st.write(f"- {item.get('name')} x{item.get('quantity')} - ${item.get('price', 0) * item.get('quantity', 1):.2f}")
@@ -185,7 +224,18 @@ def render_review_order():
         payment = st.session_state.payment_info
         st.write(payment.get('method'))
     
-    if st.button("Place Order", type="primary", use_container_width=True):
+    # Hold stock for this checkout; reruns reuse the reservation of the same order key
+    if reserved is None and not revalidation['out_of_stock']:
+        if inventory.reserve(st.session_state.order_key, st.session_state.user['uid'], cart_items):
+            reserved = item_quantities(cart_items)
+    
+    can_place = reserved is not None and not revalidation['out_of_stock']
+    
+    if not can_place:
+        st.warning("Please update your cart before placing the order.")
+    
+    if st.button("Place Order", type="primary", use_container_width=True,
+                 disabled=not can_place):
         order_data = {
             'items': cart_items,
             'totals': totals,
@@ -193,13 +243,21 @@ def render_review_order():
             'payment_info': st.session_state.payment_info
         }
         
-        order_id = firebase.create_order(st.session_state.user['uid'], order_data)
+        # Order, reservation, order reference and cart clearing commit together
+        order_id = firebase.place_order(
+            st.session_state.user['uid'],
+            order_data,
+            order_id=st.session_state.order_key,
+            reservation_id=st.session_state.order_key
+        )
         
         if order_id:
-            firebase.clear_cart(st.session_state.user['uid'])
-            
             if 'checkout_step' in st.session_state:
                 del st.session_state.checkout_step
+            if 'order_key' in st.session_state:
+                del st.session_state.order_key
+            if 'order_history' in st.session_state:
+                del st.session_state.order_history
             if 'shipping_info' in st.session_state:
                 del st.session_state.shipping_info
             if 'payment_info' in st.session_state:
@@ -211,5 +269,6 @@ def render_review_order():
             st.session_state.page = 'orders'
             st.rerun()
         else:
+            # An expired or outdated reservation is released and renewed on the next run
             st.error("Failed to place order. Please try again.")
 
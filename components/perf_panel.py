@@ -0,0 +1,75 @@
+"""
+Performance debug panel showing where the time of a script run went.
+"""
+import streamlit as st
+from typing import Dict, Any, Optional
+
+
+def render_perf_panel(profile: Dict[str, Any], firestore_usage: Optional[Dict[str, Any]] = None,
+                      saved_reads: Optional[int] = None, http_metrics: Optional[Dict[str, Any]] = None):
+    """
+    Render the timing spans of the current run, slowest first.
+
+    Args:
+        profile: Run summary from utils.profiling.end_rerun()
+        firestore_usage: Optional run summary from services.metering.end_rerun()
+        saved_reads: Optional document reads served from the read context
+            (FirebaseService.get_saved_reads())
+        http_metrics: Optional process-wide auth HTTP latencies from
+            services.http_session.get_http_metrics()
+    """
+    with st.expander(f"⏱️ Performance: {profile['page']} in {profile['duration_ms']:.0f} ms", expanded=False):
+        if firestore_usage:
+            totals = firestore_usage['totals']
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.metric("Firestore calls", totals['calls'])
+            col2.metric("Document reads", totals['reads'])
+            col3.metric("Reads saved", saved_reads or 0)
+            col4.metric("Writes/deletes", totals['writes'] + totals['deletes'])
+            col5.metric("Firestore time", f"{totals['latency_ms']:.0f} ms")
+        elif saved_reads is not None:
+            st.metric("Reads saved by the read context", saved_reads)
+
+        if http_metrics and http_metrics['endpoints']:
+            st.caption(
+                f"Auth HTTP calls since start: {http_metrics['requests']} over "
+                f"{http_metrics['connections_opened']} pooled connections"
+            )
+            st.dataframe(
+                [
+                    {
+                        'endpoint': endpoint,
+                        'calls': row['count'],
+                        'avg ms': round(row['avg_ms'], 1),
+                        'p50 ms': round(row['p50_ms'], 1),
+                        'p95 ms': round(row['p95_ms'], 1),
+                        'max ms': round(row['max_ms'], 1),
+                    }
+                    for endpoint, row in http_metrics['endpoints'].items()
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+
+        if not profile['spans']:
+            st.caption("No spans were recorded in this run.")
+            return
+
+        st.dataframe(
+            [
+                {
+                    'span': ('  ' * row['depth']) + row['name'],
+                    'calls': row['count'],
+                    'total ms': round(row['total_ms'], 1),
+                    'self ms': round(row['self_ms'], 1),
+                    'max ms': round(row['max_ms'], 1),
+                }
+                for row in profile['spans']
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption(
+            "Self time excludes nested spans. Prefetches run in background threads, "
+            "so their spans overlap the page's own."
+        )
@@ -2,10 +2,13 @@
 import streamlit as st
 from typing import Dict, Any, Optional
 import base64
+import copy
 import json
+import os
+import threading
 
 
-def get_firebase_credentials() -> Optional[Dict[str, Any]]:
+def _load_firebase_credentials() -> Optional[Dict[str, Any]]:
     """
     Retrieve Firebase credentials from Streamlit secrets.
     Handles both base64 encoded and direct JSON formats.
@@ -57,7 +60,7 @@ def get_firebase_credentials() -> Optional[Dict[str, Any]]:
         return None
 
 
-def get_gemini_api_key() -> Optional[str]:
+def _load_gemini_api_key() -> Optional[str]:
     """
     Retrieve Gemini API key from Streamlit secrets.
     Handles multiple possible key formats.
@@ -80,7 +83,7 @@ def get_gemini_api_key() -> Optional[str]:
         st.error(f"Error loading Gemini API key: {str(e)}")
         return None
 
-def get_firebase_api_key() -> Optional[str]:
+def _load_firebase_api_key() -> Optional[str]:
     """
     Get Firebase Web API Key from Streamlit secrets.
     This is needed for Firebase Auth REST API.
@@ -107,24 +110,185 @@ def get_firebase_api_key() -> Optional[str]:
         return None
 
 
+_DEFAULT_APP_CONFIG: Dict[str, Any] = {
+    'app_name': 'E-Commerce Platform',
+    'currency': 'USD',
+    'currency_symbol': '$',
+    'max_cart_items': 50,
+    'max_product_images': 5,
+    'products_per_page': 12,
+    'orders_per_page': 10,
+    'inventory_shards': 10,
+    'reservation_ttl_seconds': 600,
+    'reservation_sweep_interval_seconds': 60,
+    'checkout_catalog_max_age_seconds': 60,
+    'job_queue_path': 'jobs.sqlite3',
+    'job_workers': 2,
+    'job_max_attempts': 5,
+    'http_pool_connections': 4,
+    'http_pool_maxsize': 20,
+    'http_timeout_seconds': 10,
+    'profile_cache_size': 2048,
+    'profile_cache_ttl_seconds': 900,
+    'login_attempts_per_email': 5,
+    'login_attempts_per_session': 10,
+    'login_rate_window_seconds': 60,
+    'firebase_init_timeout_seconds': 30,
+    'firestore_async': False,
+    'prefetch_workers': 8,
+    'prefetch_timeout_seconds': 5,
+    'firestore_backend': 'firebase',
+    'memory_latency_ms': 0,
+    'memory_data_path': None,
+    'firestore_metering': False,
+    'metering_report_path': None,
+    'profiling': False,
+    'metrics_port': None,
+    'metrics_host': '127.0.0.1',
+    'slow_log_path': None,
+    'slow_log_threshold_ms': 500,
+    'slow_log_sample_rate': 1.0,
+    'slow_log_max_bytes': 5 * 1024 * 1024,
+    'slow_log_backup_count': 5,
+    'storage_bucket': None,
+}
+
+
+class Settings:
+    """
+    Settings parsed once per process.
+    Credentials are base64-decoded and JSON-parsed, and Streamlit secrets are
+    walked, only when the settings are loaded; afterwards every lookup is an
+    attribute access. Call reload_settings() after changing secrets.
+    """
+    
+    firebase_credentials: Optional[Dict[str, Any]]
+    firebase_project_id: Optional[str]
+    firebase_api_key: Optional[str]
+    gemini_api_key: Optional[str]
+    
+    app_name: str
+    currency: str
+    currency_symbol: str
+    max_cart_items: int
+    max_product_images: int
+    products_per_page: int
+    orders_per_page: int
+    inventory_shards: int
+    reservation_ttl_seconds: int
+    reservation_sweep_interval_seconds: float
+    checkout_catalog_max_age_seconds: float
+    job_queue_path: str
+    job_workers: int
+    job_max_attempts: int
+    http_pool_connections: int
+    http_pool_maxsize: int
+    http_timeout_seconds: float
+    profile_cache_size: int
+    profile_cache_ttl_seconds: float
+    login_attempts_per_email: int
+    login_attempts_per_session: int
+    login_rate_window_seconds: float
+    firebase_init_timeout_seconds: float
+    firestore_async: bool
+    prefetch_workers: int
+    prefetch_timeout_seconds: float
+    firestore_backend: str
+    memory_latency_ms: float
+    memory_data_path: Optional[str]
+    firestore_metering: bool
+    metering_report_path: Optional[str]
+    profiling: bool
+    metrics_port: Optional[int]
+    metrics_host: str
+    slow_log_path: Optional[str]
+    slow_log_threshold_ms: float
+    slow_log_sample_rate: float
+    slow_log_max_bytes: int
+    slow_log_backup_count: int
+    storage_bucket: Optional[str]
+    
+    def __init__(self):
+        self.firebase_credentials = _load_firebase_credentials()
+        self.firebase_project_id = (self.firebase_credentials or {}).get('project_id')
+        self.firebase_api_key = _load_firebase_api_key()
+        self.gemini_api_key = _load_gemini_api_key()
+        
+        self.app_config = dict(_DEFAULT_APP_CONFIG)
+        
+        # Storage backend overrides for local runs and benchmarks
+        if os.environ.get('FIRESTORE_BACKEND'):
+            self.app_config['firestore_backend'] = os.environ['FIRESTORE_BACKEND']
+        if os.environ.get('MEMORY_LATENCY_MS'):
+            self.app_config['memory_latency_ms'] = float(os.environ['MEMORY_LATENCY_MS'])
+        if os.environ.get('MEMORY_DATA_PATH'):
+            self.app_config['memory_data_path'] = os.environ['MEMORY_DATA_PATH']
+        if os.environ.get('FIRESTORE_METERING'):
+            self.app_config['firestore_metering'] = os.environ['FIRESTORE_METERING'].lower() in ('1', 'true', 'yes')
+        if os.environ.get('METERING_REPORT_PATH'):
+            self.app_config['metering_report_path'] = os.environ['METERING_REPORT_PATH']
+        if os.environ.get('PROFILING'):
+            self.app_config['profiling'] = os.environ['PROFILING'].lower() in ('1', 'true', 'yes')
+        if os.environ.get('METRICS_PORT'):
+            self.app_config['metrics_port'] = int(os.environ['METRICS_PORT'])
+        if os.environ.get('METRICS_HOST'):
+            self.app_config['metrics_host'] = os.environ['METRICS_HOST']
+        if os.environ.get('SLOW_LOG_PATH'):
+            self.app_config['slow_log_path'] = os.environ['SLOW_LOG_PATH']
+        if os.environ.get('SLOW_LOG_THRESHOLD_MS'):
+            self.app_config['slow_log_threshold_ms'] = float(os.environ['SLOW_LOG_THRESHOLD_MS'])
+        if os.environ.get('SLOW_LOG_SAMPLE_RATE'):
+            self.app_config['slow_log_sample_rate'] = float(os.environ['SLOW_LOG_SAMPLE_RATE'])
+        
+        for key, value in self.app_config.items():
+            setattr(self, key, value)
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Get the process-wide settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Discard the cached settings and load them again from Streamlit secrets."""
+    global _settings
+    with _settings_lock:
+        _settings = Settings()
+    return _settings
+
+
+def get_firebase_credentials() -> Optional[Dict[str, Any]]:
+    """Get Firebase service account credentials (a copy callers may modify)."""
+    return copy.deepcopy(get_settings().firebase_credentials)
+
+
+def get_gemini_api_key() -> Optional[str]:
+    """Get Gemini API key."""
+    return get_settings().gemini_api_key
+
+
+def get_firebase_api_key() -> Optional[str]:
+    """
+    Get Firebase Web API Key.
+    This is needed for Firebase Auth REST API.
+    """
+    return get_settings().firebase_api_key
+
+
 def get_firebase_project_id() -> Optional[str]:
     """Get Firebase project ID from credentials."""
-    try:
-        cred_dict = get_firebase_credentials()
-        if cred_dict and 'project_id' in cred_dict:
-            return cred_dict['project_id']
-        return None
-    except Exception:
-        return None
+    return get_settings().firebase_project_id
 
 
 def get_app_config() -> Dict[str, Any]:
-    return {
-        'app_name': 'E-Commerce Platform',
-        'currency': 'USD',
-        'currency_symbol': '$',
-        'max_cart_items': 50,
-        'max_product_images': 5,
-        'products_per_page': 12,
-        'storage_bucket': None,
-    }
+    """Get application configuration values as a dictionary."""
+    return dict(get_settings().app_config)
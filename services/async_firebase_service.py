@@ -0,0 +1,212 @@
+"""
+Asynchronous Firestore reads for loading page data concurrently.
+
+FirebaseService calls block, so a page that needs categories and products
+waits for one query after the other. AsyncFirebaseService offers the same
+read methods on the Firestore AsyncClient, and gather() runs several of them
+concurrently from the Streamlit script, so the page waits for the slowest
+fetch instead of the sum of all of them.
+
+The AsyncClient's gRPC channel is bound to the event loop it is first used
+on, so every coroutine runs on one long-lived event loop in a background
+thread shared by all sessions.
+
+The client comes from the configured Firestore backend (services.
+firestore_backend), so the 'memory' backend serves the same in-memory data
+as FirebaseService.
+"""
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Dict, List, Optional
+import streamlit as st
+from utils.cache import TTLCache
+from utils.lazy_import import lazy_import
+from utils.metrics import track_cache
+
+firestore = lazy_import('firebase_admin.firestore')
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# Same lifetimes as the st.cache_data caches used by FirebaseService
+_products_cache = TTLCache(maxsize=256, ttl=600)
+_categories_cache = TTLCache(maxsize=1, ttl=3600)
+track_cache('async_products', _products_cache)
+track_cache('async_categories', _categories_cache)
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the process-wide event loop, starting its thread on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name='firestore-async-loop',
+                    daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+class AsyncFirebaseService:
+    """Async counterpart of FirebaseService's read methods."""
+
+    def _get_client(self):
+        """Get the backend's async Firestore client. Must be called on the event loop thread."""
+        from services.firestore_backend import get_backend
+        return get_backend().async_client()
+
+    async def _fetch_products_from_db(self, category: Optional[str] = None, max_fetch: int = 100) -> List[Dict[str, Any]]:
+        """Query active products, optionally filtered by category."""
+        query = self._get_client().collection('products').where('active', '==', True)
+
+        if category:
+            query = query.where('category', '==', category)
+
+        products = []
+        async for doc in query.limit(max_fetch).stream():
+            product = doc.to_dict()
+            product['id'] = doc.id
+            products.append(product)
+        return products
+
+    async def get_products(self, limit: int = 12, category: Optional[str] = None,
+                           search_query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get products with optional filtering (same semantics as FirebaseService.get_products).
+
+        Args:
+            limit: Maximum number of products to return (applied after the search filter)
+            category: Optional category filter
+            search_query: Optional search query for product name/description
+
+        Returns:
+            List of product dictionaries
+        """
+        max_fetch = 100 if search_query else limit
+
+        products = _products_cache.get((category, max_fetch))
+        if products is None:
+            products = await self._fetch_products_from_db(category, max_fetch)
+            _products_cache.set((category, max_fetch), products)
+
+        if search_query:
+            search_lower = search_query.lower()
+            products = [
+                p for p in products
+                if search_lower in p.get('name', '').lower() or
+                   search_lower in p.get('description', '').lower()
+            ]
+
+        # The cached dicts are shared between sessions, so hand out copies
+        return [dict(p) for p in products[:limit]]
+
+    async def get_categories(self) -> List[str]:
+        """
+        Get all available product categories.
+
+        Returns:
+            Sorted list of category names
+        """
+        categories = _categories_cache.get('categories')
+        if categories is None:
+            found = set()
+            query = self._get_client().collection('products').where('active', '==', True)
+            async for doc in query.stream():
+                category = doc.to_dict().get('category')
+                if category:
+                    found.add(category)
+            categories = sorted(found)
+            _categories_cache.set('categories', categories)
+        return list(categories)
+
+    async def get_user_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get user's shopping cart."""
+        doc = await self._get_client().collection('users').document(user_id).get()
+        if doc.exists:
+            return doc.to_dict().get('cart', [])
+        return []
+
+    async def get_user_orders(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get user's most recent orders, newest first (same order as FirebaseService.get_user_orders_page).
+
+        Args:
+            user_id: User ID
+            limit: Maximum number of orders to return
+
+        Returns:
+            List of order dictionaries
+        """
+        query = (
+            self._get_client().collection('orders')
+            .where('user_id', '==', user_id)
+            .order_by('created_at', direction=firestore.Query.DESCENDING)
+            .order_by('__name__', direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+
+        orders = []
+        async for doc in query.stream():
+            order = doc.to_dict()
+            order['id'] = doc.id
+            orders.append(order)
+        return orders
+
+    def gather(self, fallbacks: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = 10.0, **fetches: Awaitable) -> Dict[str, Any]:
+        """
+        Run independent fetches concurrently and wait for all of them.
+        Call from the Streamlit script, e.g.::
+
+            service = AsyncFirebaseService()
+            data = service.gather(
+                categories=service.get_categories(),
+                products=service.get_products(limit=24),
+                fallbacks={'categories': [], 'products': []}
+            )
+
+        Args:
+            fallbacks: Value returned for a fetch that fails or times out (default None)
+            timeout: Maximum seconds to wait for all fetches together
+            **fetches: Coroutines keyed by result name
+
+        Returns:
+            Dictionary mapping each name to its result or fallback
+        """
+        from services.firebase_service import FirebaseService, wait_for_firebase
+
+        fallbacks = fallbacks or {}
+        names = list(fetches)
+
+        # Waits for background initialization and reports failures once per session
+        FirebaseService()
+        if not wait_for_firebase(0):
+            for coro in fetches.values():
+                coro.close()
+            return {name: fallbacks.get(name) for name in names}
+
+        async def _run_all():
+            return await asyncio.gather(*fetches.values(), return_exceptions=True)
+
+        future = asyncio.run_coroutine_threadsafe(_run_all(), _get_loop())
+        try:
+            outcomes = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            st.error(f"Error loading data: timed out after {timeout} seconds")
+            return {name: fallbacks.get(name) for name in names}
+
+        results = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, BaseException):
+                st.error(f"Error fetching {name}: {str(outcome)}")
+                results[name] = fallbacks.get(name)
+            else:
+                results[name] = outcome
+        return results
@@ -4,15 +4,71 @@ Handles user login and registration.
 """
 import streamlit as st
 from typing import Optional, Dict, Any
-import requests
-from config.settings import get_firebase_api_key, get_firebase_project_id
+from config.settings import get_firebase_api_key, get_firebase_project_id, get_app_config
+from services.http_session import http_post
+from utils.cache import TTLCache
+from utils.lazy_import import lazy_import
+from utils.metrics import track_cache, track_limiter
+from utils.profiling import instrument, span
+from utils.rate_limiter import TokenBucketLimiter
 
+requests = lazy_import('requests')
 
+
+# Process-wide cache of user profiles (display names) keyed by uid,
+# so signing in usually needs no Firestore read at all
+_profile_cache = TTLCache(
+    maxsize=get_app_config()['profile_cache_size'],
+    ttl=get_app_config()['profile_cache_ttl_seconds']
+)
+track_cache('profiles', _profile_cache)
+
+# Sign-in attempts are throttled per email and per browser session before
+# any call to the identity toolkit is made
+_email_limiter = TokenBucketLimiter(
+    capacity=get_app_config()['login_attempts_per_email'],
+    refill_rate=get_app_config()['login_attempts_per_email'] / get_app_config()['login_rate_window_seconds']
+)
+_session_limiter = TokenBucketLimiter(
+    capacity=get_app_config()['login_attempts_per_session'],
+    refill_rate=get_app_config()['login_attempts_per_session'] / get_app_config()['login_rate_window_seconds']
+)
+track_limiter('login_email', _email_limiter)
+track_limiter('login_session', _session_limiter)
+
+
+@instrument('auth')
 class AuthService:
     """Service for handling user authentication via Firebase Auth REST API."""
     
     FIREBASE_AUTH_BASE_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
     
+    @staticmethod
+    def _get_profile(uid: str, default_display_name: str) -> Dict[str, Any]:
+        """
+        Get a user's profile from the profile cache, falling back to a
+        projected read of users/{uid} that skips the cart and orders arrays.
+        """
+        with span('cache.profile'):
+            profile = _profile_cache.get(uid)
+        if profile is not None:
+            return profile
+        
+        profile = {'display_name': default_display_name}
+        try:
+            from services.firebase_service import FirebaseService
+            firebase = FirebaseService()
+            db = firebase.get_db()
+            if db:
+                user_doc = db.collection('users').document(uid).get(field_paths=['display_name'])
+                if user_doc.exists:
+                    profile['display_name'] = user_doc.to_dict().get('display_name', default_display_name)
+                _profile_cache.set(uid, profile)
+        except Exception:
+            pass
+        
+        return profile
+    
     @staticmethod
     def _get_api_key() -> Optional[str]:
         """Get Firebase Web API Key."""
@@ -55,7 +111,7 @@ class AuthService:
             if display_name:
                 payload["displayName"] = display_name
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = http_post(url, endpoint='signUp', json=payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -81,6 +137,7 @@ class AuthService:
                         from datetime import datetime
                         user_data['created_at'] = datetime.now()
                         db.collection('users').document(data.get('localId')).set(user_data)
+                        _profile_cache.set(data.get('localId'), {'display_name': user_data['display_name']})
                 except Exception:
                     pass  # Continue even if Firestore save fails
                 
@@ -89,7 +146,8 @@ class AuthService:
                     'email': data.get('email'),
                     'display_name': display_name or data.get('displayName', email.split('@')[0]),
                     'idToken': data.get('idToken'),
-                    'refreshToken': data.get('refreshToken')
+                    'refreshToken': data.get('refreshToken'),
+                    'expiresIn': data.get('expiresIn')
                 }
             else:
                 error_data = response.json()
@@ -112,17 +170,36 @@ class AuthService:
             return None
     
     @staticmethod
-    def sign_in(email: str, password: str) -> Optional[Dict[str, Any]]:
+    def _check_login_rate(email: str, session_key: Optional[str]) -> bool:
+        """Take a token from the email and session buckets; show an error when throttled."""
+        email_key = email.strip().lower()
+        
+        if session_key and not _session_limiter.allow(session_key):
+            wait = _session_limiter.retry_after(session_key)
+        elif not _email_limiter.allow(email_key):
+            wait = _email_limiter.retry_after(email_key)
+        else:
+            return True
+        
+        st.error(f"Too many sign-in attempts. Please wait {int(wait) + 1} seconds and try again.")
+        return False
+    
+    @staticmethod
+    def sign_in(email: str, password: str, session_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Sign in user using Firebase Auth REST API.
         
         Args:
             email: User email
             password: User password
+            session_key: Optional browser session ID used for rate limiting
             
         Returns:
             Dictionary with user info and idToken, or None on error
         """
+        if not AuthService._check_login_rate(email, session_key):
+            return None
+        
         api_key = AuthService._get_api_key()
         if not api_key:
             return None
@@ -136,32 +213,22 @@ class AuthService:
                 "returnSecureToken": True
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = http_post(url, endpoint='signInWithPassword', json=payload)
             
             if response.status_code == 200:
                 data = response.json()
                 
-                # Get user display name from Firestore if available
-                display_name = data.get('displayName', email.split('@')[0])
-                
-                try:
-                    from services.firebase_service import FirebaseService
-                    firebase = FirebaseService()
-                    db = firebase.get_db()
-                    if db:
-                        user_doc = db.collection('users').document(data.get('localId')).get()
-                        if user_doc.exists:
-                            user_data = user_doc.to_dict()
-                            display_name = user_data.get('display_name', display_name)
-                except Exception:
-                    pass
+                # Get user display name from the profile cache or Firestore
+                display_name = data.get('displayName') or email.split('@')[0]
+                display_name = AuthService._get_profile(data.get('localId'), display_name)['display_name']
                 
                 return {
                     'uid': data.get('localId'),
                     'email': data.get('email'),
                     'display_name': display_name,
                     'idToken': data.get('idToken'),
-                    'refreshToken': data.get('refreshToken')
+                    'refreshToken': data.get('refreshToken'),
+                    'expiresIn': data.get('expiresIn')
                 }
             else:
                 error_data = response.json()
@@ -187,6 +254,8 @@ class AuthService:
     def verify_token(id_token: str) -> Optional[Dict[str, Any]]:
         """
         Verify Firebase ID token.
+        Tokens are verified locally against Google's cached signing certificates;
+        the accounts:lookup REST call is only used when the project ID is unknown.
         
         Args:
             id_token: Firebase ID token
@@ -194,6 +263,19 @@ class AuthService:
         Returns:
             Decoded token data, or None if invalid
         """
+        project_id = get_firebase_project_id()
+        if project_id:
+            from services.token_verifier import get_token_verifier
+            claims = get_token_verifier(project_id).verify(id_token)
+            if not claims:
+                return None
+            email = claims.get('email', '')
+            return {
+                'uid': claims['sub'],
+                'email': email,
+                'display_name': claims.get('name', email.split('@')[0])
+            }
+        
         api_key = AuthService._get_api_key()
         if not api_key:
             return None
@@ -205,7 +287,7 @@ class AuthService:
                 "idToken": id_token
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = http_post(url, endpoint='lookup', json=payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -5,11 +5,143 @@ Handles all Firebase operations for the e-commerce platform.
 import streamlit as st
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore, auth, storage
+from concurrent.futures import Future
+import copy
 import json
+import logging
+import threading
+import time
+from utils.lazy_import import lazy_import
+from utils.metrics import CACHE_LOOKUPS, CACHE_MISSES, SAVED_READS
+from utils.profiling import instrument, span
 
+logger = logging.getLogger(__name__)
 
+# The Google SDKs are imported on first use, not when this module is loaded
+firebase_admin = lazy_import('firebase_admin')
+credentials = lazy_import('firebase_admin.credentials')
+firestore = lazy_import('firebase_admin.firestore')
+auth = lazy_import('firebase_admin.auth')
+storage = lazy_import('firebase_admin.storage')
+google_exceptions = lazy_import('google.api_core.exceptions')
+
+
+# Session state key holding the read context of the current script run
+_READ_CONTEXT_KEY = '_firebase_read_context'
+# Guards creating the read context; prefetch threads share it with the script thread
+_read_context_lock = threading.Lock()
+
+# Products loaded by catalog fetches (product ID -> (monotonic time, data)), so
+# checkout revalidation can skip reading products the catalog loaded recently
+_catalog_snapshot: Dict[str, Any] = {}
+_catalog_lock = threading.Lock()
+
+
+# ==================== Background Initialization ====================
+# Importing firebase_admin, building credentials and initializing the app
+# takes a noticeable time. It runs in a background thread started when the
+# app script first loads, so static content renders while it completes.
+
+_init_future: Optional[Future] = None
+_init_lock = threading.Lock()
+
+
+def _initialize_app():
+    """
+    Initialize the Firebase Admin SDK app.
+    Runs in the background thread, so it must not call Streamlit APIs.
+    
+    Raises:
+        ValueError: If credentials are missing or incomplete
+    """
+    from config.settings import get_firebase_credentials
+    from services.firestore_backend import get_backend
+    
+    # Backends such as the in-memory fake do not use the Firebase Admin app
+    if not get_backend().requires_firebase_app:
+        return
+    
+    # Check if Firebase is already initialized
+    try:
+        firebase_admin.get_app()
+        return
+    except ValueError:
+        pass  # Firebase not initialized yet, continue
+    
+    # Get credentials
+    cred_dict = get_firebase_credentials()
+    
+    if not cred_dict:
+        raise ValueError("Firebase credentials not found in Streamlit secrets. Please configure them in Streamlit Cloud settings.")
+    
+    # Validate that credentials have required fields
+    required_fields = ['type', 'project_id', 'private_key', 'client_email']
+    missing_fields = [field for field in required_fields if field not in cred_dict]
+    
+    if missing_fields:
+        raise ValueError(f"Firebase credentials missing required fields: {', '.join(missing_fields)}")
+    
+    # Ensure type field is set correctly
+    if cred_dict.get('type') != 'service_account':
+        cred_dict['type'] = 'service_account'
+    
+    # Initialize Firebase
+    cred = credentials.Certificate(cred_dict)
+    firebase_admin.initialize_app(cred)
+
+
+def _run_initialization(future: Future):
+    """Thread target: initialize Firebase and resolve the readiness future."""
+    try:
+        _initialize_app()
+        future.set_result(True)
+    except Exception as e:
+        future.set_exception(e)
+
+
+def start_background_initialization() -> Future:
+    """
+    Start initializing Firebase in a background thread (once per process).
+    
+    Returns:
+        Future resolved when Firebase is ready, or failed with the initialization error
+    """
+    global _init_future
+    if _init_future is None:
+        with _init_lock:
+            if _init_future is None:
+                future = Future()
+                threading.Thread(
+                    target=_run_initialization,
+                    args=(future,),
+                    name='firebase-init',
+                    daemon=True
+                ).start()
+                _init_future = future
+    return _init_future
+
+
+def is_firebase_ready() -> bool:
+    """Whether background initialization has finished (successfully or not)."""
+    return _init_future is not None and _init_future.done()
+
+
+def wait_for_firebase(timeout: Optional[float] = None) -> bool:
+    """
+    Block until background initialization finishes.
+    
+    Returns:
+        True if Firebase initialized successfully
+    """
+    future = start_background_initialization()
+    try:
+        future.result(timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+@instrument('firebase')
 class FirebaseService:
     """Service class for Firebase operations."""
     
@@ -29,47 +161,12 @@ class FirebaseService:
             FirebaseService._initialized = True
     
     def _initialize_firebase(self):
-        """Initialize Firebase Admin SDK with credentials from Streamlit secrets."""
+        """Wait for the background Firebase initialization and report its outcome."""
+        from config.settings import get_settings
+        
         try:
-            from config.settings import get_firebase_credentials
-            
-            # Check if Firebase is already initialized
-            try:
-                firebase_admin.get_app()
-                if 'firebase_initialized' not in st.session_state:
-                    st.session_state.firebase_initialized = True
-                return
-            except ValueError:
-                pass  # Firebase not initialized yet, continue
-            
-            # Get credentials
-            cred_dict = get_firebase_credentials()
-            
-            if not cred_dict:
-                error_msg = "Firebase credentials not found in Streamlit secrets. Please configure them in Streamlit Cloud settings."
-                if 'firebase_error_shown' not in st.session_state:
-                    st.error(error_msg)
-                    st.session_state.firebase_error_shown = True
-                raise ValueError(error_msg)
-            
-            # Validate that credentials have required fields
-            required_fields = ['type', 'project_id', 'private_key', 'client_email']
-            missing_fields = [field for field in required_fields if field not in cred_dict]
-            
-            if missing_fields:
-                error_msg = f"Firebase credentials missing required fields: {', '.join(missing_fields)}"
-                if 'firebase_error_shown' not in st.session_state:
-                    st.error(error_msg)
-                    st.session_state.firebase_error_shown = True
-                raise ValueError(error_msg)
-            
-            # Ensure type field is set correctly
-            if cred_dict.get('type') != 'service_account':
-                cred_dict['type'] = 'service_account'
-            
-            # Initialize Firebase
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
+            future = start_background_initialization()
+            future.result(timeout=get_settings().firebase_init_timeout_seconds)
             
             st.session_state.firebase_initialized = True
             if 'firebase_error_shown' in st.session_state:
@@ -109,7 +206,7 @@ class FirebaseService:
                 'addresses': []
             }
             
-            db = firestore.client()
+            db = self.get_db()
             db.collection('users').document(user.uid).set(user_data)
             
             return {
@@ -130,15 +227,115 @@ class FirebaseService:
             return None
     
     def get_db(self):
-        """Get Firestore database client."""
+        """
+        Get Firestore database client from the configured storage backend.
+        When metering is on, the client is wrapped so every call is accounted.
+        """
+        from services.firestore_backend import get_backend
+        from services.metering import wrap_client
+        
+        backend = get_backend()
+        if not backend.requires_firebase_app:
+            return wrap_client(backend.client())
+        
         try:
             # Verify Firebase is initialized
             firebase_admin.get_app()
-            return firestore.client()
+            return wrap_client(backend.client())
         except ValueError:
             st.error("Firebase is not initialized. Please check your credentials.")
             return None
     
+    # ==================== Per-Rerun Read Context ====================
+    # Streamlit reruns the whole script on every interaction and several
+    # render functions read the same documents (e.g. the user's cart) in a
+    # single run. Document reads go through this context so duplicates
+    # within one run are served from memory; writes invalidate the entry.
+    # Prefetch threads (utils.prefetch) read through the same context, so
+    # its entries and counter are only touched while holding its lock.
+    
+    @classmethod
+    def begin_read_context(cls):
+        """Start a fresh read context. Call once at the top of every script run."""
+        st.session_state[_READ_CONTEXT_KEY] = {'docs': {}, 'saved_reads': 0, 'lock': threading.Lock()}
+    
+    @staticmethod
+    def _get_read_context() -> Dict[str, Any]:
+        """Get the read context for the current script run."""
+        with _read_context_lock:
+            if _READ_CONTEXT_KEY not in st.session_state:
+                st.session_state[_READ_CONTEXT_KEY] = {'docs': {}, 'saved_reads': 0, 'lock': threading.Lock()}
+            return st.session_state[_READ_CONTEXT_KEY]
+    
+    def _read_document(self, db, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a document through the per-rerun read context.
+        
+        Returns:
+            A copy of the document data, or None if the document does not exist
+        """
+        context = self._get_read_context()
+        key = (collection, doc_id)
+        
+        with context['lock']:
+            if key in context['docs']:
+                context['saved_reads'] += 1
+                SAVED_READS.inc(collection=collection)
+                # Callers mutate the returned data (e.g. cart items), so never hand out the cached dict
+                return copy.deepcopy(context['docs'][key])
+        
+        # Fetch outside the lock so concurrent prefetches of other documents do not wait
+        doc = db.collection(collection).document(doc_id).get()
+        data = doc.to_dict() if doc.exists else None
+        with context['lock']:
+            context['docs'][key] = data
+        return copy.deepcopy(data)
+    
+    def _read_documents(self, db, collection: str, doc_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Read several documents through the per-rerun read context.
+        Documents not already in the context are fetched in a single batched get_all call.
+        
+        Returns:
+            Dictionary mapping document ID to a copy of its data (None if missing)
+        """
+        context = self._get_read_context()
+        with context['lock']:
+            found = {
+                doc_id: context['docs'][(collection, doc_id)]
+                for doc_id in dict.fromkeys(doc_ids) if (collection, doc_id) in context['docs']
+            }
+            if found:
+                context['saved_reads'] += len(found)
+                SAVED_READS.inc(len(found), collection=collection)
+        
+        missing = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id not in found]
+        if missing:
+            refs = [db.collection(collection).document(doc_id) for doc_id in missing]
+            fetched = {doc.id: doc.to_dict() if doc.exists else None for doc in db.get_all(refs)}
+            with context['lock']:
+                for doc_id, data in fetched.items():
+                    context['docs'][(collection, doc_id)] = data
+            found.update(fetched)
+        
+        return {doc_id: copy.deepcopy(found.get(doc_id)) for doc_id in doc_ids}
+    
+    def _invalidate_document(self, collection: str, doc_id: str):
+        """Drop a document from the read context after it has been written."""
+        context = self._get_read_context()
+        with context['lock']:
+            context['docs'].pop((collection, doc_id), None)
+        if collection == 'products':
+            with _catalog_lock:
+                _catalog_snapshot.pop(doc_id, None)
+    
+    @classmethod
+    def get_saved_reads(cls) -> int:
+        """Number of document reads served from the read context in the current run."""
+        context = cls._get_read_context()
+        with context['lock']:
+            return context['saved_reads']
+    
     def create_product(self, product_data: Dict[str, Any]) -> Optional[str]:
         """Create a new product in Firestore."""
         try:
@@ -204,7 +401,9 @@ class FirebaseService:
             max_fetch = 100 if search_query else limit
             
             # Use cached function to fetch products
-            products = _get_cached_products(category, max_fetch)
+            CACHE_LOOKUPS.inc(cache='products')
+            with span('cache.products'):
+                products = _get_cached_products(category, max_fetch)
             
             # Apply search filter BEFORE limiting results
             # This fixes the bug where search wouldn't work if first N products didn't match
@@ -230,17 +429,126 @@ class FirebaseService:
             if db is None:
                 return None
             
-            doc = db.collection('products').document(product_id).get()
+            product = self._read_document(db, 'products', product_id)
             
-            if doc.exists:
-                product = doc.to_dict()
-                product['id'] = doc.id
+            if product is not None:
+                product['id'] = product_id
                 return product
             return None
         except Exception as e:
             st.error(f"Error fetching product: {str(e)}")
             return None
     
+    def get_products_by_ids(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several products by ID with a single batched read.
+        
+        Args:
+            product_ids: Product IDs to fetch
+            
+        Returns:
+            Dictionary mapping product ID to product data (missing products are omitted)
+        """
+        try:
+            db = self.get_db()
+            if db is None or not product_ids:
+                return {}
+            
+            products = {}
+            for product_id, product in self._read_documents(db, 'products', product_ids).items():
+                if product is not None:
+                    product['id'] = product_id
+                    products[product_id] = product
+            return products
+        except Exception as e:
+            st.error(f"Error fetching products: {str(e)}")
+            return {}
+    
+    def revalidate_cart(self, cart_items: List[Dict[str, Any]],
+                        reserved: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Revalidate cart line items against current product data.
+        Cart items snapshot name, price and image when added, so prices may be stale
+        by checkout time. Products the catalog loaded less than
+        'checkout_catalog_max_age_seconds' ago (and that were not written since)
+        are taken from the catalog cache; the rest are fetched in one batched read.
+        Sharded products always read their stock shards. The reservation
+        transaction remains the authoritative stock check.
+        
+        Args:
+            cart_items: Cart items as returned by get_user_cart
+            reserved: Units per product already held for this checkout by a
+                reservation; they count as available
+            
+        Returns:
+            Dictionary with:
+                items: Cart items refreshed with current name, price and image
+                changes: List of {product_id, name, field, old, new} for changed fields
+                out_of_stock: List of {product_id, name, requested, available} for items
+                    that are unavailable or lack enough stock
+        """
+        from config.settings import get_app_config
+        product_ids = [item['product_id'] for item in cart_items]
+        products = _get_fresh_catalog_products(product_ids, get_app_config()['checkout_catalog_max_age_seconds'])
+        missing = [product_id for product_id in product_ids if product_id not in products]
+        if missing:
+            products.update(self.get_products_by_ids(missing))
+        
+        from services.inventory_service import InventoryService
+        stock_levels = InventoryService(self).get_stock_levels(products)
+        
+        items = []
+        changes = []
+        out_of_stock = []
+        
+        for item in cart_items:
+            product = products.get(item['product_id'])
+            refreshed = dict(item)
+            
+            if product is None or not product.get('active', True):
+                out_of_stock.append({
+                    'product_id': item['product_id'],
+                    'name': item.get('name', ''),
+                    'requested': item.get('quantity', 1),
+                    'available': 0
+                })
+                items.append(refreshed)
+                continue
+            
+            current = {
+                'name': product.get('name', ''),
+                'price': product.get('price', 0),
+                'image': product.get('images', [{}])[0].get('url', '') if product.get('images') else ''
+            }
+            
+            for field in ('name', 'price'):
+                if item.get(field) != current[field]:
+                    changes.append({
+                        'product_id': item['product_id'],
+                        'name': current['name'],
+                        'field': field,
+                        'old': item.get(field),
+                        'new': current[field]
+                    })
+            
+            refreshed.update(current)
+            items.append(refreshed)
+            
+            stock = stock_levels.get(item['product_id'], 0) + (reserved or {}).get(item['product_id'], 0)
+            if stock < item.get('quantity', 1):
+                out_of_stock.append({
+                    'product_id': item['product_id'],
+                    'name': current['name'],
+                    'requested': item.get('quantity', 1),
+                    'available': max(stock, 0)
+                })
+        
+        return {
+            'items': items,
+            'changes': changes,
+            'out_of_stock': out_of_stock
+        }
+    
     def _fetch_categories_from_db(self) -> List[str]:
         """
         Internal method to fetch categories from Firestore.
@@ -275,7 +583,9 @@ class FirebaseService:
         Returns:
             Sorted list of category names
         """
-        return _get_cached_categories()
+        CACHE_LOOKUPS.inc(cache='categories')
+        with span('cache.categories'):
+            return _get_cached_categories()
     
     def get_user_cart(self, user_id: str) -> List[Dict[str, Any]]:
         """Get user's shopping cart."""
@@ -284,10 +594,9 @@ class FirebaseService:
             if db is None:
                 return []
             
-            user_doc = db.collection('users').document(user_id).get()
+            user_data = self._read_document(db, 'users', user_id)
             
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
+            if user_data is not None:
                 return user_data.get('cart', [])
             return []
         except Exception as e:
@@ -303,8 +612,8 @@ class FirebaseService:
             
             user_ref = db.collection('users').document(user_id)
             
-            user_doc = user_ref.get()
-            cart = user_doc.to_dict().get('cart', []) if user_doc.exists else []
+            user_data = self._read_document(db, 'users', user_id)
+            cart = user_data.get('cart', []) if user_data is not None else []
             
             product_in_cart = False
             for item in cart:
@@ -328,6 +637,7 @@ class FirebaseService:
                 'cart': cart,
                 'updated_at': datetime.now()
             })
+            self._invalidate_document('users', user_id)
             
             return True
         except Exception as e:
@@ -343,11 +653,11 @@ class FirebaseService:
             
             user_ref = db.collection('users').document(user_id)
             
-            user_doc = user_ref.get()
-            if not user_doc.exists:
+            user_data = self._read_document(db, 'users', user_id)
+            if user_data is None:
                 return False
             
-            cart = user_doc.to_dict().get('cart', [])
+            cart = user_data.get('cart', [])
             
             if quantity <= 0:
                 cart = [item for item in cart if item['product_id'] != product_id]
@@ -361,87 +671,217 @@ class FirebaseService:
                 'cart': cart,
                 'updated_at': datetime.now()
             })
+            self._invalidate_document('users', user_id)
             
             return True
         except Exception as e:
             st.error(f"Error updating cart: {str(e)}")
             return False
     
-    def clear_cart(self, user_id: str) -> bool:
-        """Clear user's cart."""
-        try:
-            db = self.get_db()
-            if db is None:
-                return False
-            
-            db.collection('users').document(user_id).update({
-                'cart': [],
-                'updated_at': datetime.now()
-            })
-            return True
-        except Exception as e:
-            st.error(f"Error clearing cart: {str(e)}")
-            return False
+    def run_transaction(self, callback, *args):
+        """
+        Run callback(transaction, *args) in a Firestore transaction, retrying on contention.
+        
+        Returns:
+            The callback's return value
+        """
+        from services.firestore_backend import get_backend
+        
+        return get_backend().run_transaction(self.get_db(), callback, *args)
     
-    def create_order(self, user_id: str, order_data: Dict[str, Any]) -> Optional[str]:
-        """Create a new order."""
+    def place_order(self, user_id: str, order_data: Dict[str, Any],
+                    order_id: Optional[str] = None,
+                    reservation_id: Optional[str] = None) -> Optional[str]:
+        """
+        Place an order atomically.
+        The order document, the stock it takes, the user's order reference and
+        clearing the cart are committed together in a single transaction, so
+        there is no window where the order exists but the cart still holds its
+        items.
+        
+        When an order_id (idempotency key) is given, the order document is
+        created only if absent. A retry or rerun with the same key writes
+        nothing and simply returns the existing ID.
+        
+        When a reservation_id is given, stock was already taken by
+        InventoryService.reserve and the order commits the reservation.
+        Otherwise the stock is taken in the order's transaction the same way
+        (shards for sharded products), and the order fails without writing
+        anything if an item lacks stock.
+        
+        Args:
+            user_id: User ID
+            order_data: Order data with 'items', 'totals', 'shipping_info' and 'payment_info'
+            order_id: Optional client-generated order ID used as idempotency key
+            reservation_id: Optional stock reservation created at checkout
+            
+        Returns:
+            The order ID, or None on error
+        """
+        from services.inventory_service import InventoryService, InsufficientStockError
+        
         try:
             db = self.get_db()
             if db is None:
                 return None
             
+            now = datetime.now()
             order_data['user_id'] = user_id
             order_data['status'] = 'pending'
-            order_data['created_at'] = datetime.now()
-            order_data['updated_at'] = datetime.now()
-            
-            doc_ref = db.collection('orders').add(order_data)
-            order_id = doc_ref[1].id
+            order_data['created_at'] = now
+            order_data['updated_at'] = now
             
+            order_ref = db.collection('orders').document(order_id) if order_id else db.collection('orders').document()
             user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            orders = user_doc.to_dict().get('orders', []) if user_doc.exists else []
-            orders.append(order_id)
             
-            user_ref.update({
-                'orders': orders,
-                'updated_at': datetime.now()
-            })
+            user_update = {
+                'orders': firestore.ArrayUnion([order_ref.id]),
+                'cart': [],
+                'updated_at': now
+            }
             
+            inventory = InventoryService(self)
+            
+            def _place(transaction):
+                if reservation_id:
+                    if not inventory.commit_in_transaction(transaction, db, reservation_id, order_ref.id,
+                                                           order_data.get('items', [])):
+                        return False
+                else:
+                    if order_id and order_ref.get(transaction=transaction).exists:
+                        return False
+                    inventory.take_in_transaction(transaction, db, order_data.get('items', []))
+                transaction.create(order_ref, order_data)
+                transaction.update(user_ref, user_update)
+                return True
+            
+            if not self.run_transaction(_place):
+                # Already placed by an earlier run with the same key
+                return order_ref.id
+            
+            self._invalidate_document('users', user_id)
+            for item in order_data.get('items', []):
+                self._invalidate_document('products', item['product_id'])
+            
+            # Follow-up work (order confirmation) runs in the background; the job
+            # ID is kept on the order so its progress can be looked up
+            from services.order_jobs import enqueue_order_placed
+            job_id = enqueue_order_placed(order_ref.id, user_id, order_data)
+            if job_id:
+                try:
+                    order_ref.update({'job_id': job_id})
+                except Exception as e:
+                    # The order stands without it; the job still runs
+                    logger.warning("Could not save job ID %s on order %s: %s", job_id, order_ref.id, e)
+            
+            return order_ref.id
+        except google_exceptions.AlreadyExists:
+            # The order with this key was already committed by an earlier run
             return order_id
+        except InsufficientStockError as e:
+            st.error(f"Not enough stock for {e.name}: {e.available} available, {e.requested} requested.")
+            return None
         except Exception as e:
-            st.error(f"Error creating order: {str(e)}")
+            st.error(f"Error placing order: {str(e)}")
             return None
     
-    def get_user_orders(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's orders."""
+    def get_user_orders_page(self, user_id: str, page_size: int = 10,
+                             cursor: Optional[Dict[str, Any]] = None,
+                             fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get one page of a user's orders, newest first, with a single query.
+        Orders with the same timestamp are ordered by document ID, so a page
+        boundary never skips one of them.
+        Requires a composite index on orders (user_id ASC, created_at DESC).
+        
+        Args:
+            user_id: User ID
+            page_size: Maximum number of orders to return
+            cursor: Cursor returned by the previous page, or None for the first page
+            fields: Optional field projection; only these fields are transferred
+            
+        Returns:
+            Dictionary with 'orders' (list of order dictionaries) and
+            'next_cursor' (cursor for the next page, or None if there are no more orders)
+        """
         try:
             db = self.get_db()
             if db is None:
-                return []
+                return {'orders': [], 'next_cursor': None}
             
-            user_doc = db.collection('users').document(user_id).get()
+            query = (
+                db.collection('orders')
+                .where('user_id', '==', user_id)
+                .order_by('created_at', direction=firestore.Query.DESCENDING)
+                .order_by('__name__', direction=firestore.Query.DESCENDING)
+            )
             
-            if not user_doc.exists:
-                return []
+            if fields:
+                query = query.select(fields)
             
-            orders = user_doc.to_dict().get('orders', [])
-            order_details = []
+            if cursor:
+                query = query.start_after(cursor)
             
-            for order_id in orders:
-                order_doc = db.collection('orders').document(order_id).get()
-                if order_doc.exists:
-                    order = order_doc.to_dict()
-                    order['id'] = order_id
-                    order_details.append(order)
+            orders = []
+            for doc in query.limit(page_size).stream():
+                order = doc.to_dict()
+                order['id'] = doc.id
+                orders.append(order)
             
-            order_details.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
+            next_cursor = None
+            if len(orders) == page_size:
+                next_cursor = {'created_at': orders[-1].get('created_at'), '__name__': orders[-1]['id']}
             
-            return order_details
+            return {'orders': orders, 'next_cursor': next_cursor}
         except Exception as e:
             st.error(f"Error fetching orders: {str(e)}")
+            return {'orders': [], 'next_cursor': None}
+    
+    def get_user_order_summaries(self, user_id: str, page_size: int = 10,
+                                 cursor: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get one page of lightweight order summaries (id, date, status, totals).
+        Items, shipping and payment details are not transferred; use
+        get_order_items to load them for a single order on demand.
+        
+        Returns:
+            Same shape as get_user_orders_page
+        """
+        return self.get_user_orders_page(
+            user_id,
+            page_size=page_size,
+            cursor=cursor,
+            fields=['created_at', 'status', 'totals']
+        )
+    
+    def get_order_items(self, order_id: str) -> List[Dict[str, Any]]:
+        """Get the line items of a single order, reading only the 'items' field."""
+        try:
+            db = self.get_db()
+            if db is None:
+                return []
+            
+            doc = db.collection('orders').document(order_id).get(field_paths=['items'])
+            if doc.exists:
+                return doc.to_dict().get('items', [])
+            return []
+        except Exception as e:
+            st.error(f"Error fetching order items: {str(e)}")
             return []
     
+    def get_user_orders(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get user's most recent orders, newest first.
+        
+        Args:
+            user_id: User ID
+            limit: Maximum number of orders to return
+            
+        Returns:
+            List of order dictionaries
+        """
+        return self.get_user_orders_page(user_id, page_size=limit)['orders']
+    
     def upload_image(self, file_bytes: bytes, file_name: str, folder: str = 'products') -> Optional[str]:
         """Upload image to Firebase Storage."""
         try:
@@ -471,14 +911,44 @@ def _get_cached_products(category: Optional[str] = None, max_fetch: int = 100) -
     Returns:
         List of product dictionaries
     """
+    # The body only runs when st.cache_data has no entry
+    CACHE_MISSES.inc(cache='products')
     try:
         firebase = FirebaseService()
-        return firebase._fetch_products_from_db(category, max_fetch)
+        products = firebase._fetch_products_from_db(category, max_fetch)
+        fetched_at = time.monotonic()
+        with _catalog_lock:
+            for product in products:
+                _catalog_snapshot[product['id']] = (fetched_at, product)
+        return products
     except Exception as e:
         st.error(f"Error in cached products fetch: {str(e)}")
         return []
 
 
+def _get_fresh_catalog_products(product_ids: List[str], max_age: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the products the catalog fetched less than max_age seconds ago.
+    
+    Args:
+        product_ids: Product IDs to look up
+        max_age: Maximum age in seconds (0 disables the lookup)
+        
+    Returns:
+        Dictionary mapping product ID to a copy of its data (older or unknown products are omitted)
+    """
+    if max_age <= 0:
+        return {}
+    now = time.monotonic()
+    with _catalog_lock:
+        entries = {product_id: _catalog_snapshot.get(product_id) for product_id in product_ids}
+    return {
+        product_id: copy.deepcopy(entry[1])
+        for product_id, entry in entries.items()
+        if entry is not None and now - entry[0] < max_age
+    }
+
+
 @st.cache_data(ttl=3600)  # Cache for 1 hour (categories change infrequently)
 def _get_cached_categories() -> List[str]:
     """
@@ -489,6 +959,7 @@ def _get_cached_categories() -> List[str]:
     Returns:
         Sorted list of category names
     """
+    CACHE_MISSES.inc(cache='categories')
     try:
         firebase = FirebaseService()
         return firebase._fetch_categories_from_db()
@@ -0,0 +1,134 @@
+"""
+Pluggable storage backends for FirebaseService.
+
+A backend supplies the Firestore client FirebaseService reads and writes
+through, and runs transactions on it. The 'firebase' backend is the real
+Cloud Firestore database of the configured project; the 'memory' backend
+is an in-process fake (services.memory_firestore) that needs no
+credentials and can simulate RPC latency, for local benchmarking and
+scale testing.
+
+The backend is chosen by the 'firestore_backend' setting, or installed
+explicitly with set_backend().
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+from utils.lazy_import import lazy_import
+
+firestore = lazy_import('firebase_admin.firestore')
+firestore_async = lazy_import('firebase_admin.firestore_async')
+
+
+class FirestoreBackend:
+    """Interface of a storage backend."""
+
+    name = 'base'
+    # Whether the Firebase Admin app must be initialized before client() works
+    requires_firebase_app = True
+
+    def client(self):
+        """Get the Firestore-compatible client."""
+        raise NotImplementedError
+
+    def async_client(self):
+        """Get the asyncio client for AsyncFirebaseService. Call on the event loop thread."""
+        raise NotImplementedError(f"The '{self.name}' Firestore backend has no async client")
+
+    def run_transaction(self, db, callback: Callable, *args) -> Any:
+        """Run callback(transaction, *args) in a transaction, retrying on contention."""
+        raise NotImplementedError
+
+
+class FirebaseBackend(FirestoreBackend):
+    """Cloud Firestore through the Firebase Admin SDK."""
+
+    name = 'firebase'
+
+    def client(self):
+        return firestore.client()
+
+    def async_client(self):
+        return firestore_async.client()
+
+    def run_transaction(self, db, callback: Callable, *args) -> Any:
+        return firestore.transactional(callback)(db.transaction(), *args)
+
+
+class MemoryBackend(FirestoreBackend):
+    """In-memory Firestore fake shared by every session of the process."""
+
+    name = 'memory'
+    requires_firebase_app = False
+
+    def __init__(self, latency_ms: Union[float, Dict[str, float]] = 0.0, jitter_ms: float = 0.0,
+                 data_path: Optional[str] = None):
+        """
+        Args:
+            latency_ms: Simulated latency per RPC (one value, or a dict keyed by RPC kind)
+            jitter_ms: Uniform random latency added to every RPC
+            data_path: Optional snapshot file (MemoryFirestore.save) to start from
+        """
+        from services.memory_firestore import AsyncMemoryFirestore, MemoryFirestore
+        self._client = MemoryFirestore(latency_ms=latency_ms, jitter_ms=jitter_ms)
+        if data_path:
+            self._client.load(data_path)
+        self._async_client = AsyncMemoryFirestore(self._client)
+
+    def client(self):
+        return self._client
+
+    def async_client(self):
+        return self._async_client
+
+    def run_transaction(self, db, callback: Callable, *args) -> Any:
+        return db.run_transaction(callback, *args)
+
+
+BACKENDS = {
+    FirebaseBackend.name: FirebaseBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+_backend: Optional[FirestoreBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str, **options) -> FirestoreBackend:
+    """
+    Create a backend by name.
+
+    Raises:
+        ValueError: If the name is not a known backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Firestore backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+def get_backend() -> FirestoreBackend:
+    """Get the process-wide backend, creating it from settings on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                from config.settings import get_settings
+                settings = get_settings()
+                options = {}
+                if settings.firestore_backend == MemoryBackend.name:
+                    options['latency_ms'] = settings.memory_latency_ms
+                    options['data_path'] = settings.memory_data_path
+                _backend = create_backend(settings.firestore_backend, **options)
+    return _backend
+
+
+def set_backend(backend: Optional[FirestoreBackend]) -> Optional[FirestoreBackend]:
+    """
+    Install a backend for the whole process (None reverts to the configured one).
+
+    Returns:
+        The previously installed backend
+    """
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
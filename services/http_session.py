@@ -0,0 +1,176 @@
+"""
+Shared HTTP session for outbound REST calls.
+
+Every AuthService call used to open a fresh TLS connection. A single
+requests.Session with a pooled adapter keeps connections to Google's
+endpoints alive across calls and threads, so only the first request per
+pooled connection pays for the TCP and TLS handshake.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+from config.settings import get_app_config, get_settings
+from utils.lazy_import import lazy_import
+from utils.metrics import gauge, histogram
+
+# requests is imported when the first call is made, not at app start
+requests = lazy_import('requests')
+
+
+_session: Optional['requests.Session'] = None
+_session_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+# Every outbound call is an Identity Toolkit / Secure Token (auth) request
+_REQUEST_SECONDS = histogram(
+    'app_http_request_seconds', 'Latency of outbound auth HTTP requests.', ['endpoint', 'status']
+)
+_CONNECTIONS_OPENED = gauge(
+    'app_http_connections_opened', 'Connections opened by the pooled HTTP session since start.'
+)
+_latencies: Dict[str, deque] = {}
+_counts: Dict[str, int] = {}
+
+
+def _build_session() -> 'requests.Session':
+    """Create a session with connection pooling and a conservative retry policy."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    config = get_app_config()
+
+    # POST is retried only when the request never reached the server
+    # (connection errors) or the server refused it (429/503), so a sign-up
+    # is never submitted twice.
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=0,
+        status=2,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset(['GET', 'POST']),
+        backoff_factor=0.3,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+    adapter = HTTPAdapter(
+        pool_connections=config['http_pool_connections'],
+        pool_maxsize=config['http_pool_maxsize'],
+        max_retries=retry,
+        pool_block=False
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def get_http_session() -> 'requests.Session':
+    """Get the process-wide pooled HTTP session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _record(endpoint: str, elapsed: float):
+    """Record the latency of one call."""
+    with _metrics_lock:
+        if endpoint not in _latencies:
+            _latencies[endpoint] = deque(maxlen=1000)
+            _counts[endpoint] = 0
+        _latencies[endpoint].append(elapsed)
+        _counts[endpoint] += 1
+
+
+def _request(method: str, url: str, endpoint: Optional[str], **kwargs) -> 'requests.Response':
+    """Send a request through the pooled session and record its latency."""
+    endpoint = endpoint or urlsplit(url).path
+    kwargs.setdefault('timeout', get_settings().http_timeout_seconds)
+
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        response = get_http_session().request(method, url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _record(endpoint, elapsed)
+        _REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, status=status)
+
+
+def http_post(url: str, endpoint: Optional[str] = None, **kwargs) -> 'requests.Response':
+    """
+    POST through the pooled session and record its latency.
+
+    Args:
+        url: Request URL
+        endpoint: Name used for latency metrics (defaults to the URL path)
+        **kwargs: Passed to requests.Session.post (json, timeout, ...)
+
+    Returns:
+        The response
+    """
+    return _request('POST', url, endpoint, **kwargs)
+
+
+def http_get(url: str, endpoint: Optional[str] = None, **kwargs) -> 'requests.Response':
+    """GET through the pooled session and record its latency (see http_post)."""
+    return _request('GET', url, endpoint, **kwargs)
+
+
+def get_connections_opened() -> int:
+    """Number of connections the pooled session has opened so far."""
+    if _session is None:
+        return 0
+    total = 0
+    # The same adapter is mounted for http:// and https://
+    for adapter in {id(a): a for a in _session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            total += getattr(pool, 'num_connections', 0)
+    return total
+
+
+_CONNECTIONS_OPENED.track(get_connections_opened)
+
+
+def get_http_metrics() -> Dict[str, Any]:
+    """
+    Get latency metrics for outbound HTTP calls.
+
+    Returns:
+        Dictionary with 'endpoints' (per endpoint: count, avg_ms, p50_ms, p95_ms, max_ms
+        over the most recent calls), 'requests' (total calls) and 'connections_opened'.
+        With keep-alive, connections_opened stays close to the number of concurrent
+        callers instead of growing with every request.
+    """
+    endpoints = {}
+    with _metrics_lock:
+        for endpoint, samples in _latencies.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            endpoints[endpoint] = {
+                'count': _counts[endpoint],
+                'avg_ms': sum(ordered) / len(ordered) * 1000,
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max_ms': ordered[-1] * 1000
+            }
+        requests_total = sum(_counts.values())
+
+    return {
+        'endpoints': endpoints,
+        'requests': requests_total,
+        'connections_opened': get_connections_opened()
+    }
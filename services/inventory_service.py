@@ -0,0 +1,455 @@
+"""
+Inventory service with sharded stock counters and checkout reservations.
+
+A single product document can only sustain about one write per second, so
+stock for a product is split across N shard documents in the
+products/{product_id}/stock_shards subcollection. Each reservation takes
+units from a randomly chosen shard, spreading concurrent checkouts of the
+same bestseller over different documents.
+
+Products without shards (no 'stock_shards' field) keep using the plain
+'stock' field on the product document.
+"""
+import random
+import threading
+import time
+import streamlit as st
+from typing import Dict, List, Optional, Any
+from datetime import datetime, timedelta
+from config.settings import get_app_config
+from utils.lazy_import import lazy_import
+
+firestore = lazy_import('firebase_admin.firestore')
+
+
+SHARDS_COLLECTION = 'stock_shards'
+RESERVATIONS_COLLECTION = 'reservations'
+
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _sweep_due() -> bool:
+    """Whether this process should sweep expired reservations now (at most once per interval)."""
+    global _last_sweep
+    interval = get_app_config()['reservation_sweep_interval_seconds']
+    with _sweep_lock:
+        now = time.monotonic()
+        if now - _last_sweep < interval:
+            return False
+        _last_sweep = now
+        return True
+
+
+class InsufficientStockError(Exception):
+    """Raised inside a reservation transaction when a product lacks stock."""
+
+    def __init__(self, product_id: str, name: str, requested: int, available: int):
+        super().__init__(f"Insufficient stock for {name or product_id}")
+        self.product_id = product_id
+        self.name = name
+        self.requested = requested
+        self.available = available
+
+
+class ReservationError(Exception):
+    """Raised when a reservation cannot be committed (missing, released, expired or for other items)."""
+
+
+def item_quantities(items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Total quantity per product of cart items or reservation allocations."""
+    quantities: Dict[str, int] = {}
+    for item in items:
+        quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item.get('quantity', 1)
+    return quantities
+
+
+def is_expired(reservation: Dict[str, Any]) -> bool:
+    """Whether a reservation's expiry time has passed, whether or not it was released yet."""
+    expires_at = reservation.get('expires_at')
+    if expires_at is None:
+        return False
+    # Firestore returns timestamps as UTC-aware datetimes of the naive local times written
+    return expires_at.replace(tzinfo=None) <= datetime.now()
+
+
+class InventoryService:
+    """Service for stock counters and short-lived checkout reservations."""
+
+    def __init__(self, firebase=None):
+        if firebase is None:
+            from services.firebase_service import FirebaseService
+            firebase = FirebaseService()
+        self.firebase = firebase
+
+    def _shard_ref(self, db, product_id: str, shard_id: int):
+        """Get the document reference of a stock shard."""
+        return (
+            db.collection('products').document(product_id)
+            .collection(SHARDS_COLLECTION).document(str(shard_id))
+        )
+
+    def initialize_stock(self, product_id: str, quantity: int, num_shards: Optional[int] = None) -> bool:
+        """
+        Split a product's stock across sharded counters.
+
+        Args:
+            product_id: Product ID
+            quantity: Total units in stock
+            num_shards: Number of shards (defaults to 'inventory_shards' in app config)
+
+        Returns:
+            True on success
+        """
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return False
+
+            num_shards = num_shards or get_app_config()['inventory_shards']
+            base, remainder = divmod(quantity, num_shards)
+
+            batch = db.batch()
+            for shard_id in range(num_shards):
+                batch.set(self._shard_ref(db, product_id, shard_id), {
+                    'count': base + (1 if shard_id < remainder else 0)
+                })
+
+            batch.update(db.collection('products').document(product_id), {
+                'stock_shards': num_shards,
+                'stock': quantity,
+                'updated_at': datetime.now()
+            })
+            batch.commit()
+
+            self.firebase._invalidate_document('products', product_id)
+            return True
+        except Exception as e:
+            st.error(f"Error initializing stock: {str(e)}")
+            return False
+
+    def _shard_total(self, db, product_id: str) -> int:
+        """Sum the shard counters of a product with one query."""
+        shards = (
+            db.collection('products').document(product_id)
+            .collection(SHARDS_COLLECTION).stream()
+        )
+        return sum(shard.to_dict().get('count', 0) for shard in shards)
+
+    def get_stock(self, product_id: str) -> int:
+        """
+        Get the authoritative stock of a product.
+        Sums all shards for sharded products, otherwise reads the 'stock' field.
+        """
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return 0
+
+            product = self.firebase.get_product_by_id(product_id)
+            if product is None:
+                return 0
+
+            if not product.get('stock_shards'):
+                return product.get('stock', 0)
+
+            return self._shard_total(db, product_id)
+        except Exception as e:
+            st.error(f"Error fetching stock: {str(e)}")
+            return 0
+
+    def get_stock_levels(self, products: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        Get the authoritative stock of products that were already read.
+        The 'stock' field of a sharded product is only its initial stock, so
+        its shards are summed instead (one query per sharded product).
+
+        Args:
+            products: Product ID -> product data (None if missing)
+
+        Returns:
+            Product ID -> units in stock (0 for missing products)
+        """
+        levels = {
+            product_id: (product or {}).get('stock', 0)
+            for product_id, product in products.items()
+        }
+        sharded = [product_id for product_id, product in products.items() if product and product.get('stock_shards')]
+        if not sharded:
+            return levels
+
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return levels
+            for product_id in sharded:
+                levels[product_id] = self._shard_total(db, product_id)
+        except Exception as e:
+            st.error(f"Error fetching stock: {str(e)}")
+        return levels
+
+    def _allocate(self, transaction, db, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Take units for one cart item inside a transaction.
+        Shards are visited starting at a random one, so in the common case a
+        single shard is read and written.
+
+        Returns:
+            List of allocations {product_id, shard, quantity}; shard is None for unsharded products
+        """
+        product_id = item['product_id']
+        quantity = item.get('quantity', 1)
+
+        product_ref = db.collection('products').document(product_id)
+        product_doc = product_ref.get(transaction=transaction)
+        product = product_doc.to_dict() if product_doc.exists else None
+
+        if product is None or not product.get('active', True):
+            raise InsufficientStockError(product_id, item.get('name', ''), quantity, 0)
+
+        num_shards = product.get('stock_shards', 0)
+
+        if not num_shards:
+            stock = product.get('stock', 0)
+            if stock < quantity:
+                raise InsufficientStockError(product_id, product.get('name', ''), quantity, max(stock, 0))
+            return [{'product_id': product_id, 'shard': None, 'quantity': quantity, 'remaining': stock - quantity}]
+
+        # Reads must all happen before writes in a transaction, so collect first
+        allocations = []
+        needed = quantity
+        start = random.randrange(num_shards)
+
+        for offset in range(num_shards):
+            shard_id = (start + offset) % num_shards
+            shard_doc = self._shard_ref(db, product_id, shard_id).get(transaction=transaction)
+            count = shard_doc.to_dict().get('count', 0) if shard_doc.exists else 0
+
+            take = min(count, needed)
+            if take > 0:
+                allocations.append({
+                    'product_id': product_id,
+                    'shard': shard_id,
+                    'quantity': take,
+                    'remaining': count - take
+                })
+                needed -= take
+            if needed == 0:
+                return allocations
+
+        raise InsufficientStockError(product_id, product.get('name', ''), quantity, quantity - needed)
+
+    def take_in_transaction(self, transaction, db, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Take the stock of cart items inside a transaction, from the shards of
+        sharded products and from the 'stock' field otherwise. Nothing is
+        written unless every item is available.
+
+        Returns:
+            List of allocations {product_id, shard, quantity, remaining}
+
+        Raises:
+            InsufficientStockError: If an item lacks stock
+        """
+        allocations = []
+        for item in items:
+            allocations.extend(self._allocate(transaction, db, item))
+
+        for allocation in allocations:
+            if allocation['shard'] is None:
+                transaction.update(db.collection('products').document(allocation['product_id']), {
+                    'stock': allocation['remaining']
+                })
+            else:
+                transaction.update(self._shard_ref(db, allocation['product_id'], allocation['shard']), {
+                    'count': allocation['remaining']
+                })
+        return allocations
+
+    def reserve(self, reservation_id: str, user_id: str, items: List[Dict[str, Any]],
+                ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """
+        Reserve stock for cart items until the order is placed or the reservation expires.
+        Reserving again with the same ID is a no-op, so the checkout can use its
+        order idempotency key as reservation ID.
+
+        Args:
+            reservation_id: Reservation ID (the order key)
+            user_id: User ID
+            items: Cart items with 'product_id' and 'quantity'
+            ttl_seconds: Reservation lifetime (defaults to 'reservation_ttl_seconds' in app config)
+
+        Returns:
+            The reservation ID, or None if stock is insufficient or on error
+        """
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return None
+
+            # Return stock held by abandoned checkouts before taking more; the sweep
+            # is a query plus a transaction per reservation, so it runs once per interval
+            if _sweep_due():
+                self.expire_reservations()
+
+            ttl_seconds = ttl_seconds or get_app_config()['reservation_ttl_seconds']
+            reservation_ref = db.collection(RESERVATIONS_COLLECTION).document(reservation_id)
+
+            def _reserve(transaction):
+                existing = reservation_ref.get(transaction=transaction)
+                if existing.exists and existing.to_dict().get('status') in ('held', 'committed'):
+                    return reservation_id
+
+                allocations = self.take_in_transaction(transaction, db, items)
+
+                now = datetime.now()
+                transaction.set(reservation_ref, {
+                    'user_id': user_id,
+                    'status': 'held',
+                    'allocations': [
+                        {key: a[key] for key in ('product_id', 'shard', 'quantity')}
+                        for a in allocations
+                    ],
+                    'created_at': now,
+                    'expires_at': now + timedelta(seconds=ttl_seconds)
+                })
+                return reservation_id
+
+            result = self.firebase.run_transaction(_reserve)
+            for item in items:
+                self.firebase._invalidate_document('products', item['product_id'])
+            return result
+        except InsufficientStockError as e:
+            st.error(f"Not enough stock for {e.name}: {e.available} available, {e.requested} requested.")
+            return None
+        except Exception as e:
+            st.error(f"Error reserving stock: {str(e)}")
+            return None
+
+    def get_reservation(self, reservation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a reservation document, or None if it does not exist."""
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return None
+
+            doc = db.collection(RESERVATIONS_COLLECTION).document(reservation_id).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            st.error(f"Error fetching reservation: {str(e)}")
+            return None
+
+    def commit_in_transaction(self, transaction, db, reservation_id: str, order_id: str,
+                              items: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Mark a reservation as committed to an order, inside the order's transaction.
+        The stock was already taken when reserving, so nothing else is written.
+
+        Args:
+            transaction: The order's transaction
+            db: Firestore client
+            reservation_id: Reservation ID
+            order_id: Order ID
+            items: Order items; the reservation must hold exactly these quantities
+
+        Returns:
+            True if committed now, False if it was already committed to this order
+
+        Raises:
+            ReservationError: If the reservation is missing, released, expired,
+                belongs to another order or holds other quantities than the items
+        """
+        reservation_ref = db.collection(RESERVATIONS_COLLECTION).document(reservation_id)
+        doc = reservation_ref.get(transaction=transaction)
+
+        if not doc.exists:
+            raise ReservationError("Reservation not found")
+
+        reservation = doc.to_dict()
+        status = reservation.get('status')
+
+        if status == 'committed' and reservation.get('order_id') == order_id:
+            return False
+        if status != 'held' or is_expired(reservation):
+            # An expired reservation may not have been released by the sweeper yet
+            raise ReservationError("Reservation has expired")
+        if items is not None and item_quantities(reservation.get('allocations', [])) != item_quantities(items):
+            raise ReservationError("Reservation does not match the order items")
+
+        transaction.update(reservation_ref, {
+            'status': 'committed',
+            'order_id': order_id,
+            'committed_at': datetime.now()
+        })
+        return True
+
+    def release_reservation(self, reservation_id: str) -> bool:
+        """
+        Return the stock of a held reservation to its shards.
+
+        Returns:
+            True if the reservation was released now
+        """
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return False
+
+            reservation_ref = db.collection(RESERVATIONS_COLLECTION).document(reservation_id)
+
+            def _release(transaction):
+                doc = reservation_ref.get(transaction=transaction)
+                if not doc.exists or doc.to_dict().get('status') != 'held':
+                    return None
+
+                for allocation in doc.to_dict().get('allocations', []):
+                    if allocation.get('shard') is None:
+                        ref = db.collection('products').document(allocation['product_id'])
+                        transaction.update(ref, {'stock': firestore.Increment(allocation['quantity'])})
+                    else:
+                        ref = self._shard_ref(db, allocation['product_id'], allocation['shard'])
+                        transaction.update(ref, {'count': firestore.Increment(allocation['quantity'])})
+
+                transaction.update(reservation_ref, {
+                    'status': 'released',
+                    'released_at': datetime.now()
+                })
+                return {allocation['product_id'] for allocation in doc.to_dict().get('allocations', [])}
+
+            released = self.firebase.run_transaction(_release)
+            if released is None:
+                return False
+            for product_id in released:
+                self.firebase._invalidate_document('products', product_id)
+            return True
+        except Exception as e:
+            st.error(f"Error releasing reservation: {str(e)}")
+            return False
+
+    def expire_reservations(self, limit: int = 20) -> int:
+        """
+        Release held reservations whose expiry time has passed.
+        Requires a composite index on reservations (status ASC, expires_at ASC).
+
+        Args:
+            limit: Maximum number of reservations to release in this call
+
+        Returns:
+            Number of reservations released
+        """
+        try:
+            db = self.firebase.get_db()
+            if db is None:
+                return 0
+
+            expired = (
+                db.collection(RESERVATIONS_COLLECTION)
+                .where('status', '==', 'held')
+                .where('expires_at', '<', datetime.now())
+                .limit(limit)
+                .stream()
+            )
+            return sum(1 for doc in expired if self.release_reservation(doc.id))
+        except Exception:
+            # Expiry is best effort; the next checkout will try again
+            return 0
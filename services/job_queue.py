@@ -0,0 +1,235 @@
+"""
+Durable background job queue for work that should not block the checkout.
+
+Jobs are stored in a local SQLite database and executed by a small pool of
+worker threads inside the Streamlit process. Failed jobs are retried with
+exponential backoff until they run out of attempts; jobs that were running
+when the process stopped are picked up again on the next start.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from config.settings import get_app_config
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, run_at);
+"""
+
+
+class JobQueue:
+    """SQLite-backed job queue with a worker thread pool."""
+
+    def __init__(self, db_path: str, num_workers: int = 2, max_attempts: int = 5,
+                 poll_interval: float = 1.0, retry_delay: float = 2.0):
+        """
+        Args:
+            db_path: Path of the SQLite database file
+            num_workers: Number of worker threads
+            max_attempts: Default attempts per job before it is marked failed
+            poll_interval: Seconds a worker sleeps when there is no work
+            retry_delay: Base delay in seconds for exponential retry backoff
+        """
+        self.db_path = db_path
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Jobs left running by a previous process never finished
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's SQLite connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def register_handler(self, job_type: str, handler: Callable[[Dict[str, Any]], None]):
+        """Register the function that processes jobs of a given type."""
+        self._handlers[job_type] = handler
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            job_type: Job type used to pick the handler
+            payload: JSON-serializable job data (datetimes are stored as strings)
+            max_attempts: Optional override of the default attempts
+
+        Returns:
+            The job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, job_type, payload, status, attempts, max_attempts, run_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'pending', 0, ?, ?, ?, ?)",
+            (job_id, job_type, json.dumps(payload, default=str), max_attempts or self.max_attempts, now, now, now)
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job.
+
+        Returns:
+            Dictionary with id, job_type, status (pending, running, done, failed),
+            attempts, max_attempts and last_error, or None if the job does not exist
+        """
+        row = self._connect().execute(
+            "SELECT id, job_type, status, attempts, max_attempts, last_error FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_counts(self) -> Dict[str, int]:
+        """Get the number of jobs per status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def start(self):
+        """Start the worker threads if they are not running."""
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping.clear()
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker threads after their current job."""
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            for worker in self._workers:
+                worker.join(timeout)
+            self._workers = []
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Atomically mark the next due job as running and return it."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND run_at <= ? ORDER BY run_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row['id'])
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _work(self):
+        """Worker loop: claim and run jobs until stopped."""
+        while not self._stopping.is_set():
+            try:
+                job = self._claim_next()
+            except sqlite3.Error as e:
+                logger.warning("Job queue unavailable: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run(job)
+
+    def _run(self, job: sqlite3.Row):
+        """Run one job and record its outcome."""
+        conn = self._connect()
+        attempts = job['attempts'] + 1
+        handler = self._handlers.get(job['job_type'])
+
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job['job_type']}'")
+            handler(json.loads(job['payload']))
+            conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job['id'])
+            )
+        except Exception as e:
+            now = time.time()
+            if attempts >= job['max_attempts']:
+                logger.error("Job %s (%s) failed after %d attempts: %s", job['id'], job['job_type'], attempts, e)
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', last_error = ?, updated_at = ? WHERE id = ?",
+                    (str(e), now, job['id'])
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', last_error = ?, run_at = ?, updated_at = ? WHERE id = ?",
+                    (str(e), now + self.retry_delay * 2 ** (attempts - 1), now, job['id'])
+                )
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue, creating it and its default handlers on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                config = get_app_config()
+                queue = JobQueue(
+                    config['job_queue_path'],
+                    num_workers=config['job_workers'],
+                    max_attempts=config['job_max_attempts']
+                )
+
+                from services.order_jobs import register_order_jobs
+                register_order_jobs(queue)
+
+                _queue = queue
+    return _queue
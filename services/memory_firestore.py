@@ -0,0 +1,830 @@
+"""
+In-memory Firestore fake.
+
+Implements the part of the google-cloud-firestore client API that the
+services use on top of dictionaries: collections and subcollections,
+documents, where/order_by/limit/start_after/select queries, batches,
+transactions, get_all, and the Increment/ArrayUnion/ArrayRemove/
+SERVER_TIMESTAMP/DELETE_FIELD transforms. FirebaseService can then run
+without credentials or network access.
+
+Every RPC can be given a simulated latency. The client counts RPCs and
+billable document reads and writes the way Firestore bills them, so
+performance work can be measured and reproduced on a laptop.
+
+AsyncMemoryFirestore is a read-only asyncio view of the same data for
+AsyncFirebaseService.
+"""
+import asyncio
+import copy
+import pickle
+import random
+import string
+import threading
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.lazy_import import lazy_import
+
+google_exceptions = lazy_import('google.api_core.exceptions')
+
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+# Firestore rejects commits with more writes than this
+MAX_WRITES_PER_COMMIT = 500
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+
+def _auto_id() -> str:
+    """Generate a 20-character document ID like the Firestore client does."""
+    return ''.join(random.choice(_AUTO_ID_CHARS) for _ in range(20))
+
+
+# ==================== Field Paths ====================
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Tuple[bool, Any]:
+    """Look up a dotted field path. Returns (found, value)."""
+    value: Any = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def _set_field(data: Dict[str, Any], field_path: str, value: Any):
+    """Set a dotted field path, creating intermediate maps."""
+    parts = field_path.split('.')
+    for part in parts[:-1]:
+        if not isinstance(data.get(part), dict):
+            data[part] = {}
+        data = data[part]
+    data[parts[-1]] = value
+
+
+def _delete_field(data: Dict[str, Any], field_path: str):
+    """Remove a dotted field path if present."""
+    parts = field_path.split('.')
+    for part in parts[:-1]:
+        data = data.get(part)
+        if not isinstance(data, dict):
+            return
+    data.pop(parts[-1], None)
+
+
+def _project(data: Dict[str, Any], field_paths: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only the given field paths (all fields if None)."""
+    if field_paths is None:
+        return data
+    projected: Dict[str, Any] = {}
+    for field_path in field_paths:
+        found, value = _get_field(data, field_path)
+        if found:
+            _set_field(projected, field_path, value)
+    return projected
+
+
+# ==================== Transforms ====================
+# Transform values are created by the real client library (firestore.Increment,
+# firestore.ArrayUnion, ...). They are recognised by class name so the fake
+# does not need to import google.cloud.firestore itself.
+
+def _transform_kind(value: Any) -> Optional[str]:
+    """Name of the transform a value represents, or None for plain values."""
+    name = type(value).__name__
+    if name in ('Increment', 'Maximum', 'Minimum', 'ArrayUnion', 'ArrayRemove'):
+        return name
+    if name == 'Sentinel':
+        return 'DELETE_FIELD' if 'delete' in getattr(value, 'description', '').lower() else 'SERVER_TIMESTAMP'
+    return None
+
+
+def _apply_transform(data: Dict[str, Any], field_path: str, value: Any, now: datetime):
+    """Write one field, applying transforms and walking nested maps."""
+    kind = _transform_kind(value)
+    if kind is None:
+        if isinstance(value, dict) and any(_has_transform(v) for v in value.values()):
+            _set_field(data, field_path, {})
+            for key, nested in value.items():
+                _apply_transform(data, f"{field_path}.{key}", nested, now)
+        else:
+            _set_field(data, field_path, copy.deepcopy(value))
+        return
+
+    found, current = _get_field(data, field_path)
+    if kind == 'DELETE_FIELD':
+        _delete_field(data, field_path)
+    elif kind == 'SERVER_TIMESTAMP':
+        _set_field(data, field_path, now)
+    elif kind == 'Increment':
+        base = current if found and isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        _set_field(data, field_path, base + value.value)
+    elif kind == 'Maximum':
+        base = current if found and isinstance(current, (int, float)) else value.value
+        _set_field(data, field_path, max(base, value.value))
+    elif kind == 'Minimum':
+        base = current if found and isinstance(current, (int, float)) else value.value
+        _set_field(data, field_path, min(base, value.value))
+    elif kind == 'ArrayUnion':
+        array = list(current) if found and isinstance(current, list) else []
+        array.extend(copy.deepcopy(v) for v in value.values if v not in array)
+        _set_field(data, field_path, array)
+    elif kind == 'ArrayRemove':
+        array = list(current) if found and isinstance(current, list) else []
+        _set_field(data, field_path, [v for v in array if v not in value.values])
+
+
+def _has_transform(value: Any) -> bool:
+    if _transform_kind(value) is not None:
+        return True
+    return isinstance(value, dict) and any(_has_transform(v) for v in value.values())
+
+
+def _merge(target: Dict[str, Any], updates: Dict[str, Any], now: datetime):
+    """Deep-merge a map into a document (set(..., merge=True))."""
+    for key, value in updates.items():
+        if isinstance(value, dict) and _transform_kind(value) is None and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            _apply_transform(target, key, value, now)
+
+
+# ==================== Value Ordering ====================
+# Firestore orders values of different types by type first:
+# null < boolean < number < timestamp < string < bytes < reference < array < map
+
+def _sort_key(value: Any) -> Tuple:
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp() if value.tzinfo else value)
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    if isinstance(value, MemoryDocumentReference):
+        return (6, value.path)
+    if isinstance(value, (list, tuple)):
+        return (8, tuple(_sort_key(v) for v in value))
+    if isinstance(value, dict):
+        return (9, tuple((k, _sort_key(v)) for k, v in sorted(value.items())))
+    return (10, str(value))
+
+
+def _compare(a: Any, b: Any) -> int:
+    """Three-way comparison in Firestore value order."""
+    key_a, key_b = _sort_key(a), _sort_key(b)
+    try:
+        return (key_a > key_b) - (key_a < key_b)
+    except TypeError:
+        # e.g. naive vs timezone-aware datetimes
+        return (str(key_a) > str(key_b)) - (str(key_a) < str(key_b))
+
+
+def _matches(found: bool, doc_value: Any, op: str, value: Any) -> bool:
+    """Evaluate one where() filter against a document field."""
+    if op == '!=':
+        return found and doc_value != value
+    if op == 'not-in':
+        return found and doc_value not in value
+    if not found:
+        return False
+    if op == '==':
+        return doc_value == value
+    if op == 'in':
+        return doc_value in value
+    if op == 'array-contains':
+        return isinstance(doc_value, list) and value in doc_value
+    if op == 'array-contains-any':
+        return isinstance(doc_value, list) and any(v in doc_value for v in value)
+
+    # Range filters only match values of the same type
+    if _sort_key(doc_value)[0] != _sort_key(value)[0]:
+        return False
+    result = _compare(doc_value, value)
+    if op == '<':
+        return result < 0
+    if op == '<=':
+        return result <= 0
+    if op == '>':
+        return result > 0
+    if op == '>=':
+        return result >= 0
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+_RANGE_OPERATORS = ('<', '<=', '>', '>=', '!=', 'not-in')
+
+
+# ==================== Snapshots and References ====================
+
+class MemoryDocumentSnapshot:
+    """Result of reading a document."""
+
+    def __init__(self, reference: 'MemoryDocumentReference', data: Optional[Dict[str, Any]],
+                 create_time: Optional[datetime] = None, update_time: Optional[datetime] = None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = datetime.now()
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        if self._data is None:
+            return None
+        found, value = _get_field(self._data, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class MemoryDocumentReference:
+    """Reference to a document in a MemoryFirestore client."""
+
+    def __init__(self, client: 'MemoryFirestore', collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> 'MemoryCollectionReference':
+        return MemoryCollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id: str) -> 'MemoryCollectionReference':
+        return MemoryCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths: Optional[Iterable[str]] = None,
+            transaction: Optional['MemoryTransaction'] = None) -> MemoryDocumentSnapshot:
+        self._client._rpc('get')
+        snapshot = self._client._read(self, field_paths, transaction)
+        self._client._count('document_reads', 1)
+        return snapshot
+
+    def create(self, document_data: Dict[str, Any]):
+        return self._client._commit([('create', self, document_data, False)])[0]
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False):
+        return self._client._commit([('set', self, document_data, merge)])[0]
+
+    def update(self, field_updates: Dict[str, Any]):
+        return self._client._commit([('update', self, field_updates, False)])[0]
+
+    def delete(self):
+        return self._client._commit([('delete', self, None, False)])[0]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def __repr__(self) -> str:
+        return f"<MemoryDocumentReference {self.path}>"
+
+
+# ==================== Queries ====================
+
+class MemoryQuery:
+    """Immutable query over one collection."""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client: 'MemoryFirestore', collection_path: str,
+                 filters: Tuple = (), orders: Tuple = (), limit: Optional[int] = None,
+                 cursor: Optional[Tuple[Any, bool]] = None, projection: Optional[Tuple[str, ...]] = None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes) -> 'MemoryQuery':
+        state = {
+            'filters': self._filters,
+            'orders': self._orders,
+            'limit': self._limit,
+            'cursor': self._cursor,
+            'projection': self._projection
+        }
+        state.update(changes)
+        return MemoryQuery(self._client, self._collection_path, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter: Any = None) -> 'MemoryQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> 'MemoryQuery':
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> 'MemoryQuery':
+        return self._copy(limit=count)
+
+    def select(self, field_paths: Iterable[str]) -> 'MemoryQuery':
+        return self._copy(projection=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> 'MemoryQuery':
+        return self._copy(cursor=(document_fields_or_snapshot, False))
+
+    def start_at(self, document_fields_or_snapshot: Any) -> 'MemoryQuery':
+        return self._copy(cursor=(document_fields_or_snapshot, True))
+
+    def _effective_orders(self) -> List[Tuple[str, str]]:
+        """Explicit orders, preceded by an implicit order on an inequality field."""
+        orders = list(self._orders)
+        for field_path, op, _ in self._filters:
+            if op in _RANGE_OPERATORS and not any(f == field_path for f, _ in orders):
+                orders.insert(0, (field_path, ASCENDING))
+                break
+        return orders
+
+    def _cursor_values(self, orders: List[Tuple[str, str]]) -> List[Any]:
+        cursor, _ = self._cursor
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            data = cursor._data or {}
+            return [cursor.id if f == '__name__' else _get_field(data, f)[1] for f, _ in orders] + [cursor.id]
+        return [cursor[f] for f, _ in orders if f in cursor]
+
+    def _execute(self, transaction: Optional['MemoryTransaction']) -> List[MemoryDocumentSnapshot]:
+        orders = self._effective_orders()
+        filters = self._filters
+        documents = self._client._scan(self._collection_path, transaction)
+
+        def _passes(data: Dict[str, Any]) -> bool:
+            for field_path, op, value in filters:
+                found, doc_value = _get_field(data, field_path)
+                if not _matches(found, doc_value, op, value):
+                    return False
+            return True
+
+        # Without explicit orders the result is in document ID order, so the
+        # scan can walk the IDs in order and stop as soon as the limit is reached
+        stop_at = self._limit if not orders and self._cursor is None else None
+        if not orders:
+            documents.sort(key=lambda item: item[0])
+
+        rows = []
+        for document_id, stored in documents:
+            data = stored['data']
+            if not _passes(data):
+                continue
+            if stop_at is not None and len(rows) >= stop_at:
+                break
+
+            # Documents without an ordered field are not returned
+            values = []
+            for field_path, _ in orders:
+                found, value = (True, document_id) if field_path == '__name__' else _get_field(data, field_path)
+                if not found:
+                    break
+                values.append(value)
+            else:
+                rows.append((values + [document_id], document_id, stored))
+
+        directions = [d for _, d in orders] + [orders[-1][1] if orders else ASCENDING]
+
+        def _order(a, b) -> int:
+            for value_a, value_b, direction in zip(a[0], b[0], directions):
+                result = _compare(value_a, value_b)
+                if result:
+                    return -result if direction == DESCENDING else result
+            return 0
+
+        # Stable sorts from the last key to the first give the combined order.
+        # The trailing document ID is compared directly; IDs are always strings.
+        for index in reversed(range(len(directions) if orders else 0)):
+            if index == len(directions) - 1:
+                rows.sort(key=lambda row: row[1], reverse=directions[index] == DESCENDING)
+                continue
+            try:
+                rows.sort(key=lambda row: _sort_key(row[0][index]), reverse=directions[index] == DESCENDING)
+            except TypeError:
+                # e.g. naive and timezone-aware datetimes in the same field
+                rows.sort(key=lambda row: str(_sort_key(row[0][index])), reverse=directions[index] == DESCENDING)
+
+        if self._cursor is not None:
+            cursor_values = self._cursor_values(orders)
+            inclusive = self._cursor[1]
+
+            def _after_cursor(row) -> bool:
+                result = _order((row[0][:len(cursor_values)],), (cursor_values,))
+                return result >= 0 if inclusive else result > 0
+            rows = [row for row in rows if _after_cursor(row)]
+
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        collection = MemoryCollectionReference(self._client, self._collection_path)
+        return [
+            MemoryDocumentSnapshot(
+                collection.document(document_id),
+                _project(copy.deepcopy(stored['data']), self._projection),
+                stored['create_time'],
+                stored['update_time']
+            )
+            for _, document_id, stored in rows
+        ]
+
+    def stream(self, transaction: Optional['MemoryTransaction'] = None) -> Iterator[MemoryDocumentSnapshot]:
+        self._client._rpc('query')
+        results = self._execute(transaction)
+        # A query is billed at least one read even if it returns nothing
+        self._client._count('document_reads', max(len(results), 1))
+        return iter(results)
+
+    def get(self, transaction: Optional['MemoryTransaction'] = None) -> List[MemoryDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class MemoryCollectionReference(MemoryQuery):
+    """Reference to a collection; also the query over all of its documents."""
+
+    def __init__(self, client: 'MemoryFirestore', collection_path: str):
+        super().__init__(client, collection_path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit('/', 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self._client, self._collection_path, document_id or _auto_id())
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        update_time = reference.create(document_data)
+        return update_time, reference
+
+    def list_documents(self) -> List[MemoryDocumentReference]:
+        return [self.document(document_id) for document_id, _ in self._client._scan(self._collection_path)]
+
+
+# ==================== Batches and Transactions ====================
+
+class MemoryWriteBatch:
+    """Writes committed atomically in one RPC."""
+
+    def __init__(self, client: 'MemoryFirestore'):
+        self._client = client
+        self._writes: List[Tuple] = []
+
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]) -> 'MemoryWriteBatch':
+        self._writes.append(('create', reference, document_data, False))
+        return self
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any],
+            merge: bool = False) -> 'MemoryWriteBatch':
+        self._writes.append(('set', reference, document_data, merge))
+        return self
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any]) -> 'MemoryWriteBatch':
+        self._writes.append(('update', reference, field_updates, False))
+        return self
+
+    def delete(self, reference: MemoryDocumentReference) -> 'MemoryWriteBatch':
+        self._writes.append(('delete', reference, None, False))
+        return self
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def commit(self) -> List[datetime]:
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Optimistic transaction: reads record the version of each document and
+    the commit fails with Aborted if any of them changed in the meantime.
+    """
+
+    def __init__(self, client: 'MemoryFirestore'):
+        super().__init__(client)
+        self._read_versions: Dict[str, int] = {}
+
+    def get(self, ref_or_query: Union[MemoryDocumentReference, MemoryQuery]):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references: Iterable[MemoryDocumentReference]):
+        return self._client.get_all(references, transaction=self)
+
+    def commit(self) -> List[datetime]:
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes, expected_versions=self._read_versions)
+
+
+# ==================== Client ====================
+
+class MemoryFirestore:
+    """Firestore-compatible client keeping all documents in memory."""
+
+    def __init__(self, latency_ms: Union[float, Dict[str, float]] = 0.0, jitter_ms: float = 0.0):
+        """
+        Args:
+            latency_ms: Simulated latency per RPC, either one value for every RPC or
+                a dict keyed by RPC kind ('get', 'get_all', 'query', 'commit',
+                'begin_transaction', 'rollback') with an optional 'default'
+            jitter_ms: Uniform random latency added to every RPC
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._version = 0
+        self.reset_stats()
+
+    # ----- Accounting -----
+
+    def _rpc(self, kind: str):
+        """Count one RPC and sleep for its simulated latency."""
+        with self._stats_lock:
+            self._rpcs[kind] = self._rpcs.get(kind, 0) + 1
+
+        if isinstance(self.latency_ms, dict):
+            latency = self.latency_ms.get(kind, self.latency_ms.get('default', 0.0))
+        else:
+            latency = self.latency_ms
+        if self.jitter_ms:
+            latency += random.uniform(0, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def _count(self, counter: str, amount: int):
+        with self._stats_lock:
+            self._counters[counter] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """RPCs by kind and billable document reads, writes and deletes since the last reset."""
+        with self._stats_lock:
+            return {
+                'rpcs': sum(self._rpcs.values()),
+                'rpcs_by_kind': dict(self._rpcs),
+                **self._counters
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._rpcs: Dict[str, int] = {}
+            self._counters = {'document_reads': 0, 'document_writes': 0, 'document_deletes': 0}
+
+    def clear(self):
+        """Delete all documents."""
+        with self._lock:
+            self._collections.clear()
+
+    def save(self, path: str):
+        """Write all documents to a snapshot file that load() can read back."""
+        with self._lock:
+            with open(path, 'wb') as f:
+                pickle.dump({'version': self._version, 'collections': self._collections}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: str):
+        """Replace all documents with the contents of a snapshot written by save()."""
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        with self._lock:
+            self._collections = snapshot['collections']
+            self._version = snapshot['version']
+
+    # ----- Client API -----
+
+    def collection(self, collection_path: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, collection_path)
+
+    def document(self, document_path: str) -> MemoryDocumentReference:
+        collection_path, document_id = document_path.rsplit('/', 1)
+        return MemoryDocumentReference(self, collection_path, document_id)
+
+    def collections(self) -> List[MemoryCollectionReference]:
+        with self._lock:
+            return [self.collection(path) for path in self._collections if '/' not in path]
+
+    def get_all(self, references: Iterable[MemoryDocumentReference],
+                field_paths: Optional[Iterable[str]] = None,
+                transaction: Optional[MemoryTransaction] = None) -> Iterator[MemoryDocumentSnapshot]:
+        references = list(references)
+        self._rpc('get_all')
+        snapshots = [self._read(reference, field_paths, transaction) for reference in references]
+        self._count('document_reads', len(snapshots))
+        return iter(snapshots)
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self) -> MemoryTransaction:
+        return MemoryTransaction(self)
+
+    def run_transaction(self, callback, *args, max_attempts: int = 5):
+        """
+        Run callback(transaction, *args) and commit it, retrying when a
+        document it read was changed by someone else before the commit.
+
+        Returns:
+            The callback's return value
+        """
+        for attempt in range(max_attempts):
+            transaction = self.transaction()
+            self._rpc('begin_transaction')
+            try:
+                result = callback(transaction, *args)
+            except Exception:
+                self._rpc('rollback')
+                raise
+
+            try:
+                transaction.commit()
+                return result
+            except google_exceptions.Aborted:
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+
+    # ----- Storage -----
+
+    def _scan(self, collection_path: str,
+              transaction: Optional[MemoryTransaction] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Snapshot the documents of a collection."""
+        with self._lock:
+            documents = list(self._collections.get(collection_path, {}).items())
+        if transaction is not None:
+            for document_id, stored in documents:
+                transaction._read_versions.setdefault(f"{collection_path}/{document_id}", stored['version'])
+        return documents
+
+    def _read(self, reference: MemoryDocumentReference, field_paths: Optional[Iterable[str]],
+              transaction: Optional[MemoryTransaction]) -> MemoryDocumentSnapshot:
+        with self._lock:
+            stored = self._collections.get(reference._collection_path, {}).get(reference.id)
+            if transaction is not None:
+                transaction._read_versions.setdefault(reference.path, stored['version'] if stored else 0)
+            if stored is None:
+                return MemoryDocumentSnapshot(reference, None)
+            data = _project(copy.deepcopy(stored['data']), field_paths)
+            return MemoryDocumentSnapshot(reference, data, stored['create_time'], stored['update_time'])
+
+    def _commit(self, writes: List[Tuple], expected_versions: Optional[Dict[str, int]] = None) -> List[datetime]:
+        """
+        Apply writes atomically: every write is validated before any is stored.
+
+        Raises:
+            InvalidArgument: More than MAX_WRITES_PER_COMMIT writes
+            AlreadyExists: create() of an existing document
+            NotFound: update() of a missing document
+            Aborted: A document read by the transaction changed since it was read
+        """
+        if len(writes) > MAX_WRITES_PER_COMMIT:
+            raise google_exceptions.InvalidArgument(
+                f"maximum {MAX_WRITES_PER_COMMIT} writes allowed per request"
+            )
+
+        self._rpc('commit')
+        now = datetime.now()
+
+        with self._lock:
+            for path, version in (expected_versions or {}).items():
+                collection_path, document_id = path.rsplit('/', 1)
+                stored = self._collections.get(collection_path, {}).get(document_id)
+                if (stored['version'] if stored else 0) != version:
+                    raise google_exceptions.Aborted(f"Transaction lock timeout or contention on {path}")
+
+            # Build the new state of every touched document first
+            pending: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+            for op, reference, data, merge in writes:
+                key = (reference._collection_path, reference.id)
+                if key in pending:
+                    current = pending[key]
+                else:
+                    stored = self._collections.get(key[0], {}).get(key[1])
+                    current = copy.deepcopy(stored['data']) if stored else None
+
+                if op == 'create':
+                    if current is not None:
+                        raise google_exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+                    current = {}
+                    _merge(current, data, now)
+                elif op == 'set':
+                    if current is None or not merge:
+                        current = {}
+                    _merge(current, data, now)
+                elif op == 'update':
+                    if current is None:
+                        raise google_exceptions.NotFound(f"No document to update: {reference.path}")
+                    for field_path, value in data.items():
+                        _apply_transform(current, field_path, value, now)
+                elif op == 'delete':
+                    current = None
+                pending[key] = current
+
+            for (collection_path, document_id), data in pending.items():
+                collection = self._collections.setdefault(collection_path, {})
+                self._version += 1
+                if data is None:
+                    collection.pop(document_id, None)
+                else:
+                    previous = collection.get(document_id)
+                    collection[document_id] = {
+                        'data': data,
+                        'create_time': previous['create_time'] if previous else now,
+                        'update_time': now,
+                        'version': self._version
+                    }
+
+        deletes = sum(1 for op, *_ in writes if op == 'delete')
+        self._count('document_writes', len(writes) - deletes)
+        self._count('document_deletes', deletes)
+        return [now] * len(writes)
+
+
+# ==================== Async Client ====================
+# Read-only asyncio view of a MemoryFirestore, covering what
+# AsyncFirebaseService uses. Each RPC runs in a worker thread, so simulated
+# latencies of concurrent reads overlap like they do on the AsyncClient.
+
+class AsyncMemoryDocumentReference:
+    """Awaitable view of a MemoryDocumentReference."""
+
+    def __init__(self, reference: MemoryDocumentReference):
+        self._reference = reference
+
+    @property
+    def id(self) -> str:
+        return self._reference.id
+
+    async def get(self, field_paths: Optional[Iterable[str]] = None) -> MemoryDocumentSnapshot:
+        return await asyncio.to_thread(self._reference.get, field_paths)
+
+
+class AsyncMemoryQuery:
+    """Async-iterable view of a MemoryQuery."""
+
+    def __init__(self, query: MemoryQuery):
+        self._query = query
+
+    def where(self, *args, **kwargs) -> 'AsyncMemoryQuery':
+        return AsyncMemoryQuery(self._query.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs) -> 'AsyncMemoryQuery':
+        return AsyncMemoryQuery(self._query.order_by(*args, **kwargs))
+
+    def limit(self, count: int) -> 'AsyncMemoryQuery':
+        return AsyncMemoryQuery(self._query.limit(count))
+
+    def select(self, field_paths: Iterable[str]) -> 'AsyncMemoryQuery':
+        return AsyncMemoryQuery(self._query.select(field_paths))
+
+    async def stream(self) -> AsyncIterator[MemoryDocumentSnapshot]:
+        for snapshot in await asyncio.to_thread(self._query.get):
+            yield snapshot
+
+    async def get(self) -> List[MemoryDocumentSnapshot]:
+        return await asyncio.to_thread(self._query.get)
+
+
+class AsyncMemoryCollectionReference(AsyncMemoryQuery):
+    """Async view of a MemoryCollectionReference."""
+
+    def document(self, document_id: Optional[str] = None) -> AsyncMemoryDocumentReference:
+        return AsyncMemoryDocumentReference(self._query.document(document_id))
+
+
+class AsyncMemoryFirestore:
+    """Async client reading the same data as a MemoryFirestore."""
+
+    def __init__(self, client: MemoryFirestore):
+        self._client = client
+
+    def collection(self, collection_path: str) -> AsyncMemoryCollectionReference:
+        return AsyncMemoryCollectionReference(self._client.collection(collection_path))
+
+    def document(self, document_path: str) -> AsyncMemoryDocumentReference:
+        return AsyncMemoryDocumentReference(self._client.document(document_path))
@@ -0,0 +1,717 @@
+"""
+Firestore operation metering.
+
+Firestore bills every document read, write and delete. When metering is on
+(the 'firestore_metering' setting or FIRESTORE_METERING=1),
+FirebaseService.get_db() hands out a metered proxy of the client, so every
+call that reaches Firestore through it (document gets, queries, get_all,
+batch and transaction writes), including the ones AuthService and
+InventoryService make, is recorded with the documents it read, wrote or
+deleted, an estimate of the bytes transferred and its latency. Each call is
+attributed to
+
+- its call site: the innermost public function of the app's own code on the
+  stack, e.g. ``firebase_service.FirebaseService.get_user_cart``, and
+- the Streamlit script run (rerun) and page it happened in.
+
+Running totals per call site and per page are kept for the life of the
+process. report() returns them, format_report() renders them as a table and
+dump_report() writes them as JSON (also at exit when 'metering_report_path'
+is set).
+
+When the metrics server is configured, the client is wrapped as well and
+every call's latency and document counts are exported by operation and
+collection (without the per-call-site accounting). So it is when the slow
+operation log is on: calls above its threshold are handed to
+services.slow_log with their call site and query shape.
+"""
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from services import slow_log
+from utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Client plumbing that is never reported as a call site
+_SKIPPED_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(ROOT, 'services', 'firestore_backend.py'),
+    os.path.join(ROOT, 'services', 'memory_firestore.py'),
+    os.path.join(ROOT, 'utils', 'profiling.py'),
+}
+_SKIPPED_FUNCTIONS = {'run_transaction', 'get_db'}
+
+_lock = threading.Lock()
+_enabled: Optional[bool] = None
+_totals: Dict[str, float] = {}
+_sites: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+_pages: Dict[str, Dict[str, float]] = {}
+_reruns: Dict[Optional[str], Dict[str, Any]] = {}
+_recent_reruns: deque = deque(maxlen=100)
+_site_labels: Dict[Any, Optional[str]] = {}
+_proxy: Optional[Tuple[Any, 'MeteredClient']] = None
+
+_OPERATION_SECONDS = metrics.histogram(
+    'app_firestore_operation_seconds', 'Latency of Firestore calls.', ['operation', 'collection']
+)
+_DOCUMENTS = metrics.counter(
+    'app_firestore_documents_total', 'Billable Firestore document operations.', ['operation', 'collection']
+)
+
+
+def _new_totals() -> Dict[str, float]:
+    return {'calls': 0, 'reads': 0, 'writes': 0, 'deletes': 0, 'bytes': 0,
+            'latency_ms': 0.0, 'max_latency_ms': 0.0}
+
+
+def _add(totals: Dict[str, float], reads: int, writes: int, deletes: int, nbytes: int, latency_ms: float):
+    totals['calls'] += 1
+    totals['reads'] += reads
+    totals['writes'] += writes
+    totals['deletes'] += deletes
+    totals['bytes'] += nbytes
+    totals['latency_ms'] += latency_ms
+    totals['max_latency_ms'] = max(totals['max_latency_ms'], latency_ms)
+
+
+_totals = _new_totals()
+
+
+# ==================== Switch ====================
+
+def is_enabled() -> bool:
+    """Whether Firestore calls are metered (read from settings on first use)."""
+    global _enabled
+    if _enabled is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        _enabled = bool(settings.firestore_metering)
+        if _enabled and settings.metering_report_path:
+            atexit.register(dump_report, settings.metering_report_path)
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    """Turn metering on or off for the whole process."""
+    global _enabled
+    _enabled = enabled
+
+
+def wrap_client(client):
+    """Get the metered proxy of a Firestore client (the client itself when metering is off)."""
+    global _proxy
+    if client is None or not (is_enabled() or metrics.is_enabled() or slow_log.is_enabled()):
+        return client
+    proxy = _proxy
+    if proxy is None or proxy[0] is not client:
+        proxy = _proxy = (client, MeteredClient(client))
+    return proxy[1]
+
+
+# ==================== Attribution ====================
+
+def _site_label(code) -> Optional[str]:
+    """'module.Qualified.name' for public app functions, None for anything else."""
+    label = _site_labels.get(code, False)
+    if label is False:
+        filename = os.path.abspath(code.co_filename)
+        label = None
+        if filename.startswith(ROOT) and filename not in _SKIPPED_FILES and 'site-packages' not in filename:
+            # Nested callbacks (e.g. a transaction body) count for their enclosing function
+            qualname = getattr(code, 'co_qualname', code.co_name).split('.<locals>', 1)[0]
+            name = qualname.rsplit('.', 1)[-1]
+            if not name.startswith('_') and name not in _SKIPPED_FUNCTIONS:
+                module = os.path.splitext(os.path.basename(filename))[0]
+                label = f"{module}.{qualname}"
+        _site_labels[code] = label
+    return label
+
+
+def _call_site() -> str:
+    """The innermost public function of the app's code on the calling stack."""
+    frame = sys._getframe(2)
+    innermost = None
+    while frame is not None:
+        code = frame.f_code
+        label = _site_label(code)
+        if label:
+            return label
+        if innermost is None and code.co_filename.startswith(ROOT) and \
+                os.path.abspath(code.co_filename) not in _SKIPPED_FILES:
+            innermost = f"{os.path.splitext(os.path.basename(code.co_filename))[0]}.{code.co_name}"
+        frame = frame.f_back
+    return innermost or 'unknown'
+
+
+def _session_id() -> Optional[str]:
+    """ID of the Streamlit session running this code, None outside a script run."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except (ImportError, TypeError):
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+def _record(kind: str, collection: str, reads: int = 0, writes: int = 0, deletes: int = 0,
+            nbytes: int = 0, seconds: float = 0.0, result_count: Optional[int] = None,
+            shape: Optional[Dict[str, Any]] = None, steps: Optional[Tuple] = None):
+    """Account one Firestore call to its call site, the current rerun and the process totals."""
+    _OPERATION_SECONDS.observe(seconds, operation=kind, collection=collection)
+    for operation, count in (('read', reads), ('write', writes), ('delete', deletes)):
+        if count:
+            _DOCUMENTS.inc(count, operation=operation, collection=collection)
+
+    site = None
+    threshold = slow_log.threshold_seconds()
+    if threshold is not None and seconds >= threshold:
+        site = _call_site()
+        if steps is not None:
+            shape = {**slow_log.query_shape(steps), **(shape or {})}
+        slow_log.record(kind, collection, seconds, site, reads=reads, writes=writes, deletes=deletes,
+                        nbytes=nbytes, result_count=result_count, shape=shape)
+    if not is_enabled():
+        return
+
+    site = site or _call_site()
+    session = _session_id()
+    latency_ms = seconds * 1000
+
+    with _lock:
+        _add(_totals, reads, writes, deletes, nbytes, latency_ms)
+        key = (site, kind, collection)
+        if key not in _sites:
+            _sites[key] = _new_totals()
+        _add(_sites[key], reads, writes, deletes, nbytes, latency_ms)
+
+        rerun = _reruns.get(session)
+        if rerun is not None:
+            _add(rerun['totals'], reads, writes, deletes, nbytes, latency_ms)
+            if site not in rerun['sites']:
+                rerun['sites'][site] = _new_totals()
+            _add(rerun['sites'][site], reads, writes, deletes, nbytes, latency_ms)
+
+
+# ==================== Reruns ====================
+
+def begin_rerun(page: Optional[str] = None):
+    """Start accounting a script run of the current session. Call at the top of every run."""
+    if not is_enabled():
+        return
+    session = _session_id()
+    with _lock:
+        previous = _reruns.pop(session, None)
+        if previous is not None:
+            # The previous run was interrupted (st.rerun, st.stop) before end_rerun
+            _finish(previous)
+        _reruns[session] = {
+            'session': session,
+            'page': page or 'unknown',
+            'started_at': datetime.now(),
+            'perf_started': time.perf_counter(),
+            'totals': _new_totals(),
+            'sites': {}
+        }
+
+
+def current_rerun() -> Optional[Dict[str, Any]]:
+    """Running totals of the current session's script run, or None."""
+    if not is_enabled():
+        return None
+    with _lock:
+        rerun = _reruns.get(_session_id())
+        return _summarize(rerun) if rerun is not None else None
+
+
+def end_rerun() -> Optional[Dict[str, Any]]:
+    """
+    Finish accounting the current session's script run.
+
+    Returns:
+        The run's summary, or None if metering is off or no run was started
+    """
+    if not is_enabled():
+        return None
+    with _lock:
+        rerun = _reruns.pop(_session_id(), None)
+        summary = _finish(rerun) if rerun is not None else None
+
+    if summary is not None:
+        totals = summary['totals']
+        logger.info(
+            "Rerun of %s: %d reads, %d writes, %d deletes, %.1f KB in %d Firestore calls (%.0f ms of %.0f ms)",
+            summary['page'], totals['reads'], totals['writes'], totals['deletes'], totals['bytes'] / 1024,
+            totals['calls'], totals['latency_ms'], summary['duration_ms']
+        )
+    return summary
+
+
+def _summarize(rerun: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'session': rerun['session'],
+        'page': rerun['page'],
+        'started_at': rerun['started_at'],
+        'duration_ms': (time.perf_counter() - rerun['perf_started']) * 1000,
+        'totals': dict(rerun['totals']),
+        'sites': {site: dict(totals) for site, totals in rerun['sites'].items()}
+    }
+
+
+def _finish(rerun: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a finished run to the page totals. Must hold _lock."""
+    summary = _summarize(rerun)
+    page = _pages.setdefault(summary['page'], {**_new_totals(), 'reruns': 0, 'max_reads': 0})
+    page['reruns'] += 1
+    for key in ('calls', 'reads', 'writes', 'deletes', 'bytes', 'latency_ms'):
+        page[key] += summary['totals'][key]
+    page['max_latency_ms'] = max(page['max_latency_ms'], summary['totals']['max_latency_ms'])
+    page['max_reads'] = max(page['max_reads'], summary['totals']['reads'])
+    _recent_reruns.append(summary)
+    return summary
+
+
+# ==================== Reports ====================
+
+def report() -> Dict[str, Any]:
+    """
+    Totals since the process started (or the last reset).
+
+    Returns:
+        Dictionary with 'totals', 'call_sites' and 'pages' (both sorted by
+        document reads, most expensive first) and 'recent_reruns'
+    """
+    with _lock:
+        call_sites = [
+            {'site': site, 'kind': kind, 'collection': collection, **totals}
+            for (site, kind, collection), totals in _sites.items()
+        ]
+        pages = [
+            {'page': page, **totals, 'reads_per_rerun': totals['reads'] / totals['reruns']}
+            for page, totals in _pages.items()
+        ]
+        return {
+            'generated_at': datetime.now(),
+            'totals': dict(_totals),
+            'call_sites': sorted(call_sites, key=lambda row: (-row['reads'], -row['writes'], -row['latency_ms'])),
+            'pages': sorted(pages, key=lambda row: -row['reads']),
+            'recent_reruns': list(_recent_reruns)
+        }
+
+
+def format_report(top: int = 20) -> str:
+    """Render report() as plain-text tables of the top call sites and pages."""
+    data = report()
+    totals = data['totals']
+    lines = [
+        f"Firestore: {totals['calls']:,} calls, {totals['reads']:,} reads, {totals['writes']:,} writes, "
+        f"{totals['deletes']:,} deletes, {totals['bytes'] / 1024:,.1f} KB, {totals['latency_ms']:,.0f} ms",
+        '',
+        f"{'call site':<60} {'op':<10} {'collection':<16} {'calls':>7} {'reads':>8} {'writes':>7} {'KB':>9} {'avg ms':>8}",
+    ]
+    for row in data['call_sites'][:top]:
+        lines.append(
+            f"{row['site'][:60]:<60} {row['kind']:<10} {row['collection'][:16]:<16} {row['calls']:>7,} "
+            f"{row['reads']:>8,} {row['writes'] + row['deletes']:>7,} {row['bytes'] / 1024:>9,.1f} "
+            f"{row['latency_ms'] / row['calls']:>8.1f}"
+        )
+    lines += ['', f"{'page':<20} {'reruns':>7} {'reads':>9} {'reads/run':>10} {'max reads':>10} {'writes':>8} {'ms/run':>8}"]
+    for row in data['pages'][:top]:
+        lines.append(
+            f"{row['page'][:20]:<20} {row['reruns']:>7,} {row['reads']:>9,} {row['reads_per_rerun']:>10.1f} "
+            f"{row['max_reads']:>10,} {row['writes'] + row['deletes']:>8,} {row['latency_ms'] / row['reruns']:>8.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dump_report(path: str):
+    """Write report() to a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, indent=2, default=_json_default)
+
+
+def reset():
+    """Clear every total (runs in progress keep accounting from zero)."""
+    global _totals
+    with _lock:
+        _totals = _new_totals()
+        _sites.clear()
+        _pages.clear()
+        _recent_reruns.clear()
+        for rerun in _reruns.values():
+            rerun['totals'] = _new_totals()
+            rerun['sites'] = {}
+
+
+# ==================== Metered Client ====================
+# Thin proxies over the client, references, queries, batches and
+# transactions. Anything not metered is forwarded to the wrapped object, and
+# proxies are unwrapped before they are handed back to the real client.
+
+def _value_size(value: Any) -> int:
+    """Approximate stored size of a field value, following Firestore's storage size rules."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + 1 + _value_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(item) for item in value)
+    return 16
+
+
+def _document_size(path: str, data: Optional[Dict[str, Any]]) -> int:
+    """Approximate size of a document: its name plus its fields."""
+    return len(path) + 1 + 32 + (_value_size(data) if data else 0)
+
+
+def _snapshot_size(snapshot) -> int:
+    if not snapshot.exists:
+        return 0
+    # Snapshots keep their fields in _data; to_dict() would copy them
+    return _document_size(snapshot.reference.path, getattr(snapshot, '_data', None))
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Metered):
+        return value._raw
+    if isinstance(value, (list, tuple)) and any(isinstance(item, _Metered) for item in value):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def _unwrap_args(args: Iterable[Any], kwargs: Dict[str, Any]) -> Tuple[List[Any], Dict[str, Any]]:
+    return [_unwrap(arg) for arg in args], {key: _unwrap(value) for key, value in kwargs.items()}
+
+
+def _collection_id(path: str) -> str:
+    """Collection group of a collection path, e.g. 'products/*/stock_shards'."""
+    return '/*/'.join(path.split('/')[::2])
+
+
+def _document_collection(reference) -> str:
+    """Collection group of a document reference."""
+    return _collection_id(reference.path.rsplit('/', 1)[0])
+
+
+def _collection_of(ref_or_query) -> str:
+    return ref_or_query._collection if isinstance(ref_or_query, (MeteredDocument, MeteredQuery)) else '-'
+
+
+class _Metered:
+    __slots__ = ('_raw',)
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+    def __eq__(self, other) -> bool:
+        return self._raw == _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._raw)
+
+    def __repr__(self) -> str:
+        return f"Metered({self._raw!r})"
+
+
+class MeteredDocument(_Metered):
+    """Document reference whose get/set/create/update/delete are metered."""
+
+    __slots__ = ()
+
+    @property
+    def _collection(self) -> str:
+        return _document_collection(self._raw)
+
+    def collection(self, collection_id: str) -> 'MeteredCollection':
+        return MeteredCollection(self._raw.collection(collection_id))
+
+    def get(self, *args, **kwargs):
+        args, kwargs = _unwrap_args(args, kwargs)
+        started = time.perf_counter()
+        snapshot = self._raw.get(*args, **kwargs)
+        _record('get', self._collection, reads=1, nbytes=_snapshot_size(snapshot),
+                seconds=time.perf_counter() - started, result_count=int(snapshot.exists))
+        return snapshot
+
+    def _write(self, kind: str, data: Optional[Dict[str, Any]], *args, **kwargs):
+        args, kwargs = _unwrap_args(args, kwargs)
+        started = time.perf_counter()
+        result = getattr(self._raw, kind)(*args, **kwargs)
+        _record(kind, self._collection, writes=0 if kind == 'delete' else 1,
+                deletes=1 if kind == 'delete' else 0,
+                nbytes=_document_size(self._raw.path, data) if data is not None else 0,
+                seconds=time.perf_counter() - started)
+        return result
+
+    def set(self, document_data: Dict[str, Any], *args, **kwargs):
+        return self._write('set', document_data, document_data, *args, **kwargs)
+
+    def create(self, document_data: Dict[str, Any], *args, **kwargs):
+        return self._write('create', document_data, document_data, *args, **kwargs)
+
+    def update(self, field_updates: Dict[str, Any], *args, **kwargs):
+        return self._write('update', field_updates, field_updates, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write('delete', None, *args, **kwargs)
+
+
+class MeteredQuery(_Metered):
+    """
+    Query whose stream/get are metered; builder methods return metered
+    queries. While the slow operation log is on, each query also keeps the
+    builder calls that made it (its shape) for the log.
+    """
+
+    __slots__ = ('_collection', '_steps')
+
+    def __init__(self, raw, collection: str, steps: Tuple = ()):
+        super().__init__(raw)
+        self._collection = collection
+        self._steps = steps
+
+    def _chain(self, name: str, args, kwargs) -> 'MeteredQuery':
+        steps = self._steps
+        if slow_log.is_enabled():
+            steps += (slow_log.describe_step(name, args, kwargs),)
+        args, kwargs = _unwrap_args(args, kwargs)
+        return MeteredQuery(getattr(self._raw, name)(*args, **kwargs), self._collection, steps)
+
+    def where(self, *args, **kwargs):
+        return self._chain('where', args, kwargs)
+
+    def order_by(self, *args, **kwargs):
+        return self._chain('order_by', args, kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chain('limit', args, kwargs)
+
+    def limit_to_last(self, *args, **kwargs):
+        return self._chain('limit_to_last', args, kwargs)
+
+    def offset(self, *args, **kwargs):
+        return self._chain('offset', args, kwargs)
+
+    def select(self, *args, **kwargs):
+        return self._chain('select', args, kwargs)
+
+    def start_at(self, *args, **kwargs):
+        return self._chain('start_at', args, kwargs)
+
+    def start_after(self, *args, **kwargs):
+        return self._chain('start_after', args, kwargs)
+
+    def end_at(self, *args, **kwargs):
+        return self._chain('end_at', args, kwargs)
+
+    def end_before(self, *args, **kwargs):
+        return self._chain('end_before', args, kwargs)
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        """
+        Stream results; the call is recorded when the iteration ends or is
+        abandoned. Its latency is the time spent fetching results, not the
+        time the caller spends between them.
+        """
+        args, kwargs = _unwrap_args(args, kwargs)
+        count = nbytes = 0
+        seconds = 0.0
+        try:
+            started = time.perf_counter()
+            results = iter(self._raw.stream(*args, **kwargs))
+            while True:
+                try:
+                    snapshot = next(results)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - started
+                count += 1
+                nbytes += _snapshot_size(snapshot)
+                yield snapshot
+                started = time.perf_counter()
+        finally:
+            # A query is billed at least one read, even when it matches nothing
+            _record('query', self._collection, reads=max(1, count), nbytes=nbytes, seconds=seconds,
+                    result_count=count, steps=self._steps)
+
+    def get(self, *args, **kwargs) -> List[Any]:
+        return list(self.stream(*args, **kwargs))
+
+
+class MeteredCollection(MeteredQuery):
+    """Collection reference: a metered query that also hands out metered documents."""
+
+    __slots__ = ()
+
+    def __init__(self, raw):
+        # The fake keeps the collection path as a string, the SDK as a tuple of segments
+        path = getattr(raw, '_collection_path', None) or '/'.join(raw._path)
+        super().__init__(raw, _collection_id(path))
+
+    def document(self, *args, **kwargs) -> MeteredDocument:
+        return MeteredDocument(self._raw.document(*args, **kwargs))
+
+    def add(self, document_data: Dict[str, Any], *args, **kwargs):
+        started = time.perf_counter()
+        update_time, reference = self._raw.add(document_data, *args, **kwargs)
+        _record('add', self._collection, writes=1, nbytes=_document_size(reference.path, document_data),
+                seconds=time.perf_counter() - started)
+        return update_time, MeteredDocument(reference)
+
+
+class MeteredBatch(_Metered):
+    """Write batch that records its writes as one commit."""
+
+    __slots__ = ('_writes', '_deletes', '_bytes', '_collections')
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._reset_pending()
+
+    def _reset_pending(self):
+        self._writes = self._deletes = self._bytes = 0
+        self._collections = set()
+
+    def _buffer(self, kind: str, reference, data: Optional[Dict[str, Any]], args, kwargs):
+        args, kwargs = _unwrap_args(args, kwargs)
+        raw_reference = _unwrap(reference)
+        getattr(self._raw, kind)(raw_reference, *args, **kwargs)
+        if kind == 'delete':
+            self._deletes += 1
+        else:
+            self._writes += 1
+            self._bytes += _document_size(raw_reference.path, data)
+        self._collections.add(_document_collection(raw_reference))
+        return self
+
+    def create(self, reference, document_data: Dict[str, Any], *args, **kwargs):
+        return self._buffer('create', reference, document_data, (document_data,) + args, kwargs)
+
+    def set(self, reference, document_data: Dict[str, Any], *args, **kwargs):
+        return self._buffer('set', reference, document_data, (document_data,) + args, kwargs)
+
+    def update(self, reference, field_updates: Dict[str, Any], *args, **kwargs):
+        return self._buffer('update', reference, field_updates, (field_updates,) + args, kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._buffer('delete', reference, None, args, kwargs)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def _record_commit(self, seconds: float):
+        collection = ','.join(sorted(self._collections)) or '-'
+        _record('commit', collection, writes=self._writes, deletes=self._deletes, nbytes=self._bytes,
+                seconds=seconds)
+        self._reset_pending()
+
+    def commit(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._raw.commit(*args, **kwargs)
+        self._record_commit(time.perf_counter() - started)
+        return result
+
+
+class MeteredTransaction(MeteredBatch):
+    """Transaction whose reads are metered as they happen and writes when they commit."""
+
+    __slots__ = ()
+
+    def get(self, ref_or_query, *args, **kwargs):
+        args, kwargs = _unwrap_args(args, kwargs)
+        collection = _collection_of(ref_or_query)
+        started = time.perf_counter()
+        snapshots = list(self._raw.get(_unwrap(ref_or_query), *args, **kwargs))
+        _record('tx_get', collection, reads=max(1, len(snapshots)),
+                nbytes=sum(_snapshot_size(snapshot) for snapshot in snapshots),
+                seconds=time.perf_counter() - started, result_count=len(snapshots),
+                steps=ref_or_query._steps if isinstance(ref_or_query, MeteredQuery) else None)
+        return iter(snapshots)
+
+    def get_all(self, references, *args, **kwargs):
+        references = list(references)
+        args, kwargs = _unwrap_args(args, kwargs)
+        started = time.perf_counter()
+        snapshots = list(self._raw.get_all(_unwrap(references), *args, **kwargs))
+        _record('tx_get_all', _collection_of(references[0]) if references else '-', reads=len(snapshots),
+                nbytes=sum(_snapshot_size(snapshot) for snapshot in snapshots),
+                seconds=time.perf_counter() - started, result_count=len(snapshots),
+                shape={'documents': len(references)})
+        return iter(snapshots)
+
+    def _commit(self, *args, **kwargs):
+        # Called by firestore.transactional on Cloud Firestore
+        started = time.perf_counter()
+        result = self._raw._commit(*args, **kwargs)
+        self._record_commit(time.perf_counter() - started)
+        return result
+
+
+class MeteredClient(_Metered):
+    """Firestore client handing out metered references, queries, batches and transactions."""
+
+    __slots__ = ()
+
+    def collection(self, *args, **kwargs) -> MeteredCollection:
+        return MeteredCollection(self._raw.collection(*args, **kwargs))
+
+    def document(self, *args, **kwargs) -> MeteredDocument:
+        return MeteredDocument(self._raw.document(*args, **kwargs))
+
+    def get_all(self, references, *args, **kwargs) -> Iterator[Any]:
+        references = list(references)
+        args, kwargs = _unwrap_args(args, kwargs)
+        collection = _collection_of(references[0]) if references else '-'
+        started = time.perf_counter()
+        snapshots = list(self._raw.get_all(_unwrap(references), *args, **kwargs))
+        _record('get_all', collection, reads=len(snapshots),
+                nbytes=sum(_snapshot_size(snapshot) for snapshot in snapshots),
+                seconds=time.perf_counter() - started, result_count=len(snapshots),
+                shape={'documents': len(references)})
+        return iter(snapshots)
+
+    def batch(self) -> MeteredBatch:
+        return MeteredBatch(self._raw.batch())
+
+    def transaction(self, *args, **kwargs) -> MeteredTransaction:
+        return MeteredTransaction(self._raw.transaction(*args, **kwargs))
+
+    def run_transaction(self, callback, *args, **kwargs):
+        """In-memory client transactions: meter the callback's reads and the final commit."""
+        attempt: Dict[str, MeteredTransaction] = {}
+
+        def _metered_callback(transaction, *callback_args):
+            attempt['transaction'] = MeteredTransaction(transaction)
+            return callback(attempt['transaction'], *callback_args)
+
+        started = time.perf_counter()
+        result = self._raw.run_transaction(_metered_callback, *args, **kwargs)
+        if 'transaction' in attempt:
+            attempt['transaction']._record_commit(time.perf_counter() - started)
+        return result
@@ -0,0 +1,72 @@
+"""
+Follow-up work run in the background after an order is committed.
+The order_placed job confirms the order (status 'pending' -> 'confirmed');
+further steps such as confirmation emails or invoices belong in the same
+handler so they never lengthen the user-visible checkout.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_PLACED = 'order_placed'
+
+
+def handle_order_placed(payload: Dict[str, Any]):
+    """
+    Confirm a newly placed order. Only a 'pending' order is confirmed, so a
+    retried job leaves an already confirmed (or cancelled) order alone.
+    Raising makes the queue retry the job.
+
+    Args:
+        payload: Dictionary with 'order_id', 'user_id' and 'total'
+    """
+    from services.firebase_service import FirebaseService
+
+    firebase = FirebaseService()
+    db = firebase.get_db()
+    if db is None:
+        raise RuntimeError("Firestore is not available")
+
+    order_ref = db.collection('orders').document(payload['order_id'])
+
+    def _confirm(transaction):
+        snapshot = order_ref.get(transaction=transaction)
+        if not snapshot.exists or snapshot.to_dict().get('status') != 'pending':
+            return False
+        now = datetime.now()
+        transaction.update(order_ref, {'status': 'confirmed', 'confirmed_at': now, 'updated_at': now})
+        return True
+
+    if firebase.run_transaction(_confirm):
+        logger.info(
+            "Order %s placed by %s confirmed (total %s)",
+            payload['order_id'], payload.get('user_id'), payload.get('total')
+        )
+
+
+def register_order_jobs(queue):
+    """Register the order job handlers on a job queue."""
+    queue.register_handler(ORDER_PLACED, handle_order_placed)
+
+
+def enqueue_order_placed(order_id: str, user_id: str, order_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Enqueue post-order processing. Never raises: the order is already
+    committed, so a queue problem must not fail the checkout.
+
+    Returns:
+        The job ID, or None if the job could not be enqueued
+    """
+    try:
+        from services.job_queue import get_job_queue
+        return get_job_queue().enqueue(ORDER_PLACED, {
+            'order_id': order_id,
+            'user_id': user_id,
+            'total': order_data.get('totals', {}).get('total')
+        })
+    except Exception as e:
+        logger.warning("Could not enqueue post-order jobs for %s: %s", order_id, e)
+        return None
@@ -0,0 +1,246 @@
+"""
+Slow Firestore operation log.
+
+When 'slow_log_path' (SLOW_LOG_PATH) is set, every Firestore call made
+through the metered client (see services.metering) that takes at least
+'slow_log_threshold_ms' is written as one JSON line to a rotating file,
+together with the shape of the query that caused it:
+
+    {"ts": "...", "page": "orders", "site": "firebase_service.FirebaseService.get_user_orders",
+     "operation": "query", "collection": "orders", "latency_ms": 1840.2,
+     "filters": ["user_id == <str>"], "order_by": ["created_at DESC"], "limit": 10,
+     "result_count": 10, "reads": 10, "bytes": 24310}
+
+Filter values are replaced by their type so the log holds no user data.
+'slow_log_sample_rate' keeps only a fraction of the slow calls when they are
+frequent. Queries that keep showing up with a large result_count or without
+a limit are the candidates for a missing index or an oversized read.
+"""
+import json
+import logging
+import random
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# Threshold in seconds; False until read from settings, None when the log is off
+_threshold: Any = False
+_sample_rate = 1.0
+_file_logger: Optional[logging.Logger] = None
+_pages: Dict[Optional[str], str] = {}
+
+
+def _configure():
+    global _threshold, _sample_rate, _file_logger
+    from config.settings import get_settings
+    settings = get_settings()
+    with _lock:
+        if _threshold is not False:
+            return
+        if not settings.slow_log_path:
+            _threshold = None
+            return
+
+        handler = RotatingFileHandler(
+            settings.slow_log_path,
+            maxBytes=int(settings.slow_log_max_bytes),
+            backupCount=int(settings.slow_log_backup_count),
+            encoding='utf-8',
+            delay=True
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        file_logger = logging.getLogger('slow_operations')
+        file_logger.handlers = [handler]
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+
+        _file_logger = file_logger
+        _sample_rate = float(settings.slow_log_sample_rate)
+        _threshold = float(settings.slow_log_threshold_ms) / 1000
+
+
+def threshold_seconds() -> Optional[float]:
+    """Latency from which a call is logged, or None when the slow log is off."""
+    if _threshold is False:
+        _configure()
+    return _threshold
+
+
+def is_enabled() -> bool:
+    """Whether slow operations are logged."""
+    return threshold_seconds() is not None
+
+
+# ==================== Reruns ====================
+
+def _session_id() -> Optional[str]:
+    """ID of the Streamlit session running this code, None outside a script run."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except (ImportError, TypeError):
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+def begin_rerun(page: Optional[str] = None):
+    """Remember the page of the current session's script run for the entries it logs."""
+    if not is_enabled():
+        return
+    with _lock:
+        _pages[_session_id()] = page or 'unknown'
+
+
+def end_rerun():
+    """Forget the current session's page."""
+    if not is_enabled():
+        return
+    with _lock:
+        _pages.pop(_session_id(), None)
+
+
+# ==================== Query Shape ====================
+
+def _redact(value: Any) -> str:
+    """Placeholder for a filter value: its type, and its length for lists."""
+    if isinstance(value, (list, tuple, set)):
+        return f"<{type(value).__name__}[{len(value)}]>"
+    return f"<{type(value).__name__}>"
+
+
+def _describe_filter(flt: Any) -> str:
+    """'field op <type>' for a FieldFilter, '(a AND b)' for a composite filter."""
+    nested = getattr(flt, 'filters', None)
+    if nested is not None:
+        operator = str(getattr(flt, 'operator', 'AND')).rsplit('.', 1)[-1].upper()
+        return '(' + f" {operator} ".join(_describe_filter(item) for item in nested) + ')'
+    return f"{getattr(flt, 'field_path', '?')} {getattr(flt, 'op_string', '?')} {_redact(getattr(flt, 'value', None))}"
+
+
+def describe_step(method: str, args: Sequence[Any], kwargs: Dict[str, Any]) -> Tuple[str, Any]:
+    """
+    Summarize one query builder call for the log.
+
+    Returns:
+        (method, description) where filter values are redacted
+    """
+    if method == 'where':
+        if kwargs.get('filter') is not None:
+            return method, _describe_filter(kwargs['filter'])
+        field_path = args[0] if len(args) > 0 else kwargs.get('field_path')
+        op_string = args[1] if len(args) > 1 else kwargs.get('op_string')
+        value = args[2] if len(args) > 2 else kwargs.get('value')
+        return method, f"{field_path} {op_string} {_redact(value)}"
+    if method == 'order_by':
+        field_path = args[0] if args else kwargs.get('field_path')
+        direction = args[1] if len(args) > 1 else kwargs.get('direction', 'ASCENDING')
+        return method, f"{field_path} {'DESC' if str(direction).upper().startswith('DESC') else 'ASC'}"
+    if method in ('limit', 'limit_to_last', 'offset'):
+        return method, args[0] if args else next(iter(kwargs.values()), None)
+    if method == 'select':
+        field_paths = args[0] if args else kwargs.get('field_paths', ())
+        return method, len(list(field_paths))
+    # Cursors: only whether one was used
+    return method, True
+
+
+def query_shape(steps: Sequence[Tuple[str, Any]]) -> Dict[str, Any]:
+    """Fold the builder steps of a query into 'filters', 'order_by', 'limit', ... entries."""
+    shape: Dict[str, Any] = {'filters': [], 'order_by': [], 'limit': None}
+    for method, description in steps:
+        if method == 'where':
+            shape['filters'].append(description)
+        elif method == 'order_by':
+            shape['order_by'].append(description)
+        elif method == 'select':
+            shape['select_fields'] = description
+        elif method in ('limit', 'limit_to_last', 'offset'):
+            shape[method] = description
+        else:
+            shape.setdefault('cursors', []).append(method)
+    return shape
+
+
+# ==================== Logging ====================
+
+def record(operation: str, collection: str, seconds: float, site: str, reads: int = 0, writes: int = 0,
+           deletes: int = 0, nbytes: int = 0, result_count: Optional[int] = None,
+           shape: Optional[Dict[str, Any]] = None):
+    """Write one slow call to the log, subject to sampling. Call only above threshold_seconds()."""
+    if _sample_rate < 1.0 and random.random() >= _sample_rate:
+        return
+
+    with _lock:
+        page = _pages.get(_session_id(), 'unknown')
+    entry: Dict[str, Any] = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'page': page,
+        'site': site,
+        'operation': operation,
+        'collection': collection,
+        'latency_ms': round(seconds * 1000, 1),
+    }
+    if shape:
+        entry.update(shape)
+    if result_count is not None:
+        entry['result_count'] = result_count
+    entry.update({'reads': reads, 'writes': writes, 'deletes': deletes, 'bytes': nbytes})
+    if _sample_rate < 1.0:
+        entry['sample_rate'] = _sample_rate
+
+    try:
+        _file_logger.info(json.dumps(entry, default=str))
+    except Exception as e:
+        logger.warning("Could not write slow operation log entry: %s", e)
+
+
+def summarize(path: Optional[str] = None, top: int = 20) -> str:
+    """
+    Group the entries of a slow log file by query shape, most frequent first.
+
+    Args:
+        path: Log file (the 'slow_log_path' setting by default)
+        top: Number of shapes to list
+    """
+    if path is None:
+        from config.settings import get_settings
+        path = get_settings().slow_log_path
+    groups: Dict[Tuple, Dict[str, Any]] = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = (entry['operation'], entry['collection'], ' AND '.join(entry.get('filters', [])),
+                   ', '.join(entry.get('order_by', [])), entry.get('limit', '-'))
+            group = groups.setdefault(key, {'count': 0, 'latency_ms': 0.0, 'max_latency_ms': 0.0,
+                                            'max_results': 0, 'pages': set()})
+            group['count'] += 1
+            group['latency_ms'] += entry['latency_ms']
+            group['max_latency_ms'] = max(group['max_latency_ms'], entry['latency_ms'])
+            group['max_results'] = max(group['max_results'], entry.get('result_count') or 0)
+            group['pages'].add(entry['page'])
+
+    lines = [f"{'op':<8} {'collection':<16} {'filters / order / limit':<60} {'count':>6} {'avg ms':>8} "
+             f"{'max ms':>8} {'max rows':>8}  pages"]
+    for (operation, collection, filters, order_by, limit), group in sorted(
+            groups.items(), key=lambda item: -item[1]['count'])[:top]:
+        # Only queries have a limit; document reads and writes have no shape beyond the collection
+        limit_part = '' if limit == '-' else f"limit {limit}" if limit is not None else 'no limit'
+        shape = ' | '.join(part for part in (filters, order_by and f"order {order_by}", limit_part) if part) or '-'
+        lines.append(
+            f"{operation:<8} {collection[:16]:<16} {shape[:60]:<60} {group['count']:>6,} "
+            f"{group['latency_ms'] / group['count']:>8.0f} {group['max_latency_ms']:>8.0f} "
+            f"{group['max_results']:>8,}  {','.join(sorted(group['pages']))}"
+        )
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import sys
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,253 @@
+"""
+ID-token lifecycle management.
+
+Firebase ID tokens expire after one hour. TokenManager tracks the expiry of
+a session's token and exchanges the refresh token for a new ID token via the
+secure-token endpoint shortly before it expires, so callers asking for a
+token never block on a refresh or a new sign-in. The refreshes of all
+sessions run on one shared scheduler thread, earliest first.
+
+Every script run of a signed-in session calls check_session_user(), which
+verifies the session's current ID token (once per token) and signs the
+session out when its refresh token was rejected.
+"""
+import base64
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import streamlit as st
+from services.http_session import http_post
+
+
+logger = logging.getLogger(__name__)
+
+
+SECURE_TOKEN_URL = 'https://securetoken.googleapis.com/v1/token'
+
+# Refresh this many seconds before the token expires
+_REFRESH_MARGIN = 300
+# Retry delay after a failed background refresh
+_RETRY_DELAY = 30
+# Sessions whose token was not requested for this long stop refreshing in the
+# background (abandoned browser tabs), and resume on their next request
+_IDLE_LIMIT = 7200
+
+
+def _token_expiry(id_token: str) -> float:
+    """Read the exp claim of a JWT without verifying it (0 if unreadable)."""
+    try:
+        payload = id_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload)).get('exp', 0))
+    except Exception:
+        return 0.0
+
+
+class _RefreshScheduler:
+    """
+    One daemon thread that runs the background refreshes of all sessions.
+    Refreshes run one after another; the refresh margin leaves minutes for
+    a queue of them to drain before any token expires.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, 'TokenManager']] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, manager: 'TokenManager', due: float):
+        """Run manager's refresh at time due, unless it is rescheduled or stopped before."""
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._counter), manager))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='token-refresh', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+                due, _, manager = heapq.heappop(self._heap)
+            # Entries superseded by a later schedule() or by stop() are skipped
+            if manager._due != due:
+                continue
+            try:
+                manager._background_refresh()
+            except Exception:
+                logger.exception("Background token refresh failed")
+
+
+_scheduler = _RefreshScheduler()
+
+
+class TokenManager:
+    """Keeps a session's ID token fresh using its refresh token."""
+
+    def __init__(self, api_key: str, id_token: str, refresh_token: str,
+                 expires_in: Optional[Any] = None):
+        """
+        Args:
+            api_key: Firebase Web API Key
+            id_token: Current ID token
+            refresh_token: Refresh token returned at sign-in
+            expires_in: Seconds until the ID token expires (read from the token if omitted)
+        """
+        self._api_key = api_key
+        self._lock = threading.Lock()
+        # Time of the pending background refresh, None when none is pending
+        self._due: Optional[float] = None
+        self._stopped = False
+        self._idle = False
+        self.last_used = time.time()
+        self.valid = True
+        self._set_tokens(id_token, refresh_token, expires_in)
+
+    def _set_tokens(self, id_token: str, refresh_token: str, expires_in: Optional[Any]):
+        """Store new tokens and schedule the next background refresh."""
+        self._id_token = id_token
+        self._refresh_token = refresh_token
+        self.expires_at = time.time() + float(expires_in) if expires_in else _token_expiry(id_token)
+
+        if self._stopped:
+            return
+        delay = max(self.expires_at - _REFRESH_MARGIN - time.time(), 0)
+        self._schedule(delay)
+
+    def _schedule(self, delay: float):
+        """Run a background refresh after delay seconds, replacing any pending one."""
+        self._due = time.time() + delay
+        _scheduler.schedule(self, self._due)
+
+    def _background_refresh(self):
+        """Scheduler callback: refresh, retrying later on transient errors."""
+        self._due = None
+        if time.time() - self.last_used > _IDLE_LIMIT:
+            self._idle = True
+            return
+        if not self.refresh() and self.valid and not self._stopped:
+            with self._lock:
+                self._schedule(_RETRY_DELAY)
+
+    def refresh(self) -> bool:
+        """
+        Exchange the refresh token for a new ID token.
+
+        Returns:
+            True on success. A rejected refresh token marks the manager invalid.
+        """
+        with self._lock:
+            if not self.valid or self._stopped:
+                return False
+            try:
+                response = http_post(
+                    f"{SECURE_TOKEN_URL}?key={self._api_key}",
+                    endpoint='securetoken',
+                    data={'grant_type': 'refresh_token', 'refresh_token': self._refresh_token}
+                )
+            except Exception:
+                return False
+
+            if response.status_code == 200:
+                data = response.json()
+                self._set_tokens(data['id_token'], data['refresh_token'], data.get('expires_in'))
+                return True
+
+            if 400 <= response.status_code < 500:
+                # TOKEN_EXPIRED, USER_DISABLED, INVALID_REFRESH_TOKEN...: a new sign-in is required
+                self.valid = False
+            return False
+
+    def get_id_token(self) -> Optional[str]:
+        """
+        Get a valid ID token.
+        Normally returns immediately because the background refresh already ran;
+        refreshes synchronously only if the token has expired (e.g. after the
+        process was suspended).
+
+        Returns:
+            The ID token, or None if the session must sign in again
+        """
+        if not self.valid:
+            return None
+        self.last_used = time.time()
+
+        if time.time() >= self.expires_at:
+            if not self.refresh():
+                return None
+        elif self._idle:
+            with self._lock:
+                self._schedule(max(self.expires_at - _REFRESH_MARGIN - time.time(), 0))
+        self._idle = False
+        return self._id_token
+
+    def stop(self):
+        """Cancel background refreshes (on sign-out)."""
+        self._stopped = True
+        self._due = None
+
+
+def start_session_tokens(user_data: Dict[str, Any]):
+    """
+    Store a TokenManager for the signed-in user in session state.
+
+    Args:
+        user_data: Result of AuthService.sign_in or sign_up
+    """
+    from config.settings import get_firebase_api_key
+
+    stop_session_tokens()
+    st.session_state.token_manager = TokenManager(
+        get_firebase_api_key(),
+        user_data.get('idToken'),
+        user_data.get('refreshToken'),
+        user_data.get('expiresIn')
+    )
+
+
+def stop_session_tokens():
+    """Stop and remove the session's TokenManager."""
+    st.session_state.pop('verified_id_token', None)
+    manager = st.session_state.pop('token_manager', None)
+    if manager is not None:
+        manager.stop()
+
+
+def get_session_id_token() -> Optional[str]:
+    """Get a valid ID token for the current session, or None if not signed in."""
+    manager = st.session_state.get('token_manager')
+    return manager.get_id_token() if manager else None
+
+
+def check_session_user() -> bool:
+    """
+    Check that the signed-in user of the current session still holds a valid
+    ID token. The token is verified with AuthService.verify_token once per
+    token, i.e. after sign-in and after each refresh.
+
+    Returns:
+        False if the session must sign in again: no token manager, a
+        rejected refresh token, or a token that does not belong to the user
+    """
+    user = st.session_state.get('user')
+    if not user:
+        return False
+
+    id_token = get_session_id_token()
+    if id_token is None:
+        return False
+    if st.session_state.get('verified_id_token') == id_token:
+        return True
+
+    from services.auth_service import AuthService
+    claims = AuthService.verify_token(id_token)
+    if not claims or claims['uid'] != user['uid']:
+        return False
+    st.session_state.verified_id_token = id_token
+    return True
@@ -0,0 +1,137 @@
+"""
+Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed with Google's securetoken keys.
+Instead of calling accounts:lookup for every check, tokens are verified
+locally against the public certificates, which are cached for their
+Cache-Control max-age and refreshed in the background before they expire.
+Tokens that already passed verification are cached until their expiry, so
+repeated checks of the same session token are a dictionary lookup.
+"""
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+from utils.cache import TTLCache
+from utils.metrics import track_cache
+
+
+CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+ISSUER_PREFIX = 'https://securetoken.google.com/'
+
+# Certificates are refreshed this many seconds before their max-age runs out
+_REFRESH_MARGIN = 300
+# Fallback lifetime when the response has no usable Cache-Control header
+_DEFAULT_MAX_AGE = 3600
+_CLOCK_SKEW = 60
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens with cached Google signing certificates."""
+
+    def __init__(self, project_id: str, verified_cache_size: int = 4096):
+        """
+        Args:
+            project_id: Firebase project ID (expected audience of the tokens)
+            verified_cache_size: Maximum number of verified tokens kept in memory
+        """
+        self.project_id = project_id
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._verified = TTLCache(maxsize=verified_cache_size)
+        track_cache('verified_tokens', self._verified)
+
+    def _fetch_certs(self):
+        """Download the signing certificates and schedule the next refresh."""
+        from services.http_session import http_get
+
+        response = http_get(CERTS_URL, endpoint='securetoken_certs')
+        response.raise_for_status()
+
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else _DEFAULT_MAX_AGE
+
+        with self._lock:
+            self._certs = response.json()
+            self._certs_expire_at = time.time() + max_age
+            self._schedule_refresh(max(max_age - _REFRESH_MARGIN, 60))
+
+    def _schedule_refresh(self, delay: float):
+        """Refresh the certificates in a background thread after delay seconds."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        """Timer callback; on failure retry soon, the current keys stay usable until expiry."""
+        try:
+            self._fetch_certs()
+        except Exception:
+            with self._lock:
+                self._schedule_refresh(60)
+
+    def _get_certs(self) -> Dict[str, str]:
+        """Get the current certificates, fetching them only if missing or expired."""
+        if not self._certs or time.time() >= self._certs_expire_at:
+            self._fetch_certs()
+        return self._certs
+
+    def verify(self, id_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify a Firebase ID token.
+
+        Args:
+            id_token: Firebase ID token
+
+        Returns:
+            Decoded token claims, or None if the token is invalid or expired
+        """
+        if not id_token:
+            return None
+
+        cache_key = hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+        claims = self._verified.get(cache_key)
+        if claims is not None:
+            if claims.get('exp', 0) > time.time():
+                return claims
+            self._verified.pop(cache_key)
+
+        try:
+            from google.auth import jwt
+
+            claims = jwt.decode(
+                id_token,
+                certs=self._get_certs(),
+                audience=self.project_id,
+                clock_skew_in_seconds=_CLOCK_SKEW
+            )
+        except Exception:
+            return None
+
+        if claims.get('iss') != ISSUER_PREFIX + self.project_id:
+            return None
+        if not claims.get('sub'):
+            return None
+        if claims.get('auth_time', 0) > time.time() + _CLOCK_SKEW:
+            return None
+
+        self._verified.set(cache_key, claims, ttl=claims['exp'] - time.time())
+        return claims
+
+
+_verifiers: Dict[str, TokenVerifier] = {}
+_verifiers_lock = threading.Lock()
+
+
+def get_token_verifier(project_id: str) -> TokenVerifier:
+    """Get the process-wide verifier for a Firebase project."""
+    if project_id not in _verifiers:
+        with _verifiers_lock:
+            if project_id not in _verifiers:
+                _verifiers[project_id] = TokenVerifier(project_id)
+    return _verifiers[project_id]
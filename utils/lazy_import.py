@@ -0,0 +1,59 @@
+"""
+Deferred module imports.
+
+The Google SDKs (firebase_admin, google.cloud.firestore, google.auth, grpc)
+and requests take several hundred milliseconds to import. Modules that need
+them bind a LazyModule at import time instead, and the real import happens
+the first time an attribute is used, i.e. when a Firestore, Storage or Auth
+code path actually runs.
+"""
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        """Import the target module (once) and return it."""
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Get a module without importing it yet.
+
+    Args:
+        name: Fully qualified module name (e.g. 'firebase_admin.firestore')
+
+    Returns:
+        The module itself if it was already imported, otherwise a LazyModule
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
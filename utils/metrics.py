@@ -0,0 +1,320 @@
+"""
+Prometheus-style metrics.
+
+A small in-process registry of counters, gauges and histograms with
+labels, rendered in the Prometheus text exposition format (0.0.4). When the
+'metrics_port' setting (METRICS_PORT) is set, start_metrics_server() serves
+them at /metrics from a daemon HTTP server thread inside the Streamlit
+process, ready to be scraped.
+
+Metrics are always counted (an update is a dictionary operation under a
+lock); only the server is optional. Values that already live elsewhere,
+such as a cache's hit counters, can be exported with track(), which reads
+them at scrape time.
+"""
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _Metric:
+    """A metric family: one value per combination of label values."""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def track(self, fn: Callable[[], float], **labels):
+        """Export fn()'s value at scrape time for these labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def _samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(name, label names, label values, value) rows for the exposition."""
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                value = fn()
+            except Exception:
+                logger.debug("Metric function for %s%s failed", self.name, key, exc_info=True)
+                continue
+            if value is not None:
+                values[key] = value
+        return [(self.name, self.labelnames, key, value) for key, value in sorted(values.items())]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for name, labelnames, labelvalues, value in self._samples():
+            lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations (e.g. latencies in seconds) in cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label key: [count per bucket..., count in +Inf], sum
+        self._observations: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def track(self, fn: Callable[[], float], **labels):
+        raise TypeError("Histograms cannot track a function")
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._observations.get(key)
+            if entry is None:
+                entry = self._observations[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def _samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        with self._lock:
+            observations = {key: (list(counts), total[0]) for key, (counts, total) in self._observations.items()}
+
+        samples = []
+        names = self.labelnames + ('le',)
+        for key, (counts, total) in sorted(observations.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", names, key + (_format_value(bound),), cumulative))
+            samples.append((f"{self.name}_sum", self.labelnames, key, total))
+            samples.append((f"{self.name}_count", self.labelnames, key, cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of metric families, rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+# ==================== Application Metrics ====================
+
+CACHE_LOOKUPS = counter('app_cache_lookups_total', 'Cache lookups.', ['cache'])
+CACHE_MISSES = counter('app_cache_misses_total', 'Cache lookups that had to load the value.', ['cache'])
+SAVED_READS = counter('app_saved_reads_total', 'Document reads served from the per-rerun read context.',
+                      ['collection'])
+RERUNS = counter('app_reruns_total', 'Streamlit script runs started.', ['page'])
+RERUN_SECONDS = histogram('app_rerun_duration_seconds', 'Duration of completed script runs.', ['page'])
+ACTIVE_SESSIONS = gauge('app_active_sessions', 'Browser sessions connected to this process.')
+RATE_LIMIT_REQUESTS = counter('app_rate_limit_requests_total', 'Requests checked by a rate limiter.',
+                              ['limiter', 'result'])
+
+
+def track_cache(name: str, cache):
+    """Export the hit/miss counters of a utils.cache.TTLCache."""
+    CACHE_LOOKUPS.track(lambda: cache.hits + cache.misses, cache=name)
+    CACHE_MISSES.track(lambda: cache.misses, cache=name)
+
+
+def track_limiter(name: str, limiter):
+    """Export the allowed/throttled counters of a utils.rate_limiter.TokenBucketLimiter."""
+    RATE_LIMIT_REQUESTS.track(lambda: limiter.stats()['allowed'], limiter=name, result='allowed')
+    RATE_LIMIT_REQUESTS.track(lambda: limiter.stats()['throttled'], limiter=name, result='throttled')
+
+
+def _active_sessions() -> Optional[int]:
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        return runtime.get_instance()._session_mgr.num_active_sessions()
+    except Exception:
+        return None
+
+
+ACTIVE_SESSIONS.track(_active_sessions)
+
+
+# ==================== HTTP Server ====================
+
+_server: Optional[Any] = None
+_server_lock = threading.Lock()
+_server_checked = False
+
+
+def _make_handler(registry: Registry):
+    # http.server is only imported when the server is enabled
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def is_enabled() -> bool:
+    """Whether the metrics server is configured."""
+    from config.settings import get_settings
+    return get_settings().metrics_port is not None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None):
+    """
+    Start serving /metrics once per process. Without a port argument the
+    'metrics_port' and 'metrics_host' settings are used, and nothing is
+    started when no port is configured.
+
+    Returns:
+        The running server, or None if disabled or the port is unavailable
+    """
+    global _server, _server_checked
+    if _server is not None or (_server_checked and port is None):
+        return _server
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        _server_checked = True
+
+        from config.settings import get_settings
+        settings = get_settings()
+        port = settings.metrics_port if port is None else port
+        if port is None:
+            return None
+
+        from http.server import ThreadingHTTPServer
+        try:
+            server = ThreadingHTTPServer((host or settings.metrics_host, int(port)), _make_handler(REGISTRY))
+        except OSError as e:
+            # e.g. another Streamlit process on this host already serves the port
+            logger.warning("Metrics server not started on port %s: %s", port, e)
+            return None
+
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", *server.server_address[:2])
+        _server = server
+        return _server
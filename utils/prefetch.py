@@ -0,0 +1,112 @@
+"""
+Parallel prefetching of a page's independent reads.
+
+A page declares the data it needs before it starts rendering. Each fetch is
+submitted to a shared, bounded thread pool right away, and the page collects
+the results where it renders them, so independent reads (cart, categories,
+products) overlap and the page waits for the slowest one instead of their
+sum. A fetch that fails or is not ready within its timeout yields its
+fallback value instead.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Get the process-wide prefetch thread pool, shared by all sessions."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from config.settings import get_settings
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_settings().prefetch_workers,
+                    thread_name_prefix='prefetch'
+                )
+    return _executor
+
+
+def _with_script_context(fn: Callable) -> Callable:
+    """
+    Wrap fn so it runs with the submitting script run's context.
+    Fetches can then use st.session_state, st.cache_data and st.error like
+    code running in the script thread.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        return fn
+
+    if ctx is None:
+        return fn
+
+    def _run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+    return _run
+
+
+class PagePrefetcher:
+    """Fetches declared up front and collected while the page renders."""
+
+    def __init__(self, timeout: Optional[float] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Args:
+            timeout: Default seconds get() waits for a fetch (prefetch_timeout_seconds if omitted)
+            executor: Thread pool to run fetches on (the shared prefetch pool if omitted)
+        """
+        if timeout is None:
+            from config.settings import get_settings
+            timeout = get_settings().prefetch_timeout_seconds
+        self.timeout = timeout
+        self._executor = executor or get_prefetch_executor()
+        self._fetches: Dict[str, Tuple[Future, Any, float]] = {}
+
+    def add(self, name: str, fn: Callable[[], Any], fallback: Any = None,
+            timeout: Optional[float] = None) -> 'PagePrefetcher':
+        """
+        Start a fetch in the background.
+
+        Args:
+            name: Result name passed to get()
+            fn: Callable without arguments performing the read
+            fallback: Value get() returns if the fetch fails or times out
+            timeout: Seconds get() waits for this fetch (overrides the default)
+
+        Returns:
+            The prefetcher, so calls can be chained
+        """
+        future = self._executor.submit(_with_script_context(fn))
+        self._fetches[name] = (future, fallback, self.timeout if timeout is None else timeout)
+        return self
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._fetches
+
+    def get(self, name: str) -> Any:
+        """
+        Wait for a fetch and return its result.
+        The timeout counts from this call, so a page that first waits for
+        something else (e.g. Firebase initialization) does not lose its data.
+
+        Returns:
+            The fetch result, or its fallback if it failed or timed out
+        """
+        future, fallback, timeout = self._fetches[name]
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.warning("Prefetch %r timed out after %.1fs; using fallback", name, timeout)
+        except Exception:
+            logger.exception("Prefetch %r failed; using fallback", name)
+        return fallback
@@ -0,0 +1,206 @@
+"""
+Lightweight timing spans for the app's hot paths.
+
+span() is a context manager and timed() a decorator that measure a block or
+function; instrument() applies timed() to every public method of a class.
+Spans may nest: each one records its total time and its self time (total
+minus the time of the spans opened inside it), aggregated by name for the
+current session's script run (rerun). end_rerun() returns the summary,
+which the app shows in its performance panel and logs as one JSON line.
+
+Profiling is switched on with the 'profiling' setting or PROFILING=1. When
+it is off, span() returns a shared no-op context manager and timed
+functions call straight through, so instrumented code costs one flag check.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_enabled: Optional[bool] = None
+_lock = threading.Lock()
+_reruns: Dict[Optional[str], Dict[str, Any]] = {}
+# Spans open in the current thread, innermost last
+_local = threading.local()
+
+
+def is_enabled() -> bool:
+    """Whether spans are recorded (read from settings on first use)."""
+    global _enabled
+    if _enabled is None:
+        from config.settings import get_settings
+        _enabled = bool(get_settings().profiling)
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    """Turn profiling on or off for the whole process."""
+    global _enabled
+    _enabled = enabled
+
+
+def _session_id() -> Optional[str]:
+    """ID of the Streamlit session running this code, None outside a script run."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except (ImportError, TypeError):
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+class _NullSpan:
+    """Span used while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'started', 'child_ms', 'rerun')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.child_ms = 0.0
+
+    def __enter__(self):
+        with _lock:
+            self.rerun = _reruns.get(_session_id())
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].child_ms += elapsed_ms
+
+        if self.rerun is not None:
+            with _lock:
+                spans = self.rerun['spans']
+                totals = spans.get(self.name)
+                if totals is None:
+                    totals = spans[self.name] = {'count': 0, 'total_ms': 0.0, 'self_ms': 0.0, 'max_ms': 0.0,
+                                                 'depth': len(stack)}
+                totals['count'] += 1
+                totals['total_ms'] += elapsed_ms
+                totals['self_ms'] += elapsed_ms - self.child_ms
+                totals['max_ms'] = max(totals['max_ms'], elapsed_ms)
+                totals['depth'] = min(totals['depth'], len(stack))
+        return False
+
+
+def span(name: str):
+    """
+    Time a block::
+
+        with span('render.css'):
+            st.markdown(CSS, unsafe_allow_html=True)
+    """
+    if not is_enabled():
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name: Any = None):
+    """
+    Decorator timing every call of a function, as ``@timed`` or ``@timed('name')``.
+    The span is named after the function's qualified name unless given.
+    """
+    def decorate(fn: Callable) -> Callable:
+        label = name if isinstance(name, str) else fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        return decorate(name)
+    return decorate
+
+
+def instrument(prefix: str):
+    """Class decorator timing every public method as '<prefix>.<method>'."""
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_'):
+                continue
+            if isinstance(value, staticmethod):
+                setattr(cls, attr, staticmethod(timed(f"{prefix}.{attr}")(value.__func__)))
+            elif isinstance(value, classmethod):
+                setattr(cls, attr, classmethod(timed(f"{prefix}.{attr}")(value.__func__)))
+            elif callable(value):
+                setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+    return decorate
+
+
+# ==================== Reruns ====================
+
+def begin_rerun(page: Optional[str] = None):
+    """Start collecting spans for the current session's script run. Call at the top of the script."""
+    if not is_enabled():
+        return
+    with _lock:
+        _reruns[_session_id()] = {
+            'page': page or 'unknown',
+            'started_at': datetime.now(),
+            'perf_started': time.perf_counter(),
+            'spans': {}
+        }
+
+
+def end_rerun() -> Optional[Dict[str, Any]]:
+    """
+    Finish the current session's script run and log its summary as JSON.
+
+    Returns:
+        Dictionary with 'page', 'started_at', 'duration_ms' and 'spans' (one
+        entry per span name, slowest total first), or None if profiling is off
+    """
+    if not is_enabled():
+        return None
+    with _lock:
+        rerun = _reruns.pop(_session_id(), None)
+    if rerun is None:
+        return None
+
+    spans: List[Dict[str, Any]] = sorted(
+        ({'name': name, **totals} for name, totals in rerun['spans'].items()),
+        key=lambda row: -row['total_ms']
+    )
+    summary = {
+        'page': rerun['page'],
+        'started_at': rerun['started_at'].isoformat(),
+        'duration_ms': round((time.perf_counter() - rerun['perf_started']) * 1000, 3),
+        'spans': [
+            {**row, 'total_ms': round(row['total_ms'], 3), 'self_ms': round(row['self_ms'], 3),
+             'max_ms': round(row['max_ms'], 3)}
+            for row in spans
+        ]
+    }
+    logger.info(json.dumps({'event': 'rerun_profile', **summary}))
+    return summary
@@ -0,0 +1,104 @@
+"""
+In-process token-bucket rate limiting.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class _Bucket:
+    """Token bucket state for one key."""
+
+    __slots__ = ('tokens', 'updated', 'lock')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.lock = threading.Lock()
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary value (email, session ID, ...).
+
+    Each key may burst up to capacity requests and then gets refill_rate
+    requests per second. The map lock is only held for O(1) lookups and
+    each bucket has its own lock, so different keys never wait on each
+    other's token math. At most max_keys buckets are kept; the least
+    recently used (idle) ones are evicted first, and an evicted bucket
+    simply starts full again.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, max_keys: int = 10000):
+        """
+        Args:
+            capacity: Maximum burst size (tokens per bucket)
+            refill_rate: Tokens added per second
+            max_keys: Maximum number of buckets kept in memory
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # Counters are shared by all keys, so they get their own lock
+        self._stats_lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+
+    def _get_bucket(self, key: Hashable, now: float) -> _Bucket:
+        """Get or create the bucket for a key, marking it recently used."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = _Bucket(self.capacity, now)
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def allow(self, key: Hashable, cost: float = 1.0) -> bool:
+        """
+        Take tokens for one request.
+
+        Returns:
+            True if the request may proceed, False if it is throttled
+        """
+        now = time.monotonic()
+        bucket = self._get_bucket(key, now)
+
+        with bucket.lock:
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill_rate)
+            bucket.updated = now
+            allowed = bucket.tokens >= cost
+            if allowed:
+                bucket.tokens -= cost
+
+        with self._stats_lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.throttled += 1
+        return allowed
+
+    def retry_after(self, key: Hashable, cost: float = 1.0) -> float:
+        """Seconds until a request for key would be allowed."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+
+        with bucket.lock:
+            tokens = min(self.capacity, bucket.tokens + (time.monotonic() - bucket.updated) * self.refill_rate)
+            return max(cost - tokens, 0) / self.refill_rate
+
+    def stats(self) -> Dict[str, Any]:
+        """Get allowed/throttled counters and the number of tracked keys."""
+        with self._stats_lock:
+            stats = {'allowed': self.allowed, 'throttled': self.throttled}
+        with self._lock:
+            stats['keys'] = len(self._buckets)
+        return stats